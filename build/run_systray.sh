@@ -61,9 +61,9 @@ while true; do
     if pgrep -x "dwm" > /dev/null; then
         echo "DWM is running. Starting systray..."
 
-        # Run the main Python script using absolute paths
+        # Run the main Python script using absolute paths; it records our PID in its registry
         LOGFILE="/tmp/systray_output.log"
-        "$VENV_DIR/bin/python3" "$SRC_DIR/main.py" --assets-dir="$ASSETS_DIR" "$@" > "$LOGFILE" 2>&1 &
+        SYSTRAY_WRAPPER_PID=$$ "$VENV_DIR/bin/python3" "$SRC_DIR/main.py" --assets-dir="$ASSETS_DIR" "$@" > "$LOGFILE" 2>&1 &
         SYSTRAY_PID=$!
         echo "Systray application started with PID $SYSTRAY_PID. Logs are being written to $LOGFILE"
 
@@ -2,23 +2,47 @@
 # src/main.py
 
 import os
+import importlib
 import pystray
 from pystray import MenuItem as item, Menu
-from PIL import Image, ImageDraw
 import subprocess
-import threading
 import signal
-import psutil
-import tkinter as tk
-from tkinter import messagebox
-from utils.sudo_prompt import prompt_sudo_password
-from utils.shutdown_timer import start_shutdown_timer
-from utils.conky import toggle_conky, check_conky_status
-from utils.bluetooth_control import show_bluetooth_control
-from utils.xrandr_tool import show_xrandr_control
-from utils.brightness_slider import show_brightness_slider  
+from utils.conky import toggle_conky
 from utils.camera_recorder_control import toggle_camera, toggle_screenrecorder
-from utils.screenshot_tool import display_screenshot_tool  # Import the screenshot tool
+from utils.supervisor import supervisor
+from utils.scheduler import get_scheduler
+from utils.tray_state import tray_state
+from utils.dispatcher import dispatcher
+from utils.icon_cache import get_icon_cache
+from utils.pid_registry import pid_registry, terminate_process
+from utils.screenshot_index import get_screenshot_index
+
+# Feature entry points keyed by menu action. They (and tkinter, PAM, D-Bus)
+# are imported on first use so the icon shows up without paying for them at startup.
+FEATURES = {
+    "bluetooth": ("utils.bluetooth_control", "show_bluetooth_control"),
+    "display": ("utils.xrandr_tool", "show_xrandr_control"),
+    "brightness": ("utils.brightness_slider", "show_brightness_slider"),
+    "screenshot": ("utils.screenshot_tool", "display_screenshot_tool"),
+    "output": ("utils.output_viewer", "show_child_output"),
+    "clipboard_screenshot": ("utils.screenshot_tool", "screenshot_to_clipboard"),
+    "shutdown": ("utils.shutdown_timer", "start_shutdown_timer"),
+    "sudo": ("utils.sudo_prompt", "prompt_sudo_password"),
+    "ui_call": ("utils.ui_thread", "call_in_ui"),
+    "ui_open": ("utils.ui_thread", "open_window"),
+    "bluez": ("utils.bluez_client", "get_bluez_client"),
+}
+loaded_features = {}
+
+def load_feature(name):
+    if name not in loaded_features:
+        module_name, attribute = FEATURES[name]
+        loaded_features[name] = getattr(importlib.import_module(module_name), attribute)
+    return loaded_features[name]
+
+def open_feature_window(name, *args):
+    # The feature module itself is imported on the UI thread, not the tray thread
+    load_feature("ui_open")(name, lambda: load_feature(name)(*args))
 
 # Nerdfont glyphs for each action
 GLYPHS = {
@@ -30,119 +54,110 @@ GLYPHS = {
     "brightness": "",
     "camera": "",
     "screenrecorder": "",
+    "output": "",
     "screenshot": "",  
     "quit": ""  
 }
 
-# Global variables for PIDs
-camera_pid = None
-screenrecorder_pid = None
-systray_pid = os.getpid()  # Record the PID of the systray process
+ICON_SIZE = 24
 
-def create_image():
-    # Define possible paths for the systray icon
-    local_path = os.path.join(os.path.dirname(__file__), '../assets/systray-icon.png')
-    system_path = '/usr/local/share/systray/assets/systray-icon.png'
-
-    try:
-        # Try to load the image from the local installation path
-        if os.path.exists(local_path):
-            image = Image.open(local_path)
-        # If not found, try the system-wide installation path
-        elif os.path.exists(system_path):
-            image = Image.open(system_path)
-        else:
-            raise FileNotFoundError("Systray icon not found in any known locations.")
+def current_badges():
+    badges = {
+        "conky": tray_state.get("conky"),
+        "camera": tray_state.get("camera"),
+        "recording": tray_state.get("recorder"),
+        "bluetooth": tray_state.get("bluetooth"),
+    }
+    return tuple(badge for badge, active in badges.items() if active)
 
-        # Resize to fit the systray, typically 16x16 or 24x24
-        image = image.resize((24, 24), Image.LANCZOS)  # Adjust the size as needed
-        return image
+def create_image():
+    # Typically 16x16 or 24x24 in the systray; variants come ready-made from the icon cache
+    return get_icon_cache().get(ICON_SIZE, current_badges())
 
-    except Exception as e:
-        print(f"Error loading image: {e}")
-        # Fallback to a plain white image with a black rectangle if loading fails
-        width = 24
-        height = 24
-        image = Image.new('RGB', (width, height), (255, 255, 255))
-        draw = ImageDraw.Draw(image)
-        draw.rectangle(
-            (width // 4, height // 4, width * 3 // 4, height * 3 // 4),
-            fill='black')
-        return image
+def on_state_changed(icon, changed):
+    image = create_image()
+    if icon.icon is not image:
+        icon.icon = image  # A lookup, no PIL work on the tray thread
+    icon.update_menu()
 
 def confirm_action(action_name):
-    root = tk.Tk()
-    root.withdraw()  # Hide the main window
-    result = messagebox.askyesno(f"{action_name} Confirmation", f"Are you sure you want to {action_name.lower()}?")
-    root.destroy()
-    return result
+    from tkinter import messagebox
+    # Asked on the UI thread; the calling worker waits for the answer
+    return load_feature("ui_call")(messagebox.askyesno, f"{action_name} Confirmation", f"Are you sure you want to {action_name.lower()}?")
 
-def on_toggle_conky(icon, item):
-    toggle_conky()  # Toggle Conky state
-    update_menu(icon)  # Update the menu item text
+def toggle_conky_action():
+    toggle_conky()  # Toggle Conky state; the supervisor updates the menu
 
-def on_bluetooth_control(icon, item):
-    show_bluetooth_control()
-
-def on_power_off(icon, item):
+def power_off():
     if confirm_action("Power Off"):
-        if prompt_sudo_password("Power off"):
+        if load_feature("sudo")("Power off"):
             print("Starting shutdown timer...")
-            start_shutdown_timer(60)  # Start a 60-second shutdown timer
+            # A 60-second countdown on this worker, so quitting cancels it with the other jobs
+            load_feature("shutdown")(60)
         else:
             print("Shutdown canceled or failed due to incorrect password.")
     else:
         print("Power off canceled by user.")
 
-def on_reboot(icon, item):
+def reboot():
     if confirm_action("Reboot"):
-        if prompt_sudo_password("Reboot"):
+        if load_feature("sudo")("Reboot"):
             subprocess.run(['sudo', 'reboot'])
         else:
             print("Reboot canceled or failed due to incorrect password.")
     else:
         print("Reboot canceled by user.")
 
+def toggle_camera_action():
+    toggle_camera()  # Toggle camera state
+
+def toggle_screenrecorder_action():
+    toggle_screenrecorder()  # Toggle screen recorder state
+
+# Menu callbacks only submit work, so the tray loop never blocks on a window or a child process.
+# Windows go straight to the UI thread, which keeps a single window per feature.
+def on_toggle_conky(icon, item):
+    dispatcher.submit("conky", toggle_conky_action)
+
+def on_bluetooth_control(icon, item):
+    open_feature_window("bluetooth")
+
+def on_power_off(icon, item):
+    dispatcher.submit("power", power_off)
+
+def on_reboot(icon, item):
+    dispatcher.submit("power", reboot)
+
 def on_xrandr_tool(icon, item):
-    show_xrandr_control()
+    open_feature_window("display")
 
 def on_brightness_slider(icon, item):
-    show_brightness_slider()  # Call the function to show the brightness slider window
+    open_feature_window("brightness")  # Show the brightness slider window
 
 def on_toggle_camera(icon, item):
-    new_label = toggle_camera()  # Toggle camera state
-    item.text = f"{GLYPHS['camera']} {new_label}"  # Update menu item text
+    dispatcher.submit("camera", toggle_camera_action)
 
 def on_toggle_screenrecorder(icon, item):
-    new_label = toggle_screenrecorder()  # Toggle screen recorder state
-    item.text = f"{GLYPHS['screenrecorder']} {new_label}"  # Update menu item text
+    dispatcher.submit("recorder", toggle_screenrecorder_action)
+
+def open_screenshot(path):
+    return lambda icon, item: supervisor.spawn_detached(["xdg-open", path])  # Reaped, no zombie
+
+def recent_screenshot_items():
+    # Read from the screenshot index, not by listing the directory
+    recent = get_screenshot_index().recent()
+    if not recent:
+        return [item("No screenshots yet", None, enabled=False)]
+    return [item(os.path.basename(path), open_screenshot(path)) for path in recent]
+
+def on_screenshot_to_clipboard(icon, item):
+    dispatcher.submit("screenshot", load_feature("clipboard_screenshot"))
+
+def on_child_output(icon, item):
+    open_feature_window("output")  # Recent camera/recorder output
 
 def on_screenshot_tool(icon, item):
-    display_screenshot_tool()  # Display the screenshot tool window
-
-def kill_process_tree(pid):
-    try:
-        parent = psutil.Process(pid)
-        for child in parent.children(recursive=True):
-            child.terminate()
-        parent.terminate()
-        gone, still_alive = psutil.wait_procs(parent.children(recursive=True), timeout=3)
-        for p in still_alive:
-            p.kill()  # Force kill if still running
-        parent.kill()
-        print(f"Process tree for PID {pid} terminated successfully.")
-    except psutil.NoSuchProcess:
-        print(f"No such process with PID {pid} found.")
-
-def find_wrapper_pid():
-    try:
-        # Assuming the wrapper script is named `run_systray.sh` and is running as a bash process
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            if 'bash' in proc.info['name'] and 'run_systray.sh' in proc.info['cmdline']:
-                return proc.info['pid']
-    except Exception as e:
-        print(f"Error finding wrapper PID: {e}")
-    return None
+    open_feature_window("screenshot")  # Display the screenshot tool window
 
 def stop_service_if_exists(service_name):
     try: 
@@ -160,21 +175,30 @@ def stop_service_if_exists(service_name):
     except Exception as e:
         print(f"An error occured as: {e}")
 
-def on_quit_systray(icon, item):
+def quit_systray(icon):
     if confirm_action("Quit Systray"):
-        # Kill camera and screen recorder if they are running
-        if camera_pid:
-            kill_process_tree(camera_pid)
-        if screenrecorder_pid:
-            kill_process_tree(screenrecorder_pid)
-        
-        # Try to find and kill the wrapper process
-        wrapper_pid = find_wrapper_pid()
+        dispatcher.cancel_all()
+        print(f"Action latencies:\n{dispatcher.report()}")
+
+        # Stop the supervised children (conky, camera, recorder) in parallel, then
+        # whatever else we started (bluetoothctl, the bluetooth terminal)
+        supervisor.stop_all()
+        for name, pid in pid_registry.children().items():
+            print(f"Stopping {name} (PID {pid})")
+            terminate_process(pid)
+            pid_registry.unregister(name, pid)
+
+        # Then the wrapper, so it does not restart us. Only the wrapper itself:
+        # we share its process group, so no killpg here.
+        wrapper_pid = pid_registry.get("wrapper")
         if wrapper_pid:
-            kill_process_tree(wrapper_pid)
+            try:
+                os.kill(wrapper_pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
         else:
-            print("Wrapper PID not found. Attempting to kill main.py script.")
-            kill_process_tree(systray_pid)
+            print("Wrapper PID not registered, stopping the systray only.")
+        pid_registry.remove_pidfile()
         
         icon.stop()  # Stop the systray Icon
         service_name = "mastpysystray.service"
@@ -182,31 +206,75 @@ def on_quit_systray(icon, item):
     else:
         print("Quit action canceled by user.")
 
-def update_menu(icon):
-    icon.menu = Menu(
-        item(f"{GLYPHS['conky']} {check_conky_status()}", on_toggle_conky),
-        item(f"{GLYPHS['bluetooth']} Bluetooth Control", on_bluetooth_control),
-        item(f"{GLYPHS['camera']} Start Camera", on_toggle_camera),
-        item(f"{GLYPHS['screenrecorder']} Start Screen Recorder", on_toggle_screenrecorder),
+def on_quit_systray(icon, item):
+    dispatcher.submit("quit", quit_systray, icon)
+
+def bluetooth_label(item):
+    device = tray_state.get("bluetooth")
+    return f"{GLYPHS['bluetooth']} Bluetooth Control" + (f" ({device})" if device else "")
+
+def build_menu():
+    # Built once; item text is read from the state store whenever the menu is shown
+    return Menu(
+        item(lambda item: f"{GLYPHS['conky']} {'Quit Conky' if tray_state.get('conky') else 'Start Conky'}", on_toggle_conky),
+        item(bluetooth_label, on_bluetooth_control),
+        item(lambda item: f"{GLYPHS['camera']} {'Quit Camera' if tray_state.get('camera') else 'Start Camera'}", on_toggle_camera),
+        item(lambda item: f"{GLYPHS['screenrecorder']} {'Quit Screen Recorder' if tray_state.get('recorder') else 'Start Screen Recorder'}", on_toggle_screenrecorder),
+        item(f"{GLYPHS['output']} Process Output", on_child_output),
         item(f"{GLYPHS['screenshot']} Screenshot Tool", on_screenshot_tool),  # Screenshot tool added below screen recording
+        item(f"{GLYPHS['screenshot']} Screenshot to Clipboard", on_screenshot_to_clipboard),
+        item(f"{GLYPHS['screenshot']} Recent Screenshots", Menu(recent_screenshot_items)),
         item(f"{GLYPHS['power_off']} Power Off", on_power_off),
         item(f"{GLYPHS['reboot']} Reboot", on_reboot),
         item(f"{GLYPHS['display']} Display Settings", on_xrandr_tool),
         item(f"{GLYPHS['brightness']} Brightness Slider", on_brightness_slider),
         item(f"{GLYPHS['quit']} Quit", on_quit_systray)  # Quit option at the bottom
     )
-    icon.update_menu()
 
-def periodic_update(icon):
-    update_menu(icon)
-    threading.Timer(5.0, periodic_update, [icon]).start()  # Refresh every 5 seconds
+def refresh_bluetooth_state():
+    client = load_feature("bluez")()
+    if client is not None:
+        connected = client.get_connected_devices()
+        name = (connected[0].get("Alias") or connected[0]["Address"]) if connected else None
+        tray_state.set("bluetooth", name)
+
+def connect_bluetooth_state():
+    client = load_feature("bluez")()
+    if client is not None:
+        client.add_listener(refresh_bluetooth_state)
+        refresh_bluetooth_state()
+
+def refresh_tray_state():
+    tray_state.update(
+        conky=supervisor.is_running("conky"),
+        camera=supervisor.is_running("camera"),
+        recorder=supervisor.is_running("recorder"),
+    )
+
+def on_child_changed(name, running):
+    # Supervised children are named after their tray state keys
+    tray_state.set(name, running)
+
+# One job at a time per action; power actions share a slot
+for action in ("conky", "power", "camera", "recorder", "quit"):
+    dispatcher.set_limit(action, 1)
+# Confirm dialogs, the sudo prompt and the shutdown countdown wait on the user
+for action in ("power", "quit"):
+    dispatcher.set_interactive(action)
 
 def setup_systray():
     pid = os.getpid()  # Get the current process ID
+    pid_registry.publish()  # Only the tray itself writes the pidfile
+    refresh_tray_state()
+    supervisor.add_listener(on_child_changed)  # Children starting or exiting update the menu
     icon = pystray.Icon("systray_icon", create_image(), f"MPyStray {pid}")  # Set title with PID
     icon.title = f"MPyStray {pid}"  # Ensure title is set (some platforms require this explicitly)
-    update_menu(icon)  # Set up the initial menu
-    periodic_update(icon)  # Start periodic updates to keep the menu in sync
+    icon.menu = build_menu()  # Set up the menu once
+    # Push the menu and icon to the tray only when a value behind them actually changed
+    tray_state.subscribe(lambda changed: on_state_changed(icon, changed))
+    get_scheduler().call_later(0, get_icon_cache().prerender)
+    # D-Bus is connected from the scheduler thread once the icon is already up
+    get_scheduler().call_later(0, connect_bluetooth_state)
     icon.run()
 
 if __name__ == "__main__":
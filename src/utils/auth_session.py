@@ -0,0 +1,72 @@
+# src/utils/auth_session.py
+
+import os
+import threading
+import time
+
+# Like sudo's timestamp: a privileged action within this many seconds of a
+# successful authentication does not prompt again (0 disables the window)
+GRACE_SECONDS = float(os.environ.get("SYSTRAY_AUTH_GRACE", 300))
+
+# Delay before each attempt after a failure, doubling per consecutive failure
+BACKOFF_BASE_SECONDS = 2
+BACKOFF_MAX_SECONDS = 30
+
+def default_pam_factory():
+    import pam
+    return pam.pam()
+
+class AuthSession:
+    # Password checks and their policy: the grace window after a success and the
+    # failed-attempt backoff are enforced here, whatever UI is asking.
+    def __init__(self, pam_factory=default_pam_factory, grace_seconds=GRACE_SECONDS,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.pam_factory = pam_factory
+        self.grace_seconds = grace_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.pam_auth = None
+        self.authenticated_at = None
+        self.failures = 0
+        self.retry_at = 0.0
+
+    def is_fresh(self):
+        with self.lock:
+            return (self.authenticated_at is not None and
+                    self.clock() - self.authenticated_at < self.grace_seconds)
+
+    def mark_authenticated(self):
+        with self.lock:
+            self.authenticated_at = self.clock()
+            self.failures = 0
+            self.retry_at = 0.0
+
+    def invalidate(self):
+        with self.lock:
+            self.authenticated_at = None
+
+    def backoff_remaining(self):
+        with self.lock:
+            return max(0.0, self.retry_at - self.clock())
+
+    def authenticate(self, username, password):
+        # Blocking: call from a worker thread, never the UI thread
+        remaining = self.backoff_remaining()
+        if remaining:
+            self.sleep(remaining)
+        with self.lock:
+            if self.pam_auth is None:
+                self.pam_auth = self.pam_factory()
+            pam_auth = self.pam_auth
+        valid = pam_auth.authenticate(username, password)
+        if valid:
+            self.mark_authenticated()
+        else:
+            with self.lock:
+                self.failures += 1
+                delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (self.failures - 1))
+                self.retry_at = self.clock() + delay
+        return valid
+
+auth_session = AuthSession()
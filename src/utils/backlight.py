@@ -0,0 +1,122 @@
+# src/utils/backlight.py
+
+import os
+import threading
+import time
+
+# Overridable so the backend can run against a fake sysfs tree
+BACKLIGHT_ROOT = os.environ.get("SYSTRAY_BACKLIGHT_ROOT", "/sys/class/backlight")
+
+# Firmware interfaces map best to real panel brightness, raw driver ones last
+TYPE_PRIORITY = {"firmware": 0, "platform": 1, "raw": 2}
+
+MAX_WRITES_PER_SECOND = 60
+
+backlight = None  # Shared backend for the preferred device, created on first use
+backlight_lock = threading.Lock()
+
+def read_sysfs_value(path, default=None):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+def discover_backlights(root=None):
+    root = root or BACKLIGHT_ROOT
+    devices = []
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return devices
+    for name in names:
+        path = os.path.join(root, name)
+        max_brightness = read_sysfs_value(os.path.join(path, "max_brightness"))
+        if max_brightness is None or not max_brightness.isdigit() or int(max_brightness) <= 0:
+            continue
+        devices.append({
+            "name": name,
+            "path": path,
+            "max_brightness": int(max_brightness),
+            "type": read_sysfs_value(os.path.join(path, "type"), "raw"),
+        })
+    return sorted(devices, key=lambda device: (TYPE_PRIORITY.get(device["type"], 3), device["name"]))
+
+class Backlight:
+    # Keeps the brightness file open and writes from a background thread at a capped
+    # rate. Values set faster than that are coalesced: only the latest one is written.
+    def __init__(self, device, max_rate=MAX_WRITES_PER_SECOND):
+        self.name = device["name"]
+        self.path = device["path"]
+        self.max_brightness = device["max_brightness"]
+        self.interval = 1.0 / max_rate
+        self.fd = os.open(os.path.join(self.path, "brightness"), os.O_WRONLY)
+        # sysfs attributes take each write whole; a plain file (fake tree) needs truncating
+        self.truncate = not os.path.realpath(self.path).startswith("/sys/")
+        self.condition = threading.Condition()
+        self.pending = None
+        self.busy = False
+        self.last_value = None
+        self.writes = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f"backlight-{self.name}")
+        self.thread.start()
+
+    def read(self):
+        value = read_sysfs_value(os.path.join(self.path, "actual_brightness")) or read_sysfs_value(os.path.join(self.path, "brightness"))
+        return int(value) if value and value.isdigit() else 0
+
+    def set(self, value):
+        value = max(0, min(self.max_brightness, int(value)))
+        with self.condition:
+            self.pending = value
+            self.condition.notify()
+
+    def flush(self, timeout=1.0):
+        # Wait until the latest value has reached sysfs
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while (self.pending is not None or self.busy) and time.monotonic() < deadline:
+                self.condition.wait(deadline - time.monotonic())
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                value, self.pending = self.pending, None
+                self.busy = True
+            if value != self.last_value:
+                try:
+                    data = str(value).encode()
+                    os.pwrite(self.fd, data, 0)
+                    if self.truncate:
+                        os.ftruncate(self.fd, len(data))
+                    self.last_value = value
+                    self.writes += 1
+                except OSError as e:
+                    print(f"Failed to write brightness {value} to {self.name}: {e}")
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+            time.sleep(self.interval)  # Anything set meanwhile collapses into one write
+
+    def close(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join(timeout=1)
+        os.close(self.fd)
+
+def get_backlight():
+    # Returns the backend for the preferred backlight device, or None if there is none
+    global backlight
+    with backlight_lock:
+        if backlight is None:
+            devices = discover_backlights()
+            if not devices:
+                return None
+            backlight = Backlight(devices[0])
+        return backlight
@@ -3,60 +3,98 @@ from tkinter import messagebox, simpledialog
 import subprocess
 import os
 import signal
+from utils.bluez_client import get_bluez_client
+from utils.bluetoothctl_session import get_session
+from utils.ui_thread import ui_root, call_in_ui
+from utils.pid_registry import pid_registry
+from utils.dispatcher import dispatcher
+
+# Connect, disconnect and trust run bluetoothctl on a worker, one at a time
+dispatcher.set_limit("bluetooth-device", 1)
 
 terminal_pid = None  # Global variable to track the terminal session PID
 is_window_open = True  # Flag to indicate if the window is open
 
 def run_bluetoothctl_command(commands):
+    # All commands share one long-lived bluetoothctl session instead of a fork each
     try:
-        result = subprocess.run(['bluetoothctl'] + commands, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output = result.stdout.decode().strip()
-        print(f"Executed: {' '.join(commands)}")
-        return output
-    except subprocess.CalledProcessError as e:
+        output = get_session().run(commands)
+    except OSError as e:
         print(f"Failed to execute {' '.join(commands)}: {e}")
         return None
+    if output is None:
+        print(f"Failed to execute {' '.join(commands)}")
+        return None
+    print(f"Executed: {' '.join(commands)}")
+    return output
+
+def is_device_trusted(device_serial):
+    client = get_bluez_client()
+    if client is not None:
+        device = client.get_device(device_serial)
+        return bool(device and device.get("Trusted"))
+    trust_status = run_bluetoothctl_command(['info', device_serial])
+    return "Trusted: yes" in trust_status if trust_status else False
 
 def update_device_list(device_listbox):
+    if not device_listbox.winfo_exists():
+        return  # Window closed while a worker was busy
     device_listbox.delete(0, tk.END)
-    try:
-        result = subprocess.run(['bluetoothctl', 'devices'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output = result.stdout.decode().strip()
-        devices = output.splitlines()
-        for device in devices:
-            device_serial = device.split()[1]
-            trust_status = run_bluetoothctl_command(['info', device_serial])
-            is_trusted = "Trusted: yes" in trust_status if trust_status else False
-
-            device_text = f"{device.strip()} {'[Trusted]' if is_trusted else ''}"
+    client = get_bluez_client()
+    if client is not None:
+        # Render straight from the D-Bus property cache, no process per device
+        for device in client.get_devices():
+            name = device.get("Alias") or device.get("Name") or ""
+            device_text = f"Device {device['Address']} {name} {'[Trusted]' if device.get('Trusted') else ''}"
             device_listbox.insert(tk.END, device_text)
+        return
+
+    output = run_bluetoothctl_command(['devices'])
+    if output is None:
+        print("Failed to update device list")
+        return
+    for device in output.splitlines():
+        if not device.startswith("Device "):
+            continue
+        device_serial = device.split()[1]
+        is_trusted = is_device_trusted(device_serial)
 
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to update device list: {e}")
+        device_text = f"{device.strip()} {'[Trusted]' if is_trusted else ''}"
+        device_listbox.insert(tk.END, device_text)
 
 def update_connected_device_label(connected_device_label):
-    connected_device = get_connected_device()
+    show_connected_device(connected_device_label, get_connected_device())
+
+def show_connected_device(connected_device_label, connected_device):
+    if not connected_device_label.winfo_exists():
+        return  # Window closed while a worker was busy
     if connected_device:
         connected_device_label.config(text=f"Currently Connected Device: {connected_device}")
     else:
         connected_device_label.config(text="Currently Connected Device: None")
 
 def get_connected_device():
-    try:
-        result = subprocess.run(['bluetoothctl', 'info'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output = result.stdout.decode().strip()
-        if "Connected: yes" in output:
-            for line in output.splitlines():
-                if line.startswith("Device"):
-                    return line.split()[1]  # Return the device serial number
-        return None
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to get connected device: {e}")
-        return None
-
+    client = get_bluez_client()
+    if client is not None:
+        connected = client.get_connected_devices()
+        return connected[0]["Address"] if connected else None
+    output = run_bluetoothctl_command(['info'])
+    if output and "Connected: yes" in output:
+        for line in output.splitlines():
+            if line.startswith("Device"):
+                return line.split()[1]  # Return the device serial number
+    return None
+
+# Run on a dispatcher worker: pairing and connecting can block for seconds, so only
+# dialogs and widget updates are handed to the UI thread
 def connect_device(device_serial, connected_device_label, device_listbox):
     if device_serial:
         try:
+            connected_device = get_connected_device()
+            if connected_device and device_serial in connected_device:
+                call_in_ui(messagebox.showinfo, "Already Connected", "This device is already connected.")
+                return
+
             # Attempt to pair the device
             pair_output = run_bluetoothctl_command(['pair', device_serial])
             if not pair_output or "Failed" in pair_output:
@@ -68,75 +106,64 @@ def connect_device(device_serial, connected_device_label, device_listbox):
                 raise Exception(f"Connection failed for device {device_serial}")
 
             # Update the connected device label if successful
-            update_connected_device_label(connected_device_label)
+            call_in_ui(show_connected_device, connected_device_label, get_connected_device())
 
             # Check if the device is already trusted
-            trust_status = run_bluetoothctl_command(['info', device_serial])
-            is_trusted = "Trusted: yes" in trust_status if trust_status else False
-
-            if not is_trusted:
-                should_trust = messagebox.askyesno("Trust Device", "Do you want to trust this device?")
+            if not is_device_trusted(device_serial):
+                should_trust = call_in_ui(messagebox.askyesno, "Trust Device", "Do you want to trust this device?")
                 if should_trust:
                     run_bluetoothctl_command(['trust', device_serial])
-                    update_device_list(device_listbox)  # Update the list to reflect the new trust status
-            
-            messagebox.showinfo("Connection", f"Successfully connected to device {device_serial}.")
+                    call_in_ui(update_device_list, device_listbox)  # Update the list to reflect the new trust status
+
+            call_in_ui(messagebox.showinfo, "Connection", f"Successfully connected to device {device_serial}.")
         except Exception as e:
-            messagebox.showerror("Connection Failed", f"Could not connect to device {device_serial}. Error: {str(e)}")
+            call_in_ui(messagebox.showerror, "Connection Failed", f"Could not connect to device {device_serial}. Error: {str(e)}")
 
 def disconnect_device(device_serial, connected_device_label):
     if device_serial:
         try:
             if get_connected_device() != device_serial:
-                messagebox.showinfo("Not Connected", "This device is not currently connected.")
+                call_in_ui(messagebox.showinfo, "Not Connected", "This device is not currently connected.")
                 return
-            
+
             disconnect_output = run_bluetoothctl_command(['disconnect', device_serial])
-            if "Failed" in disconnect_output or disconnect_output is None:
+            if disconnect_output is None or "Failed" in disconnect_output:
                 raise Exception(f"Disconnection failed for device {device_serial}")
-            
-            update_connected_device_label(connected_device_label)
-            messagebox.showinfo("Disconnection", f"Successfully disconnected from device {device_serial}.")
+
+            call_in_ui(show_connected_device, connected_device_label, get_connected_device())
+            call_in_ui(messagebox.showinfo, "Disconnection", f"Successfully disconnected from device {device_serial}.")
         except Exception as e:
-            messagebox.showerror("Disconnection Failed", f"Could not disconnect from device {device_serial}. Error: {str(e)}")
+            call_in_ui(messagebox.showerror, "Disconnection Failed", f"Could not disconnect from device {device_serial}. Error: {str(e)}")
 
 def toggle_trust_device(device_serial, device_listbox):
     if device_serial:
         try:
-            trust_status = run_bluetoothctl_command(['info', device_serial])
-            is_trusted = "Trusted: yes" in trust_status if trust_status else False
-
-            if is_trusted:
+            if is_device_trusted(device_serial):
                 run_bluetoothctl_command(['untrust', device_serial])
-                messagebox.showinfo("Trust Status", f"Device {device_serial} is now untrusted.")
+                call_in_ui(messagebox.showinfo, "Trust Status", f"Device {device_serial} is now untrusted.")
             else:
                 run_bluetoothctl_command(['trust', device_serial])
-                messagebox.showinfo("Trust Status", f"Device {device_serial} is now trusted.")
+                call_in_ui(messagebox.showinfo, "Trust Status", f"Device {device_serial} is now trusted.")
 
-            update_device_list(device_listbox)
+            call_in_ui(update_device_list, device_listbox)
         except Exception as e:
-            messagebox.showerror("Trust Toggle Failed", f"Could not toggle trust status for device {device_serial}. Error: {str(e)}")
+            call_in_ui(messagebox.showerror, "Trust Toggle Failed", f"Could not toggle trust status for device {device_serial}. Error: {str(e)}")
 
 def on_connect_button_click(device_listbox, connected_device_label):
     selected_device = device_listbox.get(tk.ACTIVE)
     if selected_device:
         device_serial = selected_device.split()[1]
-        if get_connected_device() and device_serial in get_connected_device():
-            messagebox.showinfo("Already Connected", "This device is already connected.")
-        else:
-            connect_device(device_serial, connected_device_label, device_listbox)
     else:
         device_serial = simpledialog.askstring("Connect Device", "Enter the device serial number:")
-        connect_device(device_serial, connected_device_label, device_listbox)
+    dispatcher.submit("bluetooth-device", connect_device, device_serial, connected_device_label, device_listbox)
 
 def on_disconnect_button_click(device_listbox, connected_device_label):
     selected_device = device_listbox.get(tk.ACTIVE)
     if selected_device:
         device_serial = selected_device.split()[1]
-        disconnect_device(device_serial, connected_device_label)
     else:
         device_serial = simpledialog.askstring("Disconnect Device", "Enter the device serial number:")
-        disconnect_device(device_serial, connected_device_label)
+    dispatcher.submit("bluetooth-device", disconnect_device, device_serial, connected_device_label)
 
 def open_bluetooth_terminal():
     global terminal_pid
@@ -150,6 +177,7 @@ def open_bluetooth_terminal():
                 proc = subprocess.Popen(['xterm', '-e', 'bluetoothctl'])
 
             terminal_pid = proc.pid  # Store the PID of the terminal session
+            pid_registry.register("bluetooth-terminal", terminal_pid)
             print(f"Terminal opened with PID: {terminal_pid}")
         except Exception as e:
             print(f"Failed to open terminal: {e}")
@@ -158,10 +186,12 @@ def open_bluetooth_terminal():
         try:
             os.kill(terminal_pid, signal.SIGTERM)  # Terminate the terminal session
             print(f"Terminal with PID {terminal_pid} terminated.")
+            pid_registry.unregister("bluetooth-terminal")
             terminal_pid = None  # Reset the PID tracking variable
         except Exception as e:
             print(f"Failed to terminate terminal: {e}")
             messagebox.showerror("Terminal Error", "Failed to terminate Bluetooth terminal.")
+            pid_registry.unregister("bluetooth-terminal")
             terminal_pid = None  # Reset the PID tracking variable just in case
 
 def periodic_update_connected_device_label(connected_device_label):
@@ -172,7 +202,8 @@ def periodic_update_connected_device_label(connected_device_label):
 
 def show_bluetooth_control():
     global terminal_pid, is_window_open
-    root = tk.Tk()
+    is_window_open = True
+    root = tk.Toplevel(ui_root())
     root.title("Bluetooth Control")
     
     # Increase the window size to ensure everything fits
@@ -182,15 +213,27 @@ def show_bluetooth_control():
     connected_device_label = tk.Label(root, text="Currently Connected Device: None")
     connected_device_label.pack(pady=10)
 
-    # Start periodic updates to check connection status
-    periodic_update_connected_device_label(connected_device_label)
-
     # Device listbox
     device_listbox = tk.Listbox(root, selectmode=tk.SINGLE)
     device_listbox.pack(pady=10, fill=tk.BOTH, expand=True)
 
     update_device_list(device_listbox)
 
+    # Re-render from the BlueZ cache whenever it changes, poll only without D-Bus
+    client = get_bluez_client()
+    if client is not None:
+        def on_bluez_changed():
+            try:
+                root.event_generate("<<BluezChanged>>", when="tail")
+            except (tk.TclError, RuntimeError):
+                pass  # Window already closed
+
+        root.bind("<<BluezChanged>>", lambda event: (update_device_list(device_listbox), update_connected_device_label(connected_device_label)))
+        client.add_listener(on_bluez_changed)
+        update_connected_device_label(connected_device_label)
+    else:
+        periodic_update_connected_device_label(connected_device_label)
+
     # Connect button
     connect_button = tk.Button(root, text="Connect to Selected Device", command=lambda: on_connect_button_click(device_listbox, connected_device_label))
     connect_button.pack(pady=5)
@@ -207,16 +250,20 @@ def show_bluetooth_control():
     def close_window():
         global is_window_open
         is_window_open = False
+        if client is not None:
+            client.remove_listener(on_bluez_changed)
         if terminal_pid is not None:
             try:
                 os.kill(terminal_pid, signal.SIGTERM)
                 print(f"Terminal with PID {terminal_pid} terminated.")
+                pid_registry.unregister("bluetooth-terminal")
             except Exception as e:
                 print(f"Failed to terminate terminal: {e}")
         root.destroy()
 
+    root.protocol("WM_DELETE_WINDOW", close_window)
     root.bind('<Escape>', lambda event: close_window())
     root.bind('<q>', lambda event: close_window())
-    root.bind('<Control-t>', lambda event: toggle_trust_device(device_listbox.get(tk.ACTIVE).split()[1], device_listbox))
+    root.bind('<Control-t>', lambda event: dispatcher.submit("bluetooth-device", toggle_trust_device, device_listbox.get(tk.ACTIVE).split()[1], device_listbox))
 
-    root.mainloop()
+    return root
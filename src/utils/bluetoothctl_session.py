@@ -0,0 +1,156 @@
+# src/utils/bluetoothctl_session.py
+
+import os
+import re
+import subprocess
+import threading
+import queue
+import time
+import atexit
+from utils.pid_registry import pid_registry
+
+# Overridable so a fake bluetoothctl script can stand in for the real one
+BLUETOOTHCTL = os.environ.get("SYSTRAY_BLUETOOTHCTL", "bluetoothctl")
+
+DEFAULT_TIMEOUT = 5
+COMMAND_TIMEOUTS = {"connect": 20, "pair": 30, "disconnect": 10}
+
+# Asynchronous commands finish when bluez reports back, not when the prompt returns
+COMPLETIONS = {
+    "connect": ("Connection successful", "Failed to connect"),
+    "disconnect": ("Successful disconnected", "Failed to disconnect"),
+    "pair": ("Pairing successful", "Failed to pair"),
+    "trust": ("trust succeeded", "Failed to set trusted"),
+    "untrust": ("untrust succeeded", "Failed to set trusted"),
+    "remove": ("Device has been removed", "Failed to remove device"),
+}
+FAILURE_MARKERS = ("not available", "org.bluez.Error", "Invalid command", "Missing")
+
+# Synchronous commands are delimited by a trailing `version` whose answer ends the response
+SENTINEL_COMMAND = "version"
+SENTINEL_PREFIX = "Version "
+
+ESCAPES = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]|[\x01\x02\r]')
+PROMPT = re.compile(r'^(\[[^\]]*\][#>]\s*)+')
+UNSOLICITED = ("[CHG]", "[NEW]", "[DEL]")
+
+session = None  # Shared session, started on first use
+session_lock = threading.Lock()
+
+class BluetoothctlSession:
+    # A long-lived interactive bluetoothctl with a line reader thread. Requests are
+    # serialized and matched to their response lines; a dead process is restarted.
+    def __init__(self, command=None):
+        self.command = command or [BLUETOOTHCTL]
+        self.lock = threading.Lock()
+        self.process = None
+        self.lines = None
+
+    def start(self):
+        self.lines = queue.Queue()
+        self.process = subprocess.Popen(
+            self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1
+        )
+        threading.Thread(target=self._read, args=(self.process, self.lines), daemon=True,
+                         name="bluetoothctl-reader").start()
+        pid_registry.register("bluetoothctl", self.process.pid)
+        print(f"bluetoothctl session started with PID {self.process.pid}")
+        # Swallow the startup banner (agent registration, controller events)
+        self._send(SENTINEL_COMMAND)
+        self._collect(SENTINEL_COMMAND, SENTINEL_COMMAND, DEFAULT_TIMEOUT)
+
+    def _read(self, process, lines):
+        for raw_line in process.stdout:
+            line = PROMPT.sub('', ESCAPES.sub('', raw_line)).strip()
+            if line:
+                lines.put(line)
+        lines.put(None)  # EOF, the process is gone
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _reap(self):
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def stop(self):
+        if self.is_alive():
+            try:
+                self.process.stdin.write("quit\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+
+    def _send(self, text):
+        self.process.stdin.write(text + "\n")
+        self.process.stdin.flush()
+
+    def run(self, commands, timeout=None):
+        name = commands[0] if commands else ""
+        timeout = timeout or COMMAND_TIMEOUTS.get(name, DEFAULT_TIMEOUT)
+        with self.lock:
+            for attempt in range(2):
+                if not self.is_alive():
+                    self.start()
+                # Drop anything left over from earlier requests or unsolicited events
+                while not self.lines.empty():
+                    if self.lines.get_nowait() is None:
+                        self._reap()
+                if not self.is_alive():
+                    self.start()
+                try:
+                    self._send(" ".join(commands))
+                    if name not in COMPLETIONS:
+                        self._send(SENTINEL_COMMAND)
+                except (BrokenPipeError, OSError):
+                    self.process = None
+                    continue  # Restart and retry once
+                response = self._collect(" ".join(commands), name, timeout)
+                if response is None and self.is_alive():
+                    # Timed out: its late answer would be read as the next request's, so
+                    # the process is replaced rather than resynchronised
+                    self.process.kill()
+                    self._reap()
+                    return None
+                if response is None and attempt == 0:
+                    continue
+                return response
+            return None
+
+    def _collect(self, sent, name, timeout):
+        deadline = time.monotonic() + timeout
+        completions = COMPLETIONS.get(name)
+        response = []
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"bluetoothctl '{name}' timed out after {timeout}s")
+                return None
+            try:
+                line = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                self._reap()
+                return None
+            if completions is None and line.startswith(SENTINEL_PREFIX):
+                return "\n".join(response)
+            if line.startswith(UNSOLICITED) or line in (sent, SENTINEL_COMMAND):
+                continue  # Events and readline echoes of our own input
+            response.append(line)
+            if completions is not None and (any(marker in line for marker in completions)
+                                            or any(marker in line for marker in FAILURE_MARKERS)):
+                return "\n".join(response)
+
+def get_session():
+    global session
+    with session_lock:
+        if session is None:
+            session = BluetoothctlSession()
+            atexit.register(session.stop)
+        return session
@@ -0,0 +1,150 @@
+# src/utils/bluez_client.py
+
+import os
+import threading
+import time
+from utils import dbus_loop
+
+try:
+    from gi.repository import Gio, GLib
+except ImportError:
+    Gio = None
+    GLib = None
+
+BLUEZ_SERVICE = "org.bluez"
+DEVICE_INTERFACE = "org.bluez.Device1"
+OBJECT_MANAGER_INTERFACE = "org.freedesktop.DBus.ObjectManager"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+
+# After a failed connection, wait this long before trying again, doubling per failure
+RETRY_BASE_SECONDS = 10
+RETRY_MAX_SECONDS = 300
+
+bluez_client = None  # Shared client, created on first use
+bluez_client_lock = threading.Lock()
+bluez_failures = 0
+bluez_retry_at = 0.0
+
+class BluezClient:
+    # Local cache of every BlueZ device, filled by one GetManagedObjects call and
+    # kept current through InterfacesAdded/InterfacesRemoved/PropertiesChanged
+    def __init__(self, bus_type=None):
+        self.bus_type = bus_type if bus_type is not None else Gio.BusType.SYSTEM
+        self.lock = threading.Lock()
+        self.devices = {}  # object path -> Device1 properties
+        self.listeners = []
+        self.bus = None
+        self.subscriptions = []
+        dbus_loop.call_in_loop(self._connect)
+
+    def _connect(self):
+        self.bus = Gio.bus_get_sync(self.bus_type, None)
+        # Subscribed before the initial fetch so no change slips in between; if the
+        # fetch fails (no BlueZ), the subscriptions go too, as nothing will own them
+        self.subscriptions = [
+            self.bus.signal_subscribe(BLUEZ_SERVICE, OBJECT_MANAGER_INTERFACE, "InterfacesAdded",
+                                      None, None, Gio.DBusSignalFlags.NONE, self._on_interfaces_added),
+            self.bus.signal_subscribe(BLUEZ_SERVICE, OBJECT_MANAGER_INTERFACE, "InterfacesRemoved",
+                                      None, None, Gio.DBusSignalFlags.NONE, self._on_interfaces_removed),
+            self.bus.signal_subscribe(BLUEZ_SERVICE, PROPERTIES_INTERFACE, "PropertiesChanged",
+                                      None, DEVICE_INTERFACE, Gio.DBusSignalFlags.NONE, self._on_properties_changed),
+        ]
+        try:
+            self.refresh()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        for subscription in self.subscriptions:
+            self.bus.signal_unsubscribe(subscription)
+        self.subscriptions = []
+
+    def refresh(self):
+        result = self.bus.call_sync(BLUEZ_SERVICE, "/", OBJECT_MANAGER_INTERFACE, "GetManagedObjects",
+                                    None, GLib.VariantType.new("(a{oa{sa{sv}}})"),
+                                    Gio.DBusCallFlags.NONE, -1, None)
+        objects = result.unpack()[0]
+        with self.lock:
+            self.devices = {
+                path: dict(interfaces[DEVICE_INTERFACE])
+                for path, interfaces in objects.items()
+                if DEVICE_INTERFACE in interfaces
+            }
+        self._notify()
+
+    def _on_interfaces_added(self, connection, sender, path, interface, signal, parameters):
+        object_path, interfaces = parameters.unpack()
+        if DEVICE_INTERFACE in interfaces:
+            with self.lock:
+                self.devices[object_path] = dict(interfaces[DEVICE_INTERFACE])
+            self._notify()
+
+    def _on_interfaces_removed(self, connection, sender, path, interface, signal, parameters):
+        object_path, interfaces = parameters.unpack()
+        if DEVICE_INTERFACE in interfaces:
+            with self.lock:
+                self.devices.pop(object_path, None)
+            self._notify()
+
+    def _on_properties_changed(self, connection, sender, path, interface, signal, parameters):
+        interface_name, changed, invalidated = parameters.unpack()
+        with self.lock:
+            properties = self.devices.get(path)
+            if properties is None:
+                return
+            properties.update(changed)
+            for name in invalidated:
+                properties.pop(name, None)
+        self._notify()
+
+    def _notify(self):
+        for listener in list(self.listeners):
+            try:
+                listener()
+            except Exception as e:
+                print(f"Bluetooth listener failed: {e}")
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def get_devices(self):
+        with self.lock:
+            devices = [dict(properties) for properties in self.devices.values() if "Address" in properties]
+        return sorted(devices, key=lambda device: device["Address"])
+
+    def get_device(self, address):
+        for device in self.get_devices():
+            if device["Address"] == address:
+                return device
+        return None
+
+    def get_connected_devices(self):
+        return [device for device in self.get_devices() if device.get("Connected")]
+
+def get_bluez_client():
+    # Returns the shared client, or None when D-Bus/BlueZ is unavailable. A failed
+    # connection is remembered, so callers fall back to bluetoothctl straight away
+    # instead of paying for a D-Bus round trip on every call until the retry is due.
+    global bluez_client, bluez_failures, bluez_retry_at
+    with bluez_client_lock:
+        if bluez_client is None:
+            if Gio is None or not dbus_loop.is_available():
+                return None
+            if time.monotonic() < bluez_retry_at:
+                return None
+            bus_type = Gio.BusType.SESSION if os.environ.get("SYSTRAY_BLUEZ_BUS") == "session" else None
+            try:
+                bluez_client = BluezClient(bus_type)
+            except Exception as e:
+                bluez_failures += 1
+                delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (bluez_failures - 1))
+                bluez_retry_at = time.monotonic() + delay
+                print(f"BlueZ D-Bus client unavailable, falling back to bluetoothctl for {delay} s: {e}")
+                return None
+            bluez_failures = 0
+        return bluez_client
@@ -0,0 +1,155 @@
+# src/utils/brightness_fade.py
+
+import sys
+import threading
+import time
+from utils.backlight import get_backlight
+
+FRAMES_PER_SECOND = 60
+FADE_SECONDS = 0.25
+STEP_PERCENTAGE = 5
+MIN_PERCENTAGE = 1  # Never fade the panel fully off
+SYNC_SECONDS = 1.0  # While idle, how often the fader thread re-reads the panel level
+
+fader = None  # Shared fader for the preferred backlight, created on first use
+fader_lock = threading.Lock()
+
+# Percentages are perceived lightness (CIE L*), so equal slider steps look equal
+# instead of the bottom of a linear scale jumping from dark to bright.
+def perceptual_to_fraction(percentage):
+    lightness = max(0.0, min(100.0, percentage))
+    if lightness > 8:
+        return ((lightness + 16) / 116) ** 3
+    return lightness / 903.3
+
+def fraction_to_perceptual(fraction):
+    fraction = max(0.0, min(1.0, fraction))
+    if fraction > 216 / 24389:
+        return 116 * fraction ** (1 / 3) - 16
+    return 903.3 * fraction
+
+class BrightnessFader:
+    # Runs brightness transitions on one timer thread at a fixed frame rate. A new
+    # target preempts the fade in flight from wherever it currently is, and each
+    # frame is a single latest-value-wins write, so fast input never queues writes.
+    def __init__(self, backlight, fps=FRAMES_PER_SECOND, duration=FADE_SECONDS, sync_interval=SYNC_SECONDS):
+        self.backlight = backlight
+        self.frame_interval = 1.0 / fps
+        self.duration = duration
+        self.sync_interval = sync_interval
+        self.condition = threading.Condition()
+        self.current = fraction_to_perceptual(backlight.read() / backlight.max_brightness)
+        self.start = self.current
+        self.target = self.current
+        self.started_at = 0.0
+        self.fades = 0  # Bumped by every new target, so a re-read never overwrites one
+        self.frames = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True, name="brightness-fade")
+        self.thread.start()
+
+    def _sync_from_device(self):
+        # Fader thread only, without the condition held. While idle, the panel may be
+        # changed behind our back (hotkeys, another tool), so the level the next fade
+        # starts from is re-read here rather than on the caller's (UI) thread.
+        fades = self.fades
+        self.backlight.flush()  # Our own last frame must land before reading back
+        level = fraction_to_perceptual(self.backlight.read() / self.backlight.max_brightness)
+        with self.condition:
+            if self.fades == fades and self.current == self.target:
+                self.current = self.target = level
+
+    def get_percentage(self):
+        # The panel level as last read while idle; during a fade, the level it is heading for
+        with self.condition:
+            return self.target
+
+    def fade_to(self, percentage):
+        percentage = max(MIN_PERCENTAGE, min(100.0, float(percentage)))
+        with self.condition:
+            if percentage == self.target:
+                return
+            self.start = self.current
+            self.target = percentage
+            self.started_at = time.monotonic()
+            self.fades += 1
+            self.condition.notify()
+
+    def step(self, delta):
+        # Steps during a fade stack on its target, so fast key repeats add up
+        with self.condition:
+            target = self.target
+        self.fade_to(target + delta)
+
+    def wait(self, timeout=2.0):
+        # Block until the fade in flight has reached its target
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.current != self.target and time.monotonic() < deadline:
+                self.condition.wait(deadline - time.monotonic())
+        self.backlight.flush()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if self.running and self.current == self.target:
+                    self.condition.wait(self.sync_interval)  # Until a new target, or time to re-read
+                if not self.running:
+                    return
+                idle = self.current == self.target
+                if not idle:
+                    progress = (time.monotonic() - self.started_at) / self.duration if self.duration else 1.0
+                    if progress >= 1.0:
+                        self.current = self.target
+                    else:
+                        # Ease out, in perceptual space
+                        eased = 1 - (1 - progress) ** 2
+                        self.current = self.start + (self.target - self.start) * eased
+                    value = perceptual_to_fraction(self.current) * self.backlight.max_brightness
+                    self.condition.notify_all()
+            if idle:
+                self._sync_from_device()
+                continue
+            self.backlight.set(max(1, round(value)))
+            self.frames += 1
+            time.sleep(self.frame_interval)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+def get_fader():
+    global fader
+    with fader_lock:
+        if fader is None:
+            backlight = get_backlight()
+            if backlight is None:
+                return None
+            fader = BrightnessFader(backlight)
+        return fader
+
+def brightness_up(step=STEP_PERCENTAGE):
+    fader = get_fader()
+    if fader is not None:
+        fader.step(step)
+    return fader
+
+def brightness_down(step=STEP_PERCENTAGE):
+    fader = get_fader()
+    if fader is not None:
+        fader.step(-step)
+    return fader
+
+# Keyboard entry point for window manager bindings: python3 -m utils.brightness_fade up|down
+if __name__ == "__main__":
+    action = sys.argv[1] if len(sys.argv) > 1 else ""
+    steps = {"up": brightness_up, "down": brightness_down}
+    if action not in steps:
+        print("Usage: brightness_fade.py up|down")
+        sys.exit(2)
+    fader = steps[action]()
+    if fader is None:
+        print("No backlight device found.")
+        sys.exit(1)
+    fader.wait()
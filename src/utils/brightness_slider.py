@@ -2,15 +2,28 @@
 # src/utils/brightness_slider.py
 
 import tkinter as tk
+from tkinter import messagebox
+from utils.ui_thread import ui_root
+from utils.backlight import BACKLIGHT_ROOT
+from utils.brightness_fade import get_fader, brightness_up, brightness_down
 
 def set_brightness(percentage):
     # Ensure the brightness is not set to 0; adjust to 1% minimum.
     if percentage == 0:
         percentage = 1
 
-    brightness_value = int((percentage / 100) * 96000)
-    with open('/sys/class/backlight/intel_backlight/brightness', 'w') as f:
-        f.write(str(brightness_value))
+    fader = get_fader()
+    if fader is None:
+        print("No backlight device found.")
+        return
+    # Fades along the perceptual curve on the fader thread, so the slider never waits on sysfs
+    fader.fade_to(percentage)
+
+def get_brightness_percentage():
+    fader = get_fader()
+    if fader is None:
+        return None
+    return round(fader.get_percentage())
 
 def on_brightness_slider_change(value):
     percentage = int(value)
@@ -18,10 +31,15 @@ def on_brightness_slider_change(value):
 
 def close_on_keypress(event):
     if event.keysym in ['q', 'Escape']:
-        event.widget.quit()  # Closes the window
+        event.widget.winfo_toplevel().destroy()  # Closes the window
 
 def show_brightness_slider():
-    root = tk.Tk()
+    current_percentage = get_brightness_percentage()
+    if current_percentage is None:
+        messagebox.showerror("Error", f"No backlight device found under {BACKLIGHT_ROOT}.", parent=ui_root())
+        return None
+
+    root = tk.Toplevel(ui_root())
     root.title("Brightness Control")
     root.geometry("300x100")
 
@@ -36,11 +54,16 @@ def show_brightness_slider():
     )
     brightness_slider.pack(pady=10)
 
-    # Read the current brightness to set the slider's initial position
-    with open('/sys/class/backlight/intel_backlight/brightness', 'r') as f:
-        current_brightness = int(f.read().strip())
-        current_percentage = int((current_brightness / 96000) * 100)
-        brightness_slider.set(current_percentage)
+    # Set the slider's initial position from the current brightness
+    brightness_slider.set(current_percentage)
+
+    # Up/Down step the brightness and keep the slider in sync
+    def on_step(step):
+        fader = step()
+        if fader is not None:
+            brightness_slider.set(round(fader.get_percentage()))
 
-    root.mainloop()
+    root.bind('<KeyPress-Up>', lambda event: on_step(brightness_up))
+    root.bind('<KeyPress-Down>', lambda event: on_step(brightness_down))
 
+    return root
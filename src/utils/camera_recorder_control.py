@@ -1,58 +1,36 @@
 # utils/camera_recorder_control.py
 
-import os
 import subprocess
-import time
+from utils.supervisor import supervisor
+from utils.child_output import get_output_reader
 
 
-# Global variables to store the PIDs
-camera_pid = None
-screenrecorder_pid = None
-
 def toggle_camera():
-    global camera_pid
-
-    if camera_pid is None:
+    if not supervisor.is_running("camera"):
         # Start the camera process
-        process = subprocess.Popen(['/usr/local/bin/camera-op'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        camera_pid = process.pid
-        print(f"Camera started with PID {camera_pid}")
+        process = supervisor.spawn("camera", ['/usr/local/bin/camera-op'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+        get_output_reader().attach("camera", process)  # Keep its pipes drained
+        print(f"Camera started with PID {process.pid}")
         return "Quit Camera"
     else:
-        # Stop the camera process
-        os.kill(camera_pid, 15)  # Try to terminate the process
-        time.sleep(3)
-        # Check if the process is still running
-        try:
-            os.kill(camera_pid, 0)
-        except OSError:
-            print(f"Camera with PID {camera_pid} has been successfully terminated.")
+        # Stop the camera process, escalating to SIGKILL only if it does not exit in time
+        if supervisor.stop("camera"):
+            print("Camera has been successfully terminated.")
         else:
-            os.kill(camera_pid, 9)  # Force kill if still running
-            print(f"Camera with PID {camera_pid} was forcefully terminated.")
-        camera_pid = None
+            print("Camera was forcefully terminated.")
         return "Start Camera"
 
 def toggle_screenrecorder():
-    global screenrecorder_pid
-
-    if screenrecorder_pid is None:
+    if not supervisor.is_running("recorder"):
         # Start the screen recorder process
-        process = subprocess.Popen(['/usr/local/bin/start_screenrecorder'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        screenrecorder_pid = process.pid
-        print(f"Screen Recorder started with PID {screenrecorder_pid}")
+        process = supervisor.spawn("recorder", ['/usr/local/bin/start_screenrecorder'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+        get_output_reader().attach("recorder", process)  # Keep its pipes drained
+        print(f"Screen Recorder started with PID {process.pid}")
         return "Quit Screen Recorder"
     else:
-        # Stop the screen recorder process
-        os.kill(screenrecorder_pid, 15)  # Try to terminate the process
-        time.sleep(3)
-        # Check if the process is still running
-        try:
-            os.kill(screenrecorder_pid, 0)
-        except OSError:
-            print(f"Screen Recorder with PID {screenrecorder_pid} has been successfully terminated.")
+        # Stop the screen recorder process, escalating to SIGKILL only if it does not exit in time
+        if supervisor.stop("recorder"):
+            print("Screen Recorder has been successfully terminated.")
         else:
-            os.kill(screenrecorder_pid, 9)  # Force kill if still running
-            print(f"Screen Recorder with PID {screenrecorder_pid} was forcefully terminated.")
-        screenrecorder_pid = None
+            print("Screen Recorder was forcefully terminated.")
         return "Start Screen Recorder"
@@ -0,0 +1,157 @@
+# src/utils/child_output.py
+
+import collections
+import os
+import selectors
+import threading
+import time
+
+RING_LINES = 500  # Recent lines kept in memory per child
+MAX_LINE_BYTES = 64 * 1024  # A line without a newline is cut here
+# Set SYSTRAY_CHILD_LOG_DIR to also keep a rotated log file per child
+LOG_DIR = os.environ.get("SYSTRAY_CHILD_LOG_DIR")
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 2
+
+output_reader = None  # Shared reader, created on first use
+output_reader_lock = threading.Lock()
+
+class RotatingLog:
+    # name.log, rolled over to name.log.1 .. name.log.N once it reaches max_bytes
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(path, "ab")
+
+    def write(self, data):
+        if self.file.tell() + len(data) > self.max_bytes:
+            self._rotate()
+        self.file.write(data)
+        self.file.flush()
+
+    def _rotate(self):
+        self.file.close()
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        self.file = open(self.path, "wb")
+
+    def close(self):
+        self.file.close()
+
+class ChildOutput:
+    def __init__(self, name, max_lines=RING_LINES, log_dir=LOG_DIR):
+        self.name = name
+        self.lines = collections.deque(maxlen=max_lines)
+        self.partial = {}  # fd -> bytes after the last newline
+        self.log = RotatingLog(os.path.join(log_dir, f"{name}.log")) if log_dir else None
+        self.bytes_read = 0
+
+class OutputReader:
+    # Drains the stdout/stderr pipes of every child from one selector thread, so a
+    # chatty child never fills its pipe and blocks. The newest lines of each child
+    # are kept in a ring buffer, and optionally appended to a rotated log file.
+    def __init__(self, max_lines=RING_LINES, log_dir=LOG_DIR):
+        self.max_lines = max_lines
+        self.log_dir = log_dir
+        self.lock = threading.Lock()
+        self.outputs = {}
+        self.selector = selectors.DefaultSelector()
+        self.wake_read, self.wake_write = os.pipe()
+        os.set_blocking(self.wake_read, False)
+        os.set_blocking(self.wake_write, False)
+        self.selector.register(self.wake_read, selectors.EVENT_READ)
+        self.pending = []  # (stream, output, label) waiting to be registered by the thread
+        self.thread = threading.Thread(target=self._run, daemon=True, name="child-output")
+        self.thread.start()
+
+    def attach(self, name, process):
+        # Starts draining process.stdout/stderr; a child restarted under the same name
+        # keeps appending to the same buffer
+        with self.lock:
+            output = self.outputs.get(name)
+            if output is None:
+                output = self.outputs[name] = ChildOutput(name, self.max_lines, self.log_dir)
+            for stream, label in ((process.stdout, "out"), (process.stderr, "err")):
+                if stream is not None:
+                    os.set_blocking(stream.fileno(), False)
+                    self.pending.append((stream, output, label))
+        try:
+            os.write(self.wake_write, b"\0")
+        except BlockingIOError:
+            pass  # A wakeup is already pending
+
+    def tail(self, name, count=None):
+        with self.lock:
+            output = self.outputs.get(name)
+            if output is None:
+                return []
+            lines = list(output.lines)
+        return lines if count is None else lines[-count:]
+
+    def names(self):
+        with self.lock:
+            return list(self.outputs)
+
+    def _add_line(self, output, prefix, line):
+        output.lines.append(f"{prefix}{line.decode(errors='replace').rstrip()}")
+
+    def _read(self, stream, output, label):
+        fd = stream.fileno()
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        prefix = f"{time.strftime('%H:%M:%S')} {label}: "
+        with self.lock:
+            if not data:
+                rest = output.partial.pop(fd, b"")
+                if rest:
+                    self._add_line(output, prefix, rest)
+                self.selector.unregister(fd)
+                stream.close()
+                return
+            output.bytes_read += len(data)
+            if output.log is not None:
+                try:
+                    output.log.write(data)
+                except OSError as e:
+                    print(f"Could not write {output.name} log: {e}")
+                    output.log = None
+            buffer = output.partial.pop(fd, b"") + data
+            *lines, rest = buffer.split(b"\n")
+            for line in lines[-output.lines.maxlen:]:  # Older ones would drop out anyway
+                self._add_line(output, prefix, line)
+            if len(rest) >= MAX_LINE_BYTES:
+                self._add_line(output, prefix, rest)
+                rest = b""
+            if rest:
+                output.partial[fd] = rest
+
+    def _run(self):
+        while True:
+            for key, _ in self.selector.select():
+                if key.fileobj == self.wake_read:
+                    try:
+                        os.read(self.wake_read, 64)
+                    except BlockingIOError:
+                        pass
+                    with self.lock:
+                        pending, self.pending = self.pending, []
+                    for stream, output, label in pending:
+                        self.selector.register(stream.fileno(), selectors.EVENT_READ, (stream, output, label))
+                else:
+                    self._read(*key.data)
+
+def get_output_reader():
+    global output_reader
+    with output_reader_lock:
+        if output_reader is None:
+            output_reader = OutputReader()
+        return output_reader
@@ -0,0 +1,150 @@
+# src/utils/clipboard_server.py
+
+import io
+import os
+import select
+import threading
+
+try:
+    from Xlib import X, Xatom, display as xdisplay
+    from Xlib.protocol import event as xevent
+except ImportError:  # python-xlib missing, no clipboard screenshots
+    xdisplay = None
+
+INCR_CHUNK = 256 * 1024  # Bytes per INCR chunk, further limited by the server's request size
+
+clipboard_server = None  # Shared clipboard owner, started on first use
+clipboard_server_lock = threading.Lock()
+
+class ClipboardServer(threading.Thread):
+    # Owns the CLIPBOARD selection on a private X connection and serves the last
+    # offered image as image/png. Nothing is encoded until a client asks for the
+    # data, and the PNG is then kept for further pastes. Images too big for one
+    # property go out with the INCR protocol.
+    def __init__(self):
+        super().__init__(daemon=True, name="clipboard")
+        self.display = xdisplay.Display()
+        self.window = self.display.screen().root.create_window(0, 0, 1, 1, 0, X.CopyFromParent,
+                                                               event_mask=X.PropertyChangeMask)
+        self.atoms = {name: self.display.intern_atom(name) for name in
+                      ("CLIPBOARD", "TARGETS", "TIMESTAMP", "INCR", "image/png", "SYSTRAY_CLIPBOARD_TIME")}
+        max_request = self.display.info.max_request_length * 4
+        self.chunk_size = min(INCR_CHUNK, max_request - 1024)
+        self.lock = threading.Lock()
+        self.image = None
+        self.png = None
+        self.pending = None  # Image waiting for a server timestamp to take ownership
+        self.owned_since = None
+        self.transfers = {}  # (requestor id, property) -> [window, data, offset] for INCR
+        self.wake_read, self.wake_write = os.pipe()
+        self.display.flush()
+
+    def offer(self, image):
+        # Callable from any thread; the selection is taken over on the clipboard thread
+        with self.lock:
+            self.pending = image
+        os.write(self.wake_write, b"\0")
+
+    def _png(self):
+        if self.png is None:
+            buffer = io.BytesIO()
+            self.image.save(buffer, "PNG", compress_level=1)  # Encoded on the first paste only
+            self.png = buffer.getvalue()
+            self.image = None
+        return self.png
+
+    def run(self):
+        while True:
+            readable, _, _ = select.select([self.display.fileno(), self.wake_read], [], [])
+            if self.wake_read in readable:
+                os.read(self.wake_read, 64)
+                # Any property change hands us a server timestamp for the ownership
+                self.window.change_property(self.atoms["SYSTRAY_CLIPBOARD_TIME"], Xatom.STRING, 8, b"")
+                self.display.flush()
+            while self.display.pending_events():
+                event = self.display.next_event()
+                try:
+                    self._handle(event)
+                except Exception as e:
+                    print(f"Clipboard request failed: {e}")
+            self.display.flush()
+
+    def _handle(self, event):
+        if event.type == X.PropertyNotify:
+            if event.window.id == self.window.id and event.atom == self.atoms["SYSTRAY_CLIPBOARD_TIME"]:
+                self._take_ownership(event.time)
+            elif event.state == X.PropertyDelete:
+                self._send_next_chunk(event.window, event.atom)
+        elif event.type == X.SelectionRequest:
+            self._answer(event)
+        elif event.type == X.SelectionClear and event.selection == self.atoms["CLIPBOARD"]:
+            self.image = self.png = self.owned_since = None  # Someone else copied something
+
+    def _take_ownership(self, time):
+        with self.lock:
+            image, self.pending = self.pending, None
+        if image is None:
+            return
+        self.image, self.png = image, None
+        self.window.set_selection_owner(self.atoms["CLIPBOARD"], time)
+        if self.display.get_selection_owner(self.atoms["CLIPBOARD"]) == self.window:
+            self.owned_since = time
+        else:
+            print("Could not take the clipboard")
+            self.image = self.owned_since = None
+
+    def _answer(self, event):
+        prop = event.property or event.target  # Obsolete clients leave the property empty
+        requestor = event.requestor
+        if self.owned_since is None or event.selection != self.atoms["CLIPBOARD"]:
+            prop = X.NONE
+        elif event.target == self.atoms["TARGETS"]:
+            targets = [self.atoms["TARGETS"], self.atoms["TIMESTAMP"], self.atoms["image/png"]]
+            requestor.change_property(prop, Xatom.ATOM, 32, targets)
+        elif event.target == self.atoms["TIMESTAMP"]:
+            requestor.change_property(prop, Xatom.INTEGER, 32, [self.owned_since])
+        elif event.target == self.atoms["image/png"]:
+            data = self._png()
+            if len(data) > self.chunk_size:
+                # INCR: announce the size, then send a chunk each time the requestor
+                # deletes the property, ending with an empty one
+                requestor.change_attributes(event_mask=X.PropertyChangeMask)
+                requestor.change_property(prop, self.atoms["INCR"], 32, [len(data)])
+                self.transfers[(requestor.id, prop)] = [requestor, data, 0]
+            else:
+                requestor.change_property(prop, self.atoms["image/png"], 8, data)
+        else:
+            prop = X.NONE
+        notify = xevent.SelectionNotify(time=event.time, requestor=requestor, selection=event.selection,
+                                        target=event.target, property=prop)
+        requestor.send_event(notify)
+
+    def _send_next_chunk(self, window, prop):
+        transfer = self.transfers.get((window.id, prop))
+        if transfer is None:
+            return
+        requestor, data, offset = transfer
+        chunk = data[offset:offset + self.chunk_size]
+        requestor.change_property(prop, self.atoms["image/png"], 8, chunk)
+        if chunk:
+            transfer[2] = offset + len(chunk)
+        else:
+            del self.transfers[(window.id, prop)]  # The empty chunk ends the transfer
+
+def is_available():
+    return xdisplay is not None
+
+def get_clipboard_server():
+    # Returns the running clipboard owner, or None without python-xlib or X
+    global clipboard_server
+    with clipboard_server_lock:
+        if clipboard_server is None:
+            if not is_available():
+                return None
+            try:
+                clipboard_server = ClipboardServer()
+            except Exception as e:
+                print(f"Cannot open X display for the clipboard: {e}")
+                return None
+            clipboard_server.start()
+        return clipboard_server
@@ -3,57 +3,61 @@
 
 import subprocess
 import os
-import signal
+import select
 import time
-
-conky_pid = None  # Global variable to track the Conky process ID
+from utils.supervisor import supervisor
+from utils.child_output import get_output_reader
+
+FORK_TIMEOUT = 5  # How long conky gets to report its background PID
+
+def wait_for_fork(process, timeout=FORK_TIMEOUT):
+    # Returns conky's background PID, or None if it stays in the foreground (or dies)
+    # without saying so. Reads stderr with a deadline instead of blocking line by line.
+    deadline = time.monotonic() + timeout
+    output = b""
+    fd = process.stderr.fileno()
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            return None
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            return None  # Exited without forking
+        output += chunk
+        for line in output.splitlines():
+            if b'forked to background, pid is' in line:
+                return int(line.decode().strip().split()[-1])
 
 def toggle_conky():
-    global conky_pid
-
-    if conky_pid is None:
+    if not supervisor.is_running("conky"):
         # Start Conky and let it fork to the background, then track the background PID
         process = subprocess.Popen(['conky'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        # Capture the output to find the forked PID
-        for line in process.stderr:
-            if b'forked to background, pid is' in line:
-                conky_pid = line.decode().strip().split()[-1]
-                print(f"Conky started with background PID {conky_pid}.")
-                break
+        conky_pid = wait_for_fork(process)
+        # Keep the pipes drained from here on, whichever way conky went: a foreground conky
+        # would block once a pipe fills, and a forked one inherited the write ends. The
+        # reader closes our ends when the last writer has gone.
+        get_output_reader().attach("conky", process)
+        if conky_pid is not None:
+            process.wait()  # The launcher exits right after forking
+            if supervisor.watch("conky", conky_pid) is None:
+                print(f"Conky with PID {conky_pid} exited right after starting.")
+                return "Start Conky"
+            print(f"Conky started with background PID {conky_pid}.")
+        elif process.poll() is None:
+            supervisor.watch("conky", process.pid, process)  # Not configured to fork
+            print(f"Conky started in the foreground with PID {process.pid}.")
+        else:
+            print(f"Conky failed to start (exit status {process.returncode}).")
+            return "Start Conky"
 
         return "Quit Conky"
     else:
-        # Check if the Conky process is still running
-        if not os.path.exists(f"/proc/{conky_pid}"):
-            print(f"Conky with PID {conky_pid} could not be found (already stopped).")
-            conky_pid = None
-            return "Start Conky"
-        
-        # Attempt to gracefully terminate the Conky process
-        try:
-            os.kill(int(conky_pid), signal.SIGTERM)
-            time.sleep(1)  # Give the process some time to terminate
-
-            # Check if the process is still running
-            if os.path.exists(f"/proc/{conky_pid}"):
-                print(f"Conky with PID {conky_pid} did not terminate with SIGTERM, sending SIGKILL...")
-                os.kill(int(conky_pid), signal.SIGKILL)  # Force quit if it's still running
-            else:
-                print(f"Conky with PID {conky_pid} stopped.")
-
-        except ProcessLookupError:
-            print(f"Conky with PID {conky_pid} could not be found.")
-        except Exception as e:
-            print(f"An error occurred while stopping Conky: {e}")
-        
-        conky_pid = None
+        # Returns as soon as conky is gone; SIGKILL only if it ignores SIGTERM
+        if supervisor.stop("conky"):
+            print("Conky stopped.")
+        else:
+            print("Conky did not terminate with SIGTERM and was killed.")
         return "Start Conky"
 
 def check_conky_status():
-    global conky_pid
-    if conky_pid is None or not conky_pid.isdigit() or not os.path.exists(f"/proc/{conky_pid}"):
-        conky_pid = None
-        return "Start Conky"
-    else:
-        return "Quit Conky"
+    return "Quit Conky" if supervisor.is_running("conky") else "Start Conky"
@@ -0,0 +1,64 @@
+# src/utils/dbus_loop.py
+
+import threading
+
+try:
+    from gi.repository import GLib
+except ImportError:  # PyGObject missing, D-Bus features are disabled
+    GLib = None
+
+loop_context = None
+loop_thread = None
+loop_lock = threading.Lock()
+
+def is_available():
+    return GLib is not None
+
+def start_loop():
+    # One GLib main loop in a daemon thread dispatches every D-Bus signal the tray subscribes to
+    global loop_context, loop_thread
+    with loop_lock:
+        if loop_thread is not None:
+            return loop_context
+        if GLib is None:
+            raise RuntimeError("PyGObject is not installed")
+        context = GLib.MainContext()
+        ready = threading.Event()
+
+        def run():
+            context.push_thread_default()
+            loop = GLib.MainLoop(context)
+            ready.set()
+            loop.run()
+
+        loop_thread = threading.Thread(target=run, daemon=True, name="dbus-loop")
+        loop_thread.start()
+        ready.wait()
+        loop_context = context
+        return loop_context
+
+def call_in_loop(fn, *args):
+    # Run fn on the loop thread and wait for its result, so signal subscriptions
+    # made inside fn are dispatched by the shared loop
+    context = start_loop()
+    if threading.current_thread() is loop_thread:
+        return fn(*args)
+
+    done = threading.Event()
+    outcome = {}
+
+    def invoke():
+        try:
+            outcome["result"] = fn(*args)
+        except Exception as e:
+            outcome["error"] = e
+        done.set()
+        return False  # Run once
+
+    source = GLib.idle_source_new()
+    source.set_callback(invoke)
+    source.attach(context)
+    done.wait()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
@@ -0,0 +1,126 @@
+# src/utils/dispatcher.py
+
+import bisect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bounds of the latency buckets, in milliseconds
+LATENCY_BUCKETS_MS = [10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+# Workers for actions that mostly wait on the user (confirm dialogs, password prompts,
+# countdowns). They get their own pool so they never hold up the short actions.
+INTERACTIVE_WORKERS = 4
+
+job_context = threading.local()  # Cancel event of the job running on this worker
+
+class LatencyHistogram:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.samples = 0
+
+    def record(self, seconds):
+        milliseconds = seconds * 1000
+        with self.lock:
+            self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+            self.total += milliseconds
+            self.samples += 1
+
+    def summary(self):
+        with self.lock:
+            if not self.samples:
+                return "no samples"
+            labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+            buckets = " ".join(f"{label}:{count}" for label, count in zip(labels, self.counts) if count)
+            return f"n={self.samples} mean={self.total / self.samples:.1f}ms {buckets}"
+
+class ActionDispatcher:
+    # Runs menu actions on a bounded worker pool so tray callbacks return immediately.
+    # Each action can cap how many of its jobs run at once (1 = one at a time), and
+    # actions marked interactive run in a separate pool of their own.
+    def __init__(self, max_workers=4, interactive_workers=INTERACTIVE_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="action")
+        self.interactive_executor = ThreadPoolExecutor(max_workers=interactive_workers, thread_name_prefix="interactive")
+        self.lock = threading.Lock()
+        self.limits = {}
+        self.interactive = set()
+        self.jobs = {}  # action -> {future: cancel event}
+        self.wait_latency = {}
+        self.run_latency = {}
+
+    def set_limit(self, action, max_concurrent):
+        self.limits[action] = max_concurrent
+
+    def set_interactive(self, action):
+        # For actions that block a worker on a window for as long as the user takes
+        self.interactive.add(action)
+
+    def submit(self, action, fn, *args):
+        with self.lock:
+            jobs = self.jobs.setdefault(action, {})
+            limit = self.limits.get(action)
+            if limit is not None and len(jobs) >= limit:
+                print(f"Action '{action}' is already running, ignoring request.")
+                return None
+            cancel_event = threading.Event()
+            submitted = time.monotonic()
+            executor = self.interactive_executor if action in self.interactive else self.executor
+            future = executor.submit(self._run, action, cancel_event, submitted, fn, args)
+            jobs[future] = cancel_event
+        future.add_done_callback(lambda done: self._finish(action, done))
+        return future
+
+    def _run(self, action, cancel_event, submitted, fn, args):
+        started = time.monotonic()
+        self.wait_latency.setdefault(action, LatencyHistogram()).record(started - submitted)
+        job_context.cancel_event = cancel_event
+        try:
+            return fn(*args)
+        except Exception as e:
+            print(f"Action '{action}' failed: {e}")
+        finally:
+            job_context.cancel_event = None
+            self.run_latency.setdefault(action, LatencyHistogram()).record(time.monotonic() - started)
+
+    def _finish(self, action, future):
+        with self.lock:
+            self.jobs.get(action, {}).pop(future, None)
+
+    def cancel(self, action):
+        # Queued jobs are dropped, running jobs are asked to stop through their cancel event
+        with self.lock:
+            jobs = list(self.jobs.get(action, {}).items())
+        for future, cancel_event in jobs:
+            if not future.cancel():
+                cancel_event.set()
+
+    def cancel_all(self):
+        with self.lock:
+            actions = list(self.jobs)
+        for action in actions:
+            self.cancel(action)
+
+    def is_running(self, action):
+        with self.lock:
+            return bool(self.jobs.get(action))
+
+    def report(self):
+        lines = []
+        for action in sorted(self.run_latency):
+            lines.append(f"{action}: run {self.run_latency[action].summary()}; "
+                         f"queue {self.wait_latency.get(action, LatencyHistogram()).summary()}")
+        return "\n".join(lines)
+
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False)
+        self.interactive_executor.shutdown(wait=False)
+
+def cancel_requested():
+    # Long-running actions poll this to honour ActionDispatcher.cancel()
+    event = getattr(job_context, "cancel_event", None)
+    return event is not None and event.is_set()
+
+dispatcher = ActionDispatcher()
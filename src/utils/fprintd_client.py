@@ -0,0 +1,139 @@
+# src/utils/fprintd_client.py
+
+import os
+import threading
+from utils import dbus_loop
+
+try:
+    from gi.repository import Gio, GLib
+except ImportError:
+    Gio = None
+    GLib = None
+
+FPRINT_SERVICE = "net.reactivated.Fprint"
+MANAGER_PATH = "/net/reactivated/Fprint/Manager"
+MANAGER_INTERFACE = "net.reactivated.Fprint.Manager"
+DEVICE_INTERFACE = "net.reactivated.Fprint.Device"
+
+VERIFY_TIMEOUT = 30
+# Verify errors and statuses that mean the enrolled prints or the device went away
+GONE_ERRORS = ("net.reactivated.Fprint.Error.NoEnrolledPrints", "net.reactivated.Fprint.Error.NoSuchDevice")
+GONE_STATUSES = ("verify-disconnected",)
+
+fprintd_client = None  # Shared client, created on first use
+fprintd_client_lock = threading.Lock()
+
+class FprintdClient:
+    # Talks to fprintd over D-Bus: enrolled-finger queries and signal-driven
+    # verification instead of forking fprintd-list / fprintd-verify.
+    def __init__(self, bus_type=None):
+        self.bus = Gio.bus_get_sync(bus_type if bus_type is not None else Gio.BusType.SYSTEM, None)
+        self.change_listeners = []
+        self.verify_done = None
+        dbus_loop.call_in_loop(self._subscribe)
+
+    def _subscribe(self):
+        # Any finished enrollment (from fprintd-enroll or a settings panel) is broadcast here
+        self.bus.signal_subscribe(FPRINT_SERVICE, DEVICE_INTERFACE, "EnrollStatus", None, None,
+                                  Gio.DBusSignalFlags.NONE, self._on_enroll_status)
+
+    def _on_enroll_status(self, connection, sender, path, interface, signal, parameters):
+        status, done = parameters.unpack()
+        if done:
+            self._notify_change()
+
+    def add_change_listener(self, listener):
+        # Called after a finished enrollment, or when verify finds no device or no prints
+        self.change_listeners.append(listener)
+
+    def _notify_change(self):
+        for listener in list(self.change_listeners):
+            listener()
+
+    def _call(self, path, interface, method, parameters=None, reply_type=None, timeout_ms=-1):
+        return self.bus.call_sync(FPRINT_SERVICE, path, interface, method, parameters,
+                                  GLib.VariantType.new(reply_type) if reply_type else None,
+                                  Gio.DBusCallFlags.NONE, timeout_ms, None)
+
+    def get_default_device(self):
+        try:
+            return self._call(MANAGER_PATH, MANAGER_INTERFACE, "GetDefaultDevice", None, "(o)").unpack()[0]
+        except GLib.Error as e:
+            print(f"No fingerprint device: {e.message}")
+            return None
+
+    def list_enrolled_fingers(self, username, device=None):
+        device = device or self.get_default_device()
+        if device is None:
+            return []
+        try:
+            return self._call(device, DEVICE_INTERFACE, "ListEnrolledFingers",
+                              GLib.Variant("(s)", (username,)), "(as)").unpack()[0]
+        except GLib.Error:
+            return []  # NoEnrolledPrints
+
+    def verify(self, username, timeout=VERIFY_TIMEOUT):
+        # Blocking for the caller (a worker thread) but driven by VerifyStatus signals
+        device = self.get_default_device()
+        if device is None:
+            self._notify_change()
+            return False
+        result = {}
+        done = threading.Event()
+
+        def on_status(connection, sender, path, interface, signal, parameters):
+            status, finished = parameters.unpack()
+            result["status"] = status
+            if finished:  # retry-scan and similar statuses keep the scan going
+                done.set()
+
+        subscription = dbus_loop.call_in_loop(
+            self.bus.signal_subscribe, FPRINT_SERVICE, DEVICE_INTERFACE, "VerifyStatus", device, None,
+            Gio.DBusSignalFlags.NONE, on_status)
+        self.verify_done = (done, result)
+        try:
+            self._call(device, DEVICE_INTERFACE, "Claim", GLib.Variant("(s)", (username,)))
+            try:
+                self._call(device, DEVICE_INTERFACE, "VerifyStart", GLib.Variant("(s)", ("any",)))
+                if not done.wait(timeout):
+                    result.setdefault("status", "verify-timeout")
+                try:
+                    self._call(device, DEVICE_INTERFACE, "VerifyStop")
+                except GLib.Error:
+                    pass
+            finally:
+                self._call(device, DEVICE_INTERFACE, "Release")
+        except GLib.Error as e:
+            print(f"Fingerprint verification failed: {e.message}")
+            if Gio.DBusError.get_remote_error(e) in GONE_ERRORS:
+                self._notify_change()
+            return False
+        finally:
+            self.verify_done = None
+            self.bus.signal_unsubscribe(subscription)
+        print(f"Fingerprint verification result: {result.get('status')}")
+        if result.get("status") in GONE_STATUSES:
+            self._notify_change()
+        return result.get("status") == "verify-match"
+
+    def cancel_verify(self):
+        pending = self.verify_done
+        if pending is not None:
+            done, result = pending
+            result["status"] = "verify-cancelled"
+            done.set()
+
+def get_fprintd_client():
+    # Returns the shared client, or None when D-Bus is unavailable
+    global fprintd_client
+    with fprintd_client_lock:
+        if fprintd_client is None:
+            if Gio is None or not dbus_loop.is_available():
+                return None
+            bus_type = Gio.BusType.SESSION if os.environ.get("SYSTRAY_FPRINTD_BUS") == "session" else None
+            try:
+                fprintd_client = FprintdClient(bus_type)
+            except Exception as e:
+                print(f"fprintd D-Bus client unavailable: {e}")
+                return None
+        return fprintd_client
@@ -0,0 +1,124 @@
+# src/utils/frame_ring.py
+
+import math
+import mmap
+import os
+import threading
+import time
+
+BYTES_PER_PIXEL = 4  # X hands out 32-bit ZPixmap pixels, stored as they come
+# Upper bound for one ring; longer windows or bigger rectangles keep fewer frames
+MAX_RING_BYTES = int(os.environ.get("SYSTRAY_FRAME_RING_MB", 512)) * 1024 * 1024
+
+class FrameRing:
+    # Fixed-size ring of raw frames in one preallocated buffer. Writing a frame
+    # copies it into the oldest slot; nothing is allocated per frame. The buffer is
+    # an anonymous mapping: its pages are zero and cost nothing until first written.
+    def __init__(self, capacity, width, height, bytes_per_pixel=BYTES_PER_PIXEL):
+        self.capacity = capacity
+        self.size = (width, height)
+        self.frame_bytes = width * height * bytes_per_pixel
+        self.buffer = mmap.mmap(-1, capacity * self.frame_bytes)
+        self.view = memoryview(self.buffer)
+        self.timestamps = [0.0] * capacity
+        self.lock = threading.Lock()
+        self.next = 0
+        self.count = 0
+
+    @classmethod
+    def for_window(cls, seconds, interval, width, height, max_bytes=MAX_RING_BYTES):
+        # Enough slots for `seconds` of frames every `interval` seconds, within max_bytes
+        wanted = max(1, math.ceil(seconds / interval))
+        affordable = max(1, max_bytes // (width * height * BYTES_PER_PIXEL))
+        if affordable < wanted:
+            print(f"Frame ring limited to {affordable} of {wanted} frames by the {max_bytes // 2**20} MiB cap")
+        return cls(min(wanted, affordable), width, height)
+
+    def memory(self):
+        return len(self.buffer)
+
+    def write(self, data, timestamp=None):
+        if len(data) != self.frame_bytes:
+            raise ValueError(f"Frame is {len(data)} bytes, expected {self.frame_bytes}")
+        with self.lock:
+            slot = self.next
+            start = slot * self.frame_bytes
+            self.view[start:start + self.frame_bytes] = data
+            self.timestamps[slot] = time.time() if timestamp is None else timestamp
+            self.next = (slot + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def snapshot(self, since=None):
+        # Hands out the frames (oldest first) as (timestamp, read-only view), optionally
+        # only those newer than `since`. Nothing is copied: the filled buffer is swapped
+        # for an empty one under the lock, so capture goes on at once into the new
+        # buffer while the old one lives as long as its views are being encoded.
+        with self.lock:
+            buffer, timestamps = self.view, self.timestamps
+            first, count = (self.next - self.count) % self.capacity, self.count
+            self.buffer = mmap.mmap(-1, len(self.buffer))
+            self.view = memoryview(self.buffer)
+            self.timestamps = [0.0] * self.capacity
+            self.next = 0
+            self.count = 0
+        buffer = buffer.toreadonly()
+        frames = []
+        for index in range(count):
+            slot = (first + index) % self.capacity
+            if since is None or timestamps[slot] >= since:
+                start = slot * self.frame_bytes
+                frames.append((timestamps[slot], buffer[start:start + self.frame_bytes]))
+        return frames
+
+    def clear(self):
+        with self.lock:
+            self.next = 0
+            self.count = 0
+
+class FrameCapture(threading.Thread):
+    # Grabs one rectangle into a FrameRing every `interval` seconds on its own thread,
+    # for `duration` seconds or until stopped. Frames are only encoded on flush.
+    def __init__(self, screen, rectangle, interval, window, duration=None, on_done=None):
+        super().__init__(daemon=True, name="frame-capture")
+        self.screen = screen
+        self.rectangle = screen.clip(*rectangle)
+        self.interval = interval
+        self.duration = duration
+        self.on_done = on_done
+        x, y, width, height = self.rectangle
+        self.ring = FrameRing.for_window(window, interval, width, height)
+        self.stop_event = threading.Event()
+        self.frames = 0
+        self.missed = 0
+
+    def run(self):
+        started = time.monotonic()
+        deadline = started
+        try:
+            while not self.stop_event.is_set():
+                if self.duration is not None and time.monotonic() - started >= self.duration:
+                    break
+                self.ring.write(self.screen.grab_raw(*self.rectangle))
+                self.frames += 1
+                deadline += self.interval
+                delay = deadline - time.monotonic()
+                if delay < 0 and self.interval > 0:
+                    # Slower than the interval: skip the slots we missed instead of bursting
+                    skipped = math.ceil(-delay / self.interval)
+                    self.missed += skipped
+                    deadline += skipped * self.interval
+                    delay += skipped * self.interval
+                self.stop_event.wait(delay)
+        except Exception as e:
+            print(f"Frame capture stopped: {e}")
+        if self.on_done is not None:
+            self.on_done(self)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def flush(self, seconds=None):
+        # Returns (size, raw_mode, frames) of the last `seconds` (or everything) for
+        # encoding, and starts the ring afresh; a later flush only sees newer frames
+        since = time.time() - seconds if seconds is not None else None
+        return self.ring.size, self.screen.raw_mode, self.ring.snapshot(since)
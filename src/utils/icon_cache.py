@@ -0,0 +1,120 @@
+# src/utils/icon_cache.py
+
+import itertools
+import os
+import threading
+from PIL import Image, ImageDraw
+
+ICON_SIZES = (16, 22, 24, 32, 48)
+
+# Status badges: colour and the corner they sit in
+BADGES = {
+    "conky": ((66, 133, 244), "top-left"),
+    "camera": ((52, 168, 83), "top-right"),
+    "bluetooth": ((0, 188, 212), "bottom-left"),
+    "recording": ((234, 67, 53), "bottom-right"),
+}
+
+ICON_PATHS = (
+    os.path.join(os.path.dirname(__file__), '../../assets/systray-icon.png'),
+    '/usr/local/share/systray/assets/systray-icon.png',
+)
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "systray", "icons")
+
+class IconCache:
+    # Pre-rendered tray icons for every size and badge combination. Variants are kept
+    # on disk keyed by the source icon's mtime and in memory as loaded images, so a
+    # state change only costs a dictionary lookup.
+    def __init__(self, source_path=None, cache_dir=CACHE_DIR):
+        self.source_path = source_path or next((path for path in ICON_PATHS if os.path.exists(path)), None)
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+        self.images = {}  # (size, badges) -> Image
+        self.base = {}  # size -> resized source Image
+        try:
+            self.source_key = str(os.stat(self.source_path).st_mtime_ns) if self.source_path else "fallback"
+        except OSError:
+            self.source_key = "fallback"
+
+    def _cache_path(self, size, badges):
+        return os.path.join(self.cache_dir, f"{self.source_key}-{size}-{'+'.join(badges) or 'plain'}.png")
+
+    def _base_image(self, size):
+        if size not in self.base:
+            try:
+                if self.source_path is None:
+                    raise FileNotFoundError("Systray icon not found in any known locations.")
+                with Image.open(self.source_path) as source:
+                    self.base[size] = source.convert("RGBA").resize((size, size), Image.LANCZOS)
+            except Exception as e:
+                print(f"Error loading image: {e}")
+                # Fallback to a plain white image with a black rectangle if loading fails
+                image = Image.new('RGBA', (size, size), (255, 255, 255, 255))
+                draw = ImageDraw.Draw(image)
+                draw.rectangle((size // 4, size // 4, size * 3 // 4, size * 3 // 4), fill='black')
+                self.base[size] = image
+        return self.base[size]
+
+    def _render(self, size, badges):
+        image = self._base_image(size).copy()
+        draw = ImageDraw.Draw(image)
+        diameter = max(5, size * 3 // 8)
+        for badge in badges:
+            colour, corner = BADGES[badge]
+            x = 0 if corner.endswith("left") else size - diameter
+            y = 0 if corner.startswith("top") else size - diameter
+            draw.ellipse((x, y, x + diameter - 1, y + diameter - 1), fill=colour, outline=(255, 255, 255))
+        return image
+
+    def _load_or_render(self, size, badges):
+        path = self._cache_path(size, badges)
+        try:
+            with Image.open(path) as cached:
+                image = cached.convert("RGBA")
+        except (OSError, ValueError):
+            image = self._render(size, badges)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                image.save(temp_path, "PNG")
+                os.replace(temp_path, path)
+            except OSError as e:
+                print(f"Could not write icon cache {path}: {e}")
+        image.load()  # Decode now, not when the tray first sends it
+        return image
+
+    def get(self, size, badges=()):
+        key = (size, tuple(sorted(badges)))
+        image = self.images.get(key)
+        if image is None:
+            with self.lock:
+                image = self.images.get(key)
+                if image is None:
+                    image = self._load_or_render(*key)
+                    self.images[key] = image
+        return image
+
+    def prerender(self, sizes=ICON_SIZES):
+        for size in sizes:
+            for count in range(len(BADGES) + 1):
+                for badges in itertools.combinations(sorted(BADGES), count):
+                    self.get(size, badges)
+        self.prune()
+
+    def prune(self):
+        # Drop variants rendered from an older version of the source icon
+        try:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".png") and not name.startswith(f"{self.source_key}-"):
+                    os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+icon_cache = None
+
+def get_icon_cache():
+    global icon_cache
+    if icon_cache is None:
+        icon_cache = IconCache()
+    return icon_cache
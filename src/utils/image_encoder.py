@@ -0,0 +1,101 @@
+# src/utils/image_encoder.py
+
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+# Formats a screenshot can be written in. "level" is the PNG compression level or
+# the WebP effort; QOI has no settings and falls back to fast PNG without support.
+FORMATS = {
+    "png": {"extension": "png", "level": 6},
+    "png-fast": {"extension": "png", "level": 1},
+    "webp": {"extension": "webp", "level": 4},
+    "qoi": {"extension": "qoi", "level": None},
+}
+DEFAULT_FORMAT = os.environ.get("SYSTRAY_SCREENSHOT_FORMAT", "png")
+DEFAULT_LEVEL = os.environ.get("SYSTRAY_SCREENSHOT_LEVEL")
+MAX_WORKERS = 2
+
+encode_pool = None  # Shared process pool, started on first use
+encode_pool_lock = threading.Lock()
+
+def supports_qoi():
+    Image.init()  # Only the common plugins are registered until the first full init
+    return "QOI" in Image.SAVE
+
+def resolve_format(name=None, level=None):
+    # Returns (format, extension, level) for a format name, with the fallbacks applied
+    name = (name or DEFAULT_FORMAT).lower()
+    if name not in FORMATS:
+        print(f"Unknown screenshot format {name!r}, using png")
+        name = "png"
+    if name == "qoi" and not supports_qoi():
+        name = "png-fast"
+    if level is None and DEFAULT_LEVEL is not None and DEFAULT_LEVEL.isdigit():
+        level = int(DEFAULT_LEVEL)
+    return name, FORMATS[name]["extension"], FORMATS[name]["level"] if level is None else level
+
+def encode(image, format_name, level=None):
+    # Encodes to bytes; lossless in every format
+    format_name, _, level = resolve_format(format_name, level)
+    buffer = io.BytesIO()
+    if format_name in ("png", "png-fast"):
+        image.save(buffer, "PNG", compress_level=level)
+    elif format_name == "webp":
+        image.save(buffer, "WEBP", lossless=True, method=level)
+    else:
+        image.save(buffer, "QOI")
+    return buffer.getvalue()
+
+def write_atomically(path, data):
+    # The final name only ever holds a complete file
+    temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def encode_to_file(mode, size, pixels, path, format_name, level=None, raw_mode=None):
+    # Runs in a pool worker; gets raw pixels so no PIL object has to be pickled.
+    # raw_mode is the pixel layout when it differs from mode (e.g. BGRX from X).
+    image = Image.frombuffer(mode, size, pixels, "raw", raw_mode or mode, 0, 1)
+    write_atomically(path, encode(image, format_name, level))
+    return path
+
+def get_encode_pool():
+    # forkserver: workers are not forked from a process running Tk and GLib threads.
+    # The server would preload __main__ (main.py and everything it imports) by
+    # default; the workers only need this module.
+    global encode_pool
+    with encode_pool_lock:
+        if encode_pool is None:
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([])
+            encode_pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=context)
+        return encode_pool
+
+def submit_encode(image, path, format_name=None, level=None):
+    # Returns a Future for the written path
+    format_name, _, level = resolve_format(format_name, level)
+    return get_encode_pool().submit(encode_to_file, image.mode, image.size, image.tobytes(), path, format_name, level)
+
+def submit_encode_raw(pixels, size, raw_mode, path, format_name=None, level=None):
+    # Same, for pixels that never became a PIL image (ring buffer frames). Views are
+    # copied to bytes here, as the pool has to pickle them; bytes are passed as they are.
+    format_name, _, level = resolve_format(format_name, level)
+    return get_encode_pool().submit(encode_to_file, "RGB", size, bytes(pixels), path, format_name, level, raw_mode)
+
+def shutdown():
+    global encode_pool
+    with encode_pool_lock:
+        if encode_pool is not None:
+            encode_pool.shutdown(wait=True)
+            encode_pool = None
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# src/utils/output_viewer.py
+
+import tkinter as tk
+from utils.ui_thread import ui_root
+from utils.child_output import get_output_reader
+
+TAIL_LINES = 200
+REFRESH_MS = 1000
+
+def show_child_output(names=("camera", "recorder")):
+    reader = get_output_reader()
+    root = tk.Toplevel(ui_root())
+    root.title("Process Output")
+    root.geometry("700x400")
+
+    root.bind('<KeyPress-q>', lambda event: root.destroy())
+    root.bind('<KeyPress-Escape>', lambda event: root.destroy())
+
+    selected = tk.StringVar(value=names[0])
+    selector_frame = tk.Frame(root)
+    selector_frame.pack(fill=tk.X, padx=5, pady=5)
+    for name in names:
+        tk.Radiobutton(selector_frame, text=name.capitalize(), variable=selected, value=name,
+                       command=lambda: refresh(force=True)).pack(side=tk.LEFT)
+
+    text_frame = tk.Frame(root)
+    text_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    scrollbar = tk.Scrollbar(text_frame)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    text = tk.Text(text_frame, wrap=tk.NONE, yscrollcommand=scrollbar.set, state=tk.DISABLED)
+    text.pack(fill=tk.BOTH, expand=True)
+    scrollbar.config(command=text.yview)
+
+    shown = []
+
+    def refresh(force=False):
+        if not root.winfo_exists():
+            return
+        lines = reader.tail(selected.get(), TAIL_LINES)
+        if force or lines != shown:
+            # Only follow the end if the user has not scrolled up
+            at_end = force or text.yview()[1] >= 1.0
+            text.config(state=tk.NORMAL)
+            text.delete("1.0", tk.END)
+            text.insert(tk.END, "\n".join(lines) if lines else "(no output yet)")
+            text.config(state=tk.DISABLED)
+            if at_end:
+                text.see(tk.END)
+            shown[:] = lines
+        root.after(REFRESH_MS, refresh)
+
+    refresh(force=True)
+    return root
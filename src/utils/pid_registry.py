@@ -0,0 +1,110 @@
+# src/utils/pid_registry.py
+
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+
+RUNTIME_DIR = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "systray")
+PIDFILE = os.path.join(RUNTIME_DIR, "pids.json")
+
+class PidRegistry:
+    # Every process the tray owns, by name: kept in memory for O(1) lookups and
+    # mirrored to a pidfile so outside tools can see them too. The wrapper script
+    # passes its own PID in SYSTRAY_WRAPPER_PID. Nothing is written until the tray
+    # calls publish(), so importing this module (e.g. in a multiprocessing worker
+    # that re-imports main.py) never touches the pidfile.
+    def __init__(self, path=PIDFILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pids = {}
+        self.published = False
+
+    def publish(self):
+        # Claims the pidfile for the calling process, the tray itself
+        with self.lock:
+            self.pids["systray"] = os.getpid()
+            wrapper_pid = os.environ.get("SYSTRAY_WRAPPER_PID", "")
+            if wrapper_pid.isdigit():
+                self.pids["wrapper"] = int(wrapper_pid)
+            self.published = True
+            self._save()
+
+    def _save(self):
+        if not self.published:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.pids, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Could not write pidfile {self.path}: {e}")
+
+    def register(self, name, pid):
+        with self.lock:
+            self.pids[name] = int(pid)
+            self._save()
+
+    def unregister(self, name, pid=None):
+        with self.lock:
+            if name in self.pids and (pid is None or self.pids[name] == int(pid)):
+                del self.pids[name]
+                self._save()
+
+    def get(self, name):
+        with self.lock:
+            return self.pids.get(name)
+
+    def children(self):
+        # Everything we started, i.e. all entries but ourselves and the wrapper
+        with self.lock:
+            return {name: pid for name, pid in self.pids.items() if name not in ("systray", "wrapper")}
+
+    def remove_pidfile(self):
+        self.published = False
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+def is_running(pid):
+    try:
+        # Reap it first if it is our own exited child, otherwise the zombie looks alive
+        if os.waitpid(pid, os.WNOHANG)[0] == pid:
+            return False
+    except ChildProcessError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def signal_process(pid, sig):
+    # Children started in their own session are signalled as a whole group
+    try:
+        if os.getpgid(pid) == pid:
+            os.killpg(pid, sig)
+        else:
+            os.kill(pid, sig)
+        return True
+    except ProcessLookupError:
+        return False
+
+def terminate_process(pid, timeout=3):
+    if not signal_process(pid, signal.SIGTERM):
+        return
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not is_running(pid):
+            return
+        time.sleep(0.05)
+    signal_process(pid, signal.SIGKILL)  # Force kill if still running
+
+pid_registry = PidRegistry()
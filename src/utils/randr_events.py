@@ -0,0 +1,102 @@
+# src/utils/randr_events.py
+
+import os
+import select
+import threading
+import queue
+import tkinter as tk
+
+try:
+    from Xlib import display as xdisplay
+    from Xlib.ext import randr
+except ImportError:  # python-xlib missing, callers fall back to polling
+    xdisplay = None
+    randr = None
+
+RANDR_EVENT = "<<RandRChange>>"
+
+class RandRListener(threading.Thread):
+    # Watches RandR screen/output notifications on a private X connection and
+    # forwards them into the Tk loop of `widget` as a single virtual event per batch.
+    # Batches hold ("screen", None) for layout changes, ("connected"/"disconnected",
+    # output) when an output's connection state flips, and ("output", output) for
+    # any other output change (mode, CRTC, properties).
+    def __init__(self, widget, callback):
+        super().__init__(daemon=True, name="randr-listener")
+        self.widget = widget
+        self.callback = callback
+        self.events = queue.Queue()
+        self.display = xdisplay.Display()
+        if not self.display.has_extension('RANDR'):
+            self.display.close()
+            raise RuntimeError("X server does not support RANDR")
+        root = self.display.screen().root
+        root.xrandr_select_input(
+            randr.RRScreenChangeNotifyMask | randr.RROutputChangeNotifyMask
+        )
+        # Known connection state per output, so only real plug/unplug counts as one.
+        # The "current" resources do not make the server probe connectors.
+        resources = root.xrandr_get_screen_resources_current()
+        self.connections = {
+            output: self.display.xrandr_get_output_info(output, resources.config_timestamp).connection
+            for output in resources.outputs
+        }
+        self.display.flush()
+        self.stop_read, self.stop_write = os.pipe()
+        self.running = True
+        widget.bind(RANDR_EVENT, self._dispatch, add="+")
+
+    def run(self):
+        screen_change = self.display.extension_event.ScreenChangeNotify
+        output_change = self.display.extension_event.OutputChangeNotify
+        try:
+            while self.running:
+                readable, _, _ = select.select([self.display.fileno(), self.stop_read], [], [])
+                if self.stop_read in readable:
+                    break
+                batch = []
+                while self.display.pending_events():
+                    event = self.display.next_event()
+                    if event.type == screen_change:
+                        batch.append(("screen", None))
+                    elif (event.type, getattr(event, 'sub_code', None)) == tuple(output_change):
+                        if self.connections.get(event.output) == event.connection:
+                            batch.append(("output", event.output))
+                        else:
+                            self.connections[event.output] = event.connection
+                            state = "connected" if event.connection == randr.Connected else "disconnected"
+                            batch.append((state, event.output))
+                if batch:
+                    self.events.put(batch)
+                    self.widget.event_generate(RANDR_EVENT, when="tail")
+        except (tk.TclError, RuntimeError):
+            pass  # The window went away underneath us
+        finally:
+            self.display.close()
+            os.close(self.stop_read)
+            os.close(self.stop_write)
+
+    def _dispatch(self, event=None):
+        batch = []
+        while not self.events.empty():
+            batch.extend(self.events.get_nowait())
+        if batch:
+            self.callback(batch)
+
+    def stop(self):
+        if self.running:
+            self.running = False
+            os.write(self.stop_write, b"x")
+
+def start_randr_listener(widget, callback):
+    # Returns a running listener, or None when RandR notifications are unavailable
+    if xdisplay is None:
+        print("python-xlib is not installed, RandR events unavailable.")
+        return None
+    try:
+        listener = RandRListener(widget, callback)
+    except Exception as e:
+        print(f"Failed to start RandR listener: {e}")
+        return None
+    listener.start()
+    return listener
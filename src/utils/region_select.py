@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# src/utils/region_select.py
+
+import tkinter as tk
+from PIL import ImageTk
+from utils.ui_thread import ui_root
+
+CLICK_DISTANCE = 4  # A drag shorter than this is a click on a window
+
+def window_at(rectangles, x, y):
+    for left, top, width, height in rectangles:  # Topmost first
+        if left <= x < left + width and top <= y < top + height:
+            return left, top, width, height
+    return None
+
+def selection_box(start, end, windows, width, height):
+    # (left, top, right, bottom) picked by a press at start and a release at end: the
+    # window under a click, topmost first, or the dragged rectangle, clipped to the
+    # width x height frozen image (may come out empty). None for a click on no window.
+    start_x, start_y = start
+    end_x, end_y = end
+    if abs(end_x - start_x) < CLICK_DISTANCE and abs(end_y - start_y) < CLICK_DISTANCE:
+        window = window_at(windows, end_x, end_y)
+        if window is None:
+            return None
+        left, top, window_width, window_height = window
+        box = (left, top, left + window_width, top + window_height)
+    else:
+        box = (min(start_x, end_x), min(start_y, end_y), max(start_x, end_x), max(start_y, end_y))
+    # Windows can hang off screen
+    return max(0, box[0]), max(0, box[1]), min(width, box[2]), min(height, box[3])
+
+def select_region(screen, parent=None):
+    # Freezes the screen, lets the user drag a rectangle or click a window on the
+    # frozen image, and returns that part of it (None if cancelled). The crop comes
+    # from the one capture; nothing is grabbed again. Must run on the UI thread.
+    if parent is not None:
+        parent.withdraw()  # Keep the tool itself out of the picture
+        parent.update()
+    frozen = screen.grab()
+    windows = screen.window_rectangles()
+    width, height = frozen.size
+
+    overlay = tk.Toplevel(parent or ui_root())
+    overlay.overrideredirect(True)
+    overlay.geometry(f"{width}x{height}+0+0")
+    canvas = tk.Canvas(overlay, width=width, height=height, highlightthickness=0, cursor="crosshair")
+    canvas.pack()
+    photo = ImageTk.PhotoImage(frozen)
+    canvas.create_image(0, 0, image=photo, anchor=tk.NW)
+    outline = canvas.create_rectangle(0, 0, 0, 0, outline="#ff3030", width=2, state=tk.HIDDEN)
+
+    state = {"start": None, "box": None}
+
+    def show(box):
+        left, top, right, bottom = box
+        canvas.coords(outline, left, top, right, bottom)
+        canvas.itemconfig(outline, state=tk.NORMAL)
+
+    def on_motion(event):
+        if state["start"] is None:
+            # Hovering: outline the window a click would pick
+            window = window_at(windows, event.x, event.y)
+            if window:
+                left, top, window_width, window_height = window
+                show((left, top, left + window_width, top + window_height))
+            else:
+                canvas.itemconfig(outline, state=tk.HIDDEN)
+        else:
+            show(state["start"] + (event.x, event.y))
+
+    def on_press(event):
+        state["start"] = (event.x, event.y)
+
+    def on_release(event):
+        box = selection_box(state["start"] or (event.x, event.y), (event.x, event.y), windows, width, height)
+        if box is None:
+            state["start"] = None
+            return
+        state["box"] = box
+        overlay.destroy()
+
+    canvas.bind("<Motion>", on_motion)
+    canvas.bind("<B1-Motion>", on_motion)
+    canvas.bind("<ButtonPress-1>", on_press)
+    canvas.bind("<ButtonRelease-1>", on_release)
+    overlay.bind("<Escape>", lambda event: overlay.destroy())
+    overlay.bind("<ButtonPress-3>", lambda event: overlay.destroy())
+
+    overlay.wait_visibility()  # A grab needs a viewable window
+    overlay.lift()
+    overlay.focus_force()
+    try:
+        overlay.grab_set_global()  # All pointer and key input goes to the overlay
+    except tk.TclError:
+        overlay.grab_set()
+    overlay.wait_window()
+
+    box = state["box"]
+    if box is None or box[2] <= box[0] or box[3] <= box[1]:
+        return None
+    return frozen.crop(box)
@@ -0,0 +1,73 @@
+# src/utils/scheduler.py
+
+import heapq
+import itertools
+import threading
+import time
+
+scheduler = None  # Shared scheduler, started on first use
+scheduler_lock = threading.Lock()
+
+class Scheduler(threading.Thread):
+    # One long-lived thread running every periodic and delayed job of the tray
+    def __init__(self):
+        super().__init__(daemon=True, name="scheduler")
+        self.condition = threading.Condition()
+        self.jobs = []  # heap of (due, job id, interval, fn, args)
+        self.cancelled = set()
+        self.counter = itertools.count()
+        self.running = True
+
+    def _add(self, delay, interval, fn, args):
+        with self.condition:
+            job_id = next(self.counter)
+            heapq.heappush(self.jobs, (time.monotonic() + delay, job_id, interval, fn, args))
+            self.condition.notify()
+            return job_id
+
+    def call_later(self, delay, fn, *args):
+        return self._add(delay, None, fn, args)
+
+    def every(self, interval, fn, *args, run_now=True):
+        return self._add(0 if run_now else interval, interval, fn, args)
+
+    def cancel(self, job_id):
+        with self.condition:
+            self.cancelled.add(job_id)
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running:
+                    if self.jobs and self.jobs[0][1] in self.cancelled:
+                        self.cancelled.discard(heapq.heappop(self.jobs)[1])
+                        continue
+                    timeout = self.jobs[0][0] - time.monotonic() if self.jobs else None
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self.condition.wait(timeout)
+                if not self.running:
+                    return
+                due, job_id, interval, fn, args = heapq.heappop(self.jobs)
+                if interval is not None:
+                    # Keep the original cadence instead of drifting by the job's run time
+                    next_due = max(due + interval, time.monotonic())
+                    heapq.heappush(self.jobs, (next_due, job_id, interval, fn, args))
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Scheduled job {getattr(fn, '__name__', fn)} failed: {e}")
+
+def get_scheduler():
+    global scheduler
+    with scheduler_lock:
+        if scheduler is None:
+            scheduler = Scheduler()
+            scheduler.start()
+        return scheduler
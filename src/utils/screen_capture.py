@@ -0,0 +1,99 @@
+# src/utils/screen_capture.py
+
+import threading
+
+try:
+    from Xlib import X, display as xdisplay
+except ImportError:  # python-xlib missing, screenshots are unavailable
+    X = None
+    xdisplay = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+screen_capture = None  # Shared capture connection, opened on first use
+screen_capture_lock = threading.Lock()
+
+class ScreenCapture:
+    # Grabs screen rectangles straight into PIL images over a private X connection,
+    # with no helper process and no file in between. python-xlib has no MIT-SHM
+    # binding, so pixels come over the socket via GetImage; only the requested
+    # rectangle is transferred.
+    def __init__(self, display_name=None):
+        self.display = xdisplay.Display(display_name)
+        self.root = self.display.screen().root
+        self.lock = threading.Lock()
+        # ZPixmap at depth 24 is 32 bits per pixel; byte order decides where blue sits
+        self.raw_mode = "BGRX" if self.display.info.image_byte_order == X.LSBFirst else "XRGB"
+
+    def screen_size(self):
+        # Asked from the server: the connection's setup data goes stale after a RandR change
+        with self.lock:
+            geometry = self.root.get_geometry()
+        return geometry.width, geometry.height
+
+    def pointer(self):
+        with self.lock:
+            position = self.root.query_pointer()
+        return position.root_x, position.root_y
+
+    def clip(self, x=0, y=0, width=None, height=None):
+        # Clipped to the screen; the whole screen if no size is given
+        screen_width, screen_height = self.screen_size()
+        width = screen_width - x if width is None else width
+        height = screen_height - y if height is None else height
+        x, y = max(0, x), max(0, y)
+        width, height = min(width, screen_width - x), min(height, screen_height - y)
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Capture rectangle {width}x{height}+{x}+{y} is off screen")
+        return x, y, width, height
+
+    def grab_raw(self, x, y, width, height):
+        # 32-bit pixels in raw_mode order, straight from the server; the rectangle must be on screen
+        with self.lock:
+            return self.root.get_image(x, y, width, height, X.ZPixmap, 0xFFFFFFFF).data
+
+    def to_image(self, data, size):
+        return Image.frombuffer("RGB", size, data, "raw", self.raw_mode, 0, 1)
+
+    def grab(self, x=0, y=0, width=None, height=None):
+        x, y, width, height = self.clip(x, y, width, height)
+        return self.to_image(self.grab_raw(x, y, width, height), (width, height))
+
+    def window_rectangles(self):
+        # (x, y, width, height) of the visible top-level windows, topmost first
+        rectangles = []
+        with self.lock:
+            for window in reversed(self.root.query_tree().children):  # Stacking order, bottom first
+                try:
+                    if window.get_attributes().map_state != X.IsViewable:
+                        continue
+                    geometry = window.get_geometry()
+                except Exception:
+                    continue  # Gone in the meantime
+                border = geometry.border_width
+                rectangles.append((geometry.x, geometry.y, geometry.width + 2 * border, geometry.height + 2 * border))
+        return rectangles
+
+    def close(self):
+        with self.lock:
+            self.display.close()
+
+def is_available():
+    return xdisplay is not None and Image is not None
+
+def get_screen_capture():
+    # Returns the shared capture connection, or None without python-xlib, Pillow or X
+    global screen_capture
+    with screen_capture_lock:
+        if screen_capture is None:
+            if not is_available():
+                return None
+            try:
+                screen_capture = ScreenCapture()
+            except Exception as e:
+                print(f"Cannot open X display for screenshots: {e}")
+                return None
+        return screen_capture
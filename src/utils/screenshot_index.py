@@ -0,0 +1,129 @@
+# src/utils/screenshot_index.py
+
+import fcntl
+import json
+import os
+import threading
+from datetime import datetime
+
+SCREENSHOT_DIR = os.environ.get("SYSTRAY_SCREENSHOT_DIR") or os.path.join(os.path.expanduser("~"), "Pictures", "screenshots")
+INDEX_NAME = ".index.json"
+LOCK_NAME = ".index.lock"
+RECENT_COUNT = 10
+
+screenshot_index = None  # Shared index of the screenshot directory, created on first use
+screenshot_index_lock = threading.Lock()
+
+class ScreenshotIndex:
+    # A small persisted counter and manifest next to the screenshots. Names come
+    # from the day's counter instead of probing Screenshot-<date>-1.png, -2.png, ...
+    # and every file is created with O_EXCL, so concurrent captures (in this process
+    # or another one) can never pick the same name.
+    def __init__(self, directory=SCREENSHOT_DIR, recent_count=RECENT_COUNT):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self.lock_path = os.path.join(directory, LOCK_NAME)
+        self.recent_count = recent_count
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _load(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if isinstance(index, dict):
+                return index
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save(self, index):
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(temp_path, self.index_path)
+
+    def _locked(self, update):
+        # Read-modify-write of the index under a thread lock and an flock across processes
+        with self.lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            index = self._load()
+            result = update(index)
+            self._save(index)
+            return result
+
+    def _create(self, file_name):
+        # Reserves the name by creating the (empty) file; fails if it is taken
+        path = os.path.join(self.directory, file_name)
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+        return path
+
+    def _create_set(self, file_names):
+        # All or nothing: if one name is taken, the files already created are released
+        paths = []
+        try:
+            for file_name in file_names:
+                paths.append(self._create(file_name))
+        except FileExistsError:
+            for path in paths:
+                os.remove(path)
+            return None
+        return paths
+
+    def allocate(self, name=None, extension="png", suffix=""):
+        # Returns the path of a newly created, empty file for the next screenshot.
+        # A suffix (e.g. the monitor) goes after the name or the number.
+        return self.allocate_set([suffix], name, extension)[0]
+
+    def allocate_set(self, suffixes, name=None, extension="png"):
+        # Like allocate, for several files of one capture (one per monitor or burst
+        # frame): they share one name or one number of the day and differ by suffix
+        suffixes = [f"-{suffix}" if suffix else "" for suffix in suffixes]
+        if name:
+            # A chosen name gets a numbered variant only if it is already taken
+            counter = 1
+            while True:
+                variant = "" if counter == 1 else f"-{counter}"
+                paths = self._create_set([f"{name}{suffix}{variant}.{extension}" for suffix in suffixes])
+                if paths is not None:
+                    return paths
+                counter += 1
+
+        def next_names(index):
+            today = datetime.now().strftime("%Y-%m-%d")
+            counter = index.get("counters", {}).get(today, 0)
+            while True:
+                counter += 1
+                paths = self._create_set([f"Screenshot-{today}-{counter}{suffix}.{extension}" for suffix in suffixes])
+                if paths is not None:
+                    break  # Otherwise only taken by files made outside the index
+            index["counters"] = {today: counter}  # Earlier days are never needed again
+            return paths
+
+        return self._locked(next_names)
+
+    def discard(self, path):
+        # Gives back a reserved name whose screenshot was never written
+        try:
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+        except OSError:
+            pass
+
+    def record(self, path):
+        # Called once the screenshot has been written
+        def add(index):
+            recent = [entry for entry in index.get("recent", []) if entry != path]
+            index["recent"] = ([path] + recent)[:self.recent_count]
+        self._locked(add)
+
+    def recent(self):
+        # Newest first, skipping files deleted since
+        return [path for path in self._load().get("recent", []) if os.path.exists(path)]
+
+def get_screenshot_index():
+    global screenshot_index
+    with screenshot_index_lock:
+        if screenshot_index is None:
+            screenshot_index = ScreenshotIndex()
+        return screenshot_index
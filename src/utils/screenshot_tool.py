@@ -1,67 +1,247 @@
 # utils/screenshot_tool.py
 
-import os
 import tkinter as tk
-from tkinter import simpledialog
-import subprocess
+from tkinter import simpledialog, messagebox
 from datetime import datetime
+from concurrent.futures import wait
+from utils.ui_thread import ui_root, open_window, run_standalone
+from utils.screen_capture import get_screen_capture
+from utils.screenshot_index import get_screenshot_index
+from utils.xrandr_tool import get_connected_outputs, get_main_display, invalidate_display_state
+from utils import image_encoder
+from utils.dispatcher import dispatcher
+from utils.tray_state import tray_state
+from utils.frame_ring import FrameCapture
+from utils.clipboard_server import get_clipboard_server
+from utils.region_select import select_region
 
-# Function to check if scrot is installed
-def check_scrot_installed():
-    result = subprocess.run(["which", "scrot"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    return result.returncode == 0
-
-# Function to capture screenshots using scrot
-def take_screenshot(option):
-    home_dir = os.path.expanduser("~")
-    screenshot_dir = os.path.join(home_dir, "Pictures", "screenshots")
-    os.makedirs(screenshot_dir, exist_ok=True)
-    
-    # Create a temporary screenshot file
-    temp_file_path = os.path.join(screenshot_dir, "temp_screenshot.png")
-
-    # Execute the scrot command based on the user's choice
+# Burst frames handed to the encode pool before waiting for earlier ones
+ENCODE_AHEAD = 2 * image_encoder.MAX_WORKERS
+
+def get_monitors(screen_size):
+    # {output: (x, y, width, height)} from xrandr_tool's cached display state. If the
+    # monitors do not span exactly the current screen, the cache predates a layout
+    # change and is re-read once.
+    for _ in range(2):
+        monitors = {}
+        for output in get_connected_outputs():
+            if output["geometry"]:
+                width, height, x, y = output["geometry"]
+                monitors[output["name"]] = (x, y, width, height)
+        extent = (max((x + width for x, y, width, height in monitors.values()), default=0),
+                  max((y + height for x, y, width, height in monitors.values()), default=0))
+        if extent == tuple(screen_size):
+            return monitors
+        invalidate_display_state()
+    return monitors
+
+def monitor_at(monitors, point):
+    for name, (x, y, width, height) in monitors.items():
+        if x <= point[0] < x + width and y <= point[1] < y + height:
+            return name
+    return None
+
+def capture_rectangles(screen, option):
+    # Returns a list of ((x, y, width, height), suffix) to read for a monitor mode
+    full_screen = [((0, 0) + tuple(screen.screen_size()), "")]
     if option == "Full Screen":
-        subprocess.run(["scrot", temp_file_path])
-    elif option == "Select Window":
-        subprocess.run(["scrot", "-s", temp_file_path])
+        return full_screen
+    monitors = get_monitors(screen.screen_size())
+    if option == "Current Monitor":
+        names = [monitor_at(monitors, screen.pointer())]
+    elif option == "Primary Monitor":
+        names = [get_main_display()]
+    elif option == "Each Monitor":
+        names = sorted(monitors, key=lambda name: monitors[name][:2])
+    else:
+        return []
+    names = [name for name in names if name in monitors]
+    if not names:
+        print(f"No monitor found for {option}, capturing the full screen")
+        return full_screen
+    # A single monitor needs no suffix; with several, each file is named after its output
+    return [(monitors[name], name if len(names) > 1 else "") for name in names]
+
+def capture(option, parent=None):
+    # Returns a list of (image, suffix) captured in memory; only the rectangles
+    # needed are read from the X server. Empty if nothing was captured.
+    screen = get_screen_capture()
+    if option == "Select Window":
+        image = select_region(screen, parent)  # Must be called on the UI thread
+        return [(image, "")] if image is not None else []
+    return [(screen.grab(*rectangle), suffix) for rectangle, suffix in capture_rectangles(screen, option)]
+
+def save_screenshot(image, file_path, format_name):
+    # Runs on a dispatcher worker, after the name is known and the file reserved. The
+    # encode itself happens in the pool, which replaces the reserved file when done.
+    try:
+        image_encoder.submit_encode(image, file_path, format_name).result()
+    except BaseException:
+        get_screenshot_index().discard(file_path)  # No empty file left behind
+        raise
+    get_screenshot_index().record(file_path)
+    tray_state.set("last_screenshot", file_path)  # Refreshes the recent screenshots menu
+    print(f"Screenshot saved to {file_path}")
+
+def copy_to_clipboard(image):
+    # Served from the tray process; the PNG is only encoded when something pastes it
+    server = get_clipboard_server()
+    if server is None:
+        print("Clipboard is not available.")
+        return False
+    server.offer(image)
+    print("Screenshot copied to the clipboard")
+    return True
+
+def screenshot_to_clipboard(option="Current Monitor"):
+    # Tray shortcut: no window, no name dialog, no file
+    images = capture(option)
+    if images:
+        copy_to_clipboard(images[0][0])
+
+# Capture into memory, then encode on a worker once the user has chosen a name
+def take_screenshot(option, parent=None, to_clipboard=False):
+    images = capture(option, parent)
+    if not images:
+        return
+
+    if to_clipboard:
+        if len(images) > 1:
+            print("The clipboard holds one image; copying the first monitor only")
+        copy_to_clipboard(images[0][0])
+        return
 
     # Prompt the user for a name after the screenshot is taken
-    root = tk.Tk()
-    root.withdraw()  # Hide the root window
-    name = simpledialog.askstring("Input", "Enter a name for the screenshot:", parent=root)
-    
-    # Generate the final filename
-    if not name:
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        counter = 1
-        while True:
-            file_path = os.path.join(screenshot_dir, f"Screenshot-{current_date}-{counter}.png")
-            if not os.path.exists(file_path):
-                break
-            counter += 1
-    else:
-        file_path = os.path.join(screenshot_dir, f"{name}.png")
+    name = simpledialog.askstring("Input", "Enter a name for the screenshot:", parent=parent or ui_root())
+
+    # Reserve the final filenames: the day's next number, or the chosen name, shared
+    # by all monitors of this capture
+    format_name, extension, _ = image_encoder.resolve_format()
+    file_paths = get_screenshot_index().allocate_set([suffix for image, suffix in images], name, extension)
+    for (image, suffix), file_path in zip(images, file_paths):
+        dispatcher.submit("screenshot", save_screenshot, image, file_path, format_name)
+
+def save_frames(size, raw_mode, frames):
+    # Runs on a dispatcher worker: one numbered file per frame, encoded in the pool
+    if not frames:
+        print("No frames to save")
+        return
+    format_name, extension, _ = image_encoder.resolve_format()
+    base_name = datetime.fromtimestamp(frames[0][0]).strftime("Burst-%Y-%m-%d-%H%M%S")
+    index = get_screenshot_index()
+    file_paths = index.allocate_set([f"{number:04d}" for number in range(1, len(frames) + 1)], base_name, extension)
+    futures = []
+    try:
+        for (timestamp, pixels), file_path in zip(frames, file_paths):
+            if len(futures) >= ENCODE_AHEAD:
+                futures[-ENCODE_AHEAD].result()  # Only a few frame copies wait for the pool at a time
+            futures.append(image_encoder.submit_encode_raw(pixels, size, raw_mode, file_path, format_name))
+        paths = [future.result() for future in futures]
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        wait(futures)  # Frames already being encoded finish first
+        for file_path in file_paths:
+            index.discard(file_path)  # Frames still empty were never written
+        raise
+    get_screenshot_index().record(paths[0])
+    tray_state.set("last_screenshot", paths[0])
+    print(f"Saved {len(paths)} frames as {base_name}-*.{extension}")
+
+def show_burst_capture():
+    # Burst: grab every N ms for M seconds, then save every frame.
+    # Replay: grab continuously and save the last N seconds whenever asked.
+    root = tk.Toplevel(ui_root())
+    root.title("Burst Capture")
+    root.geometry("320x260")
+    root.resizable(False, False)
+    root.bind('<KeyPress-Escape>', lambda event: root.destroy())
+
+    area_var = tk.StringVar(value="Current Monitor")
+    interval_var = tk.StringVar(value="200")
+    duration_var = tk.StringVar(value="5")
+    window_var = tk.StringVar(value="10")
+    status_var = tk.StringVar(value="Idle")
+    running = {"capture": None}
+
+    form = tk.Frame(root)
+    form.pack(pady=5)
+    tk.Label(form, text="Area").grid(row=0, column=0, sticky="w")
+    tk.OptionMenu(form, area_var, "Full Screen", "Current Monitor", "Primary Monitor").grid(row=0, column=1, sticky="we")
+    for row, (label, variable) in enumerate((("Interval (ms)", interval_var), ("Burst length (s)", duration_var),
+                                             ("Replay keeps (s)", window_var)), 1):
+        tk.Label(form, text=label).grid(row=row, column=0, sticky="w")
+        tk.Entry(form, textvariable=variable, width=8).grid(row=row, column=1, sticky="w")
+    tk.Label(root, textvariable=status_var).pack(pady=5)
+
+    def read_number(variable, default):
+        try:
+            return max(0.001, float(variable.get()))
+        except ValueError:
+            return default
+
+    def start(burst):
+        if running["capture"] is not None:
+            return
+        screen = get_screen_capture()
+        rectangle, _ = capture_rectangles(screen, area_var.get())[0]
+        interval = read_number(interval_var, 200) / 1000
+        duration = read_number(duration_var, 5) if burst else None
+        window = duration if burst else read_number(window_var, 10)
+
+        def on_done(capture):
+            # On the capture thread: a finished burst is saved whole
+            if burst and capture.frames:
+                dispatcher.submit("screenshot", save_frames, *capture.flush())
+            running["capture"] = None
 
-    # Rename the temporary screenshot file to the final file path
-    os.rename(temp_file_path, file_path)
+        capture = FrameCapture(screen, rectangle, interval, window, duration, on_done)
+        running["capture"] = capture
+        capture.start()
 
-    root.destroy()
+    def save_last():
+        capture = running["capture"]
+        if capture is not None:
+            dispatcher.submit("screenshot", save_frames, *capture.flush(read_number(window_var, 10)))
+
+    def stop():
+        capture = running["capture"]
+        if capture is not None:
+            capture.stop()
+
+    def update_status():
+        if not root.winfo_exists():
+            return
+        capture = running["capture"]
+        if capture is None:
+            status_var.set("Idle")
+        else:
+            ring = capture.ring
+            status_var.set(f"{capture.frames} frames, {ring.count}/{ring.capacity} kept "
+                           f"({ring.memory() // 2**20} MiB), {capture.missed} missed")
+        root.after(250, update_status)
+
+    buttons = tk.Frame(root)
+    buttons.pack(pady=5)
+    tk.Button(buttons, text="Start Burst", command=lambda: start(True)).grid(row=0, column=0, padx=3, pady=3)
+    tk.Button(buttons, text="Start Replay", command=lambda: start(False)).grid(row=0, column=1, padx=3, pady=3)
+    tk.Button(buttons, text="Save Last", command=save_last).grid(row=1, column=0, padx=3, pady=3)
+    tk.Button(buttons, text="Stop", command=stop).grid(row=1, column=1, padx=3, pady=3)
+
+    root.bind("<Destroy>", lambda event: stop() if event.widget is root else None)
+    update_status()
+    return root
 
 # Function to display the screenshot tool window
 def display_screenshot_tool():
-    # Check if scrot is installed
-    if not check_scrot_installed():
-        root = tk.Tk()
-        root.withdraw()  # Hide the root window
-        messagebox.showerror("Error", "scrot is not installed.")
-        root.destroy()
-        return
+    if get_screen_capture() is None:
+        messagebox.showerror("Error", "Cannot capture the screen (python-xlib, Pillow or the X display is missing).", parent=ui_root())
+        return None
 
     # Create the main window
-    root = tk.Tk()
+    root = tk.Toplevel(ui_root())
     root.title("Screenshot Tool")
-    root.geometry("300x100")
+    root.geometry("300x350")
     root.resizable(False, False)
 
     # Close the window on 'q' or 'Esc' key press
@@ -71,15 +251,19 @@ def display_screenshot_tool():
 
     root.bind("<Key>", on_key_press)
 
+    clipboard_var = tk.BooleanVar(value=False)
+
     # Buttons for screenshot options
-    tk.Button(root, text="Full Screen", command=lambda: (take_screenshot("Full Screen"), root.destroy())).pack(pady=10)
-    tk.Button(root, text="Select Window", command=lambda: (take_screenshot("Select Window"), root.destroy())).pack(pady=10)
-    tk.Button(root, text="Cancel", command=root.destroy).pack(pady=10)
+    for option in ("Full Screen", "Current Monitor", "Primary Monitor", "Each Monitor"):
+        tk.Button(root, text=option, command=lambda option=option: (take_screenshot(option, root, clipboard_var.get()), root.destroy())).pack(pady=5)
+    # Drag a rectangle or click a window on a frozen copy of the screen
+    tk.Button(root, text="Select Window", command=lambda: (take_screenshot("Select Window", root, clipboard_var.get()), root.destroy())).pack(pady=5)
+    tk.Checkbutton(root, text="Copy to clipboard instead of saving", variable=clipboard_var).pack()
+    tk.Button(root, text="Burst / Replay...", command=lambda: open_window("burst_capture", show_burst_capture)).pack(pady=5)
+    tk.Button(root, text="Cancel", command=root.destroy).pack(pady=5)
 
-    # Run the Tkinter event loop
-    root.mainloop()
+    return root
 
 # If this script is executed, display the screenshot tool
 if __name__ == "__main__":
-    display_screenshot_tool()
-
+    run_standalone(display_screenshot_tool)
@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 # src/utils/shutdown_timer.py
 
+import math
+import time
 import tkinter as tk
 import subprocess
+from utils.dispatcher import cancel_requested
+from utils.ui_thread import ui_root, call_in_ui, run_in_ui
+
+POLL_SECONDS = 0.1  # How quickly a cancel is noticed
 
 shutdown_canceled = False
 
@@ -11,38 +17,58 @@ def shutdown_system():
     if not shutdown_canceled:
         subprocess.run(['sudo', 'poweroff'])
 
-def start_shutdown_timer(seconds):
+def cancel_shutdown():
     global shutdown_canceled
-    shutdown_canceled = False
+    shutdown_canceled = True
 
-    def countdown(remaining):
-        if shutdown_canceled:
-            root.quit()
-            return
-        if remaining > 0:
-            time_label.config(text=f"Shutting down in {remaining} seconds...")
-            root.after(1000, countdown, remaining - 1)
-        else:
-            root.quit()
-            shutdown_system()
-
-    def cancel_shutdown():
-        global shutdown_canceled
-        shutdown_canceled = True
-        root.quit()
-
-    root = tk.Tk()
+def build_timer_window(seconds):
+    # Runs on the UI thread; the countdown itself is driven by the worker
+    root = tk.Toplevel(ui_root())
     root.title("Shutdown Timer")
     root.geometry("300x100")
 
+    def on_cancel():
+        cancel_shutdown()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_cancel)
+
     time_label = tk.Label(root, text=f"Shutting down in {seconds} seconds...")
     time_label.pack(pady=10)
-    
-    cancel_button = tk.Button(root, text="Cancel", command=cancel_shutdown)
+
+    cancel_button = tk.Button(root, text="Cancel", command=on_cancel)
     cancel_button.pack(pady=10)
 
-    # Start the countdown
-    root.after(1000, countdown, seconds)
+    return root, time_label
+
+def show_remaining(root, time_label, remaining):
+    if root.winfo_exists():
+        time_label.config(text=f"Shutting down in {remaining} seconds...")
+
+def close_window(root):
+    if root.winfo_exists():
+        root.destroy()
+
+def start_shutdown_timer(seconds):
+    # Blocks the dispatcher worker for the whole countdown, so dispatcher.cancel_all()
+    # at quit stops it as well as the Cancel button does. Returns True if it powered off.
+    global shutdown_canceled
+    shutdown_canceled = False
+    root, time_label = call_in_ui(build_timer_window, seconds)
+
+    deadline = time.monotonic() + seconds
+    remaining = seconds
+    while remaining > 0:
+        if shutdown_canceled or cancel_requested():
+            run_in_ui(close_window, root)
+            print("Shutdown timer canceled.")
+            return False
+        time.sleep(POLL_SECONDS)
+        left = max(0, math.ceil(deadline - time.monotonic()))
+        if left != remaining:
+            remaining = left
+            run_in_ui(show_remaining, root, time_label, remaining)
 
-    root.mainloop()
-    root.destroy()
+    run_in_ui(close_window, root)
+    shutdown_system()
+    return not shutdown_canceled
@@ -2,59 +2,97 @@
 
 import tkinter as tk
 from tkinter import simpledialog, messagebox, Label, ttk
-import pam
-import subprocess
-import time
-
-pam_auth = pam.pam()
-
-def is_fprintd_installed():
-    try:
-        result = subprocess.run(['fprintd-verify', '--help'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return result.returncode == 0
-    except Exception:
-        return False
-
-def has_enrolled_fingers(username):
-    try:
-        result = subprocess.run(['fprintd-list', username], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        return "no devices available" not in result.stdout.lower() and "Fingerprints for user" in result.stdout
-    except Exception:
-        return False
-
-def prompt_fingerprint():
-    prompt_window = tk.Tk()
-    prompt_window.title("Fingerprint Authentication")
-    prompt_label = Label(prompt_window, text="Please place your finger on the scanner.")
-    prompt_label.pack(pady=20, padx=20)
-
-    prompt_window.update()
+import os
+import pwd
+from utils.ui_thread import ui_root, call_in_ui, run_in_ui
+from utils.auth_session import auth_session
+from utils.fprintd_client import get_fprintd_client
+
+auth_capabilities = None  # Probed once, dropped when fprintd's enrollments or devices change
+change_listener_added = False
+
+def invalidate_auth_capabilities():
+    global auth_capabilities
+    auth_capabilities = None
+
+def get_auth_capabilities():
+    global auth_capabilities, change_listener_added
+    capabilities = auth_capabilities
+    if capabilities is None:
+        username = pwd.getpwuid(os.getuid()).pw_name
+        client = get_fprintd_client()
+        device = client.get_default_device() if client is not None else None
+        fingers = client.list_enrolled_fingers(username, device) if device else []
+        capabilities = {"username": username, "fprintd": device is not None, "fingerprint": bool(fingers)}
+        if client is not None and not change_listener_added:
+            client.add_change_listener(invalidate_auth_capabilities)
+            change_listener_added = True
+        auth_capabilities = capabilities
+    return capabilities
+
+def create_message_window(title, text, on_cancel=None):
+    window = tk.Toplevel(ui_root())
+    window.title(title)
+    label = Label(window, text=text)
+    label.pack(pady=20, padx=20)
+    if on_cancel:
+        tk.Button(window, text="Use Password", command=on_cancel).pack(pady=(0, 10))
+        window.protocol("WM_DELETE_WINDOW", on_cancel)
+    return window
+
+def show_transient_message(title, text, duration_ms):
+    window = create_message_window(title, text)
+    window.after(duration_ms, window.destroy)
+
+def create_progress_window(text):
+    progress_window = tk.Toplevel(ui_root())
+    progress_window.title("Validating Password")
+    progress_label = Label(progress_window, text=text)
+    progress_label.pack(pady=10)
+
+    # Runs for as long as PAM actually takes, on the UI thread's own timer
+    progress_bar = ttk.Progressbar(progress_window, orient="horizontal", length=200, mode='indeterminate')
+    progress_bar.pack(pady=10, padx=20)
+    progress_bar.start(15)
+    return progress_window
+
+def destroy_if_exists(window):
+    if window.winfo_exists():
+        window.destroy()
+
+# The prompts below run on a worker thread; every widget call is handed to the UI thread
+def prompt_fingerprint(username):
+    client = get_fprintd_client()
+    prompt_window = call_in_ui(create_message_window, "Fingerprint Authentication", "Please place your finger on the scanner.", client.cancel_verify)
 
     try:
-        result = subprocess.run(['fprintd-verify'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        prompt_window.destroy()
-
-        if result.returncode == 0:
-            success_window = tk.Tk()
-            success_window.title("Success")
-            success_label = Label(success_window, text="Fingerprint recognized successfully!")
-            success_label.pack(pady=20, padx=20)
-            success_window.update()
-            time.sleep(1)
-            success_window.destroy()
+        # Waits on fprintd's VerifyStatus signal, no fprintd-verify process
+        verified = client.verify(username)
+        call_in_ui(destroy_if_exists, prompt_window)
 
+        if verified:
+            run_in_ui(show_transient_message, "Success", "Fingerprint recognized successfully!", 1000)
             return True
         else:
             return False
     except Exception:
-        prompt_window.destroy()
+        call_in_ui(destroy_if_exists, prompt_window)
         return False
 
+def ask_password(action_name):
+    return simpledialog.askstring("Sudo Password", f"Enter your sudo password to {action_name}:", show='*', parent=ui_root())
+
 def prompt_sudo_password(action_name):
-    username = subprocess.getoutput("whoami")
+    if auth_session.is_fresh():
+        print(f"Recently authenticated, not prompting again to {action_name}.")
+        return True
 
-    if is_fprintd_installed() and has_enrolled_fingers(username):
-        if prompt_fingerprint():
+    capabilities = get_auth_capabilities()
+    username = capabilities["username"]
+
+    if capabilities["fingerprint"]:
+        if prompt_fingerprint(username):
+            auth_session.mark_authenticated()
             return True
         else:
             print("Fingerprint authentication failed or was canceled. Falling back to password prompt.")
@@ -62,50 +100,38 @@ def prompt_sudo_password(action_name):
     max_attempts = 3
     attempts = 0
 
-    root = tk.Tk()
-    root.withdraw()
-
     while attempts < max_attempts:
-        password = simpledialog.askstring("Sudo Password", f"Enter your sudo password to {action_name}:", show='*')
+        password = call_in_ui(ask_password, action_name)
 
         if password is None:
-            root.destroy()
             return False
 
-        progress_window = tk.Toplevel(root)
-        progress_window.title("Validating Password")
-        progress_label = Label(progress_window, text="Validating password, please wait...")
-        progress_label.pack(pady=10)
-
-        progress_bar = ttk.Progressbar(progress_window, orient="horizontal", length=200, mode='determinate')
-        progress_bar.pack(pady=10, padx=20)
-
-        root.update()
+        # The engine itself waits out any failed-attempt backoff before checking
+        backoff = auth_session.backoff_remaining()
+        text = f"Too many failed attempts, checking in {backoff:.0f} seconds..." if backoff else "Validating password, please wait..."
+        progress_window = call_in_ui(create_progress_window, text)
 
         try:
-            for i in range(15):
-                if progress_window.winfo_exists():
-                    progress_bar['value'] += 100 / 15
-                    root.update()
-                    time.sleep(1)
-                else:
-                    break
-
-            valid = pam_auth.authenticate(username, password)
+            # PAM runs here on the worker thread while the UI thread animates the progress bar
+            valid = auth_session.authenticate(username, password)
 
+            call_in_ui(destroy_if_exists, progress_window)
             if valid:
-                progress_window.destroy()
-                root.destroy()
                 return True
             else:
-                progress_window.destroy()
                 attempts += 1
                 if attempts < max_attempts:
-                    messagebox.showerror("Error", "Incorrect password. Please try again.")
-        except Exception:
-            if progress_window.winfo_exists():
-                progress_window.destroy()
+                    call_in_ui(messagebox.showerror, "Error", "Incorrect password. Please try again.")
+        except ImportError:
+            # python-pam is missing: no password can ever be checked, so stop asking
+            call_in_ui(destroy_if_exists, progress_window)
+            call_in_ui(messagebox.showerror, "Error", "Password authentication is unavailable (python-pam is not installed).")
+            return False
+        except Exception as e:
+            call_in_ui(destroy_if_exists, progress_window)
+            attempts += 1
+            if attempts < max_attempts:
+                call_in_ui(messagebox.showerror, "Error", f"Could not check the password: {e}")
 
-    messagebox.showinfo("Canceled", "Maximum password attempts reached. Action canceled.")
-    root.destroy()
+    call_in_ui(messagebox.showinfo, "Canceled", "Maximum password attempts reached. Action canceled.")
     return False
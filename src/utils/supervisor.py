@@ -0,0 +1,187 @@
+# src/utils/supervisor.py
+
+import os
+import select
+import signal
+import subprocess
+import threading
+from utils.pid_registry import pid_registry, signal_process
+
+STOP_TIMEOUT = 3  # Seconds between SIGTERM and SIGKILL
+KILL_TIMEOUT = 1
+POLL_INTERVAL = 1.0  # Only used for PIDs that can be watched neither by pidfd nor SIGCHLD
+
+class Child:
+    def __init__(self, name, pid, process=None, detached=False):
+        self.name = name
+        self.pid = pid
+        self.process = process  # Popen when we are the parent, None for adopted PIDs (conky's fork)
+        self.detached = detached  # Only reaped: not registered, not announced, not stopped at quit
+        self.pidfd = None
+        self.returncode = None
+        self.exited = threading.Event()
+
+class Supervisor:
+    # Watches every child the tray owns from one thread. Exits are noticed through a
+    # pidfd per child, or without pidfds (kernels before 5.3) through SIGCHLD on a
+    # self-pipe, so stopping a child returns the moment it is gone and the menu hears
+    # about children that die on their own.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.children = {}
+        self.listeners = []
+        self.use_pidfd = hasattr(os, "pidfd_open")
+        self.wake_read, self.wake_write = os.pipe()
+        os.set_blocking(self.wake_read, False)
+        os.set_blocking(self.wake_write, False)
+        self.thread = None
+        self.sigchld = False
+        if not self.use_pidfd:
+            try:
+                signal.signal(signal.SIGCHLD, lambda signum, frame: self._wake())
+                self.sigchld = True
+            except ValueError:
+                pass  # Not the main thread; fall back to polling
+
+    def _wake(self):
+        try:
+            os.write(self.wake_write, b"\0")
+        except BlockingIOError:
+            pass  # A wakeup is already pending
+
+    def add_listener(self, listener):
+        # listener(name, running) is called from the watcher or the starting thread
+        self.listeners.append(listener)
+
+    def _notify(self, name, running):
+        for listener in list(self.listeners):
+            try:
+                listener(name, running)
+            except Exception as e:
+                print(f"Supervisor listener failed: {e}")
+
+    def spawn(self, name, args, **popen_args):
+        process = subprocess.Popen(args, **popen_args)
+        self.watch(name, process.pid, process)
+        return process
+
+    def spawn_detached(self, args, **popen_args):
+        # Fire-and-forget helpers such as xdg-open: the watcher reaps them so they
+        # leave no zombie, but they may become the user's viewer, so quitting the
+        # tray leaves them running and they get their own session
+        process = subprocess.Popen(args, start_new_session=True, **popen_args)
+        self.watch(f"{os.path.basename(args[0])}-{process.pid}", process.pid, process, detached=True)
+        return process
+
+    def watch(self, name, pid, process=None, detached=False):
+        child = Child(name, int(pid), process, detached)
+        if self.use_pidfd:
+            try:
+                child.pidfd = os.pidfd_open(child.pid)
+            except ProcessLookupError:
+                return None  # Already gone
+        with self.lock:
+            self.children[name] = child
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True, name="supervisor")
+                self.thread.start()
+        self._wake()
+        if not detached:
+            pid_registry.register(name, child.pid)
+            self._notify(name, True)
+        return child
+
+    def get(self, name):
+        with self.lock:
+            return self.children.get(name)
+
+    def is_running(self, name):
+        return self.get(name) is not None
+
+    def _has_exited(self, child):
+        if child.process is not None:
+            return child.process.poll() is not None
+        try:
+            # Reaps it if it is our child after all; otherwise just probes the PID
+            if os.waitpid(child.pid, os.WNOHANG)[0] == child.pid:
+                return True
+        except ChildProcessError:
+            pass
+        try:
+            os.kill(child.pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def _reap(self, child):
+        if child.process is not None:
+            child.returncode = child.process.poll()
+        if child.pidfd is not None:
+            os.close(child.pidfd)
+        with self.lock:
+            if self.children.get(child.name) is child:
+                del self.children[child.name]
+        child.exited.set()
+        if child.detached:
+            return
+        pid_registry.unregister(child.name, child.pid)
+        print(f"{child.name} (PID {child.pid}) exited with status {child.returncode}")
+        self._notify(child.name, False)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                children = list(self.children.values())
+            poller = select.poll()
+            poller.register(self.wake_read, select.POLLIN)
+            by_fd = {}
+            for child in children:
+                if child.pidfd is not None:
+                    by_fd[child.pidfd] = child
+                    poller.register(child.pidfd, select.POLLIN)
+            # Without pidfds, adopted PIDs send us no SIGCHLD, so those are polled
+            polled = [child for child in children if child.pidfd is None and (child.process is None or not self.sigchld)]
+            timeout = POLL_INTERVAL * 1000 if polled else None
+            events = poller.poll(timeout)
+            if any(fd == self.wake_read for fd, _ in events):
+                try:
+                    while os.read(self.wake_read, 64):
+                        pass
+                except BlockingIOError:
+                    pass
+            if by_fd:
+                exited = [by_fd[fd] for fd, _ in events if fd in by_fd]
+            else:
+                exited = [child for child in children if self._has_exited(child)]
+            for child in exited:
+                self._reap(child)
+
+    def stop(self, name, timeout=STOP_TIMEOUT):
+        # SIGTERM, then SIGKILL if the child outlives the timeout. Returns as soon as
+        # it has actually exited, and True if that happened without SIGKILL.
+        child = self.get(name)
+        if child is None:
+            return True
+        if not signal_process(child.pid, signal.SIGTERM):
+            self._wake()
+            child.exited.wait(KILL_TIMEOUT)
+            return True
+        if child.exited.wait(timeout):
+            return True
+        print(f"{name} (PID {child.pid}) did not exit after SIGTERM, sending SIGKILL...")
+        signal_process(child.pid, signal.SIGKILL)
+        child.exited.wait(KILL_TIMEOUT)
+        return False
+
+    def stop_all(self, timeout=STOP_TIMEOUT):
+        with self.lock:
+            names = [name for name, child in self.children.items() if not child.detached]
+        threads = [threading.Thread(target=self.stop, args=(name, timeout)) for name in names]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+supervisor = Supervisor()
@@ -0,0 +1,38 @@
+# src/utils/tray_state.py
+
+import threading
+
+class StateStore:
+    # Small reactive store: listeners only hear about values that actually changed
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.listeners = []
+
+    def get(self, key, default=None):
+        with self.lock:
+            return self.values.get(key, default)
+
+    def update(self, **values):
+        with self.lock:
+            changed = {key: value for key, value in values.items() if self.values.get(key) != value}
+            self.values.update(changed)
+        if changed:
+            for listener in list(self.listeners):
+                try:
+                    listener(changed)
+                except Exception as e:
+                    print(f"State listener failed: {e}")
+        return bool(changed)
+
+    def set(self, key, value):
+        return self.update(**{key: value})
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+tray_state = StateStore()
@@ -0,0 +1,99 @@
+# src/utils/ui_thread.py
+
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import Future
+
+ui = None  # Shared UI thread, started on first use
+ui_lock = threading.Lock()
+
+class UIThread(threading.Thread):
+    # Owns the one Tcl interpreter and hidden Tk root of the tray. Every window is a
+    # Toplevel of that root, and other threads hand work to it through a queue.
+    def __init__(self):
+        super().__init__(daemon=True, name="ui")
+        self.calls = queue.Queue()
+        self.ready = threading.Event()
+        self.root = None
+        self.windows = {}  # key -> open Toplevel
+
+    def run(self):
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.root.bind("<<UICall>>", self._drain)
+        self.ready.set()
+        self.root.mainloop()
+
+    def _drain(self, event=None):
+        while True:
+            try:
+                fn, args, future = self.calls.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                print(f"UI call {getattr(fn, '__name__', fn)} failed: {e}")
+                future.set_exception(e)
+
+    def submit(self, fn, *args):
+        future = Future()
+        if threading.current_thread() is self:
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self.calls.put((fn, args, future))
+        self.root.event_generate("<<UICall>>", when="tail")
+        return future
+
+    def _open_window(self, key, builder, args):
+        window = self.windows.get(key)
+        if window is not None and window.winfo_exists():
+            # Only one window per key: bring the existing one forward
+            window.deiconify()
+            window.lift()
+            window.focus_force()
+            return window
+        window = builder(*args)
+        if window is not None:
+            self.windows[key] = window
+        return window
+
+    def open_window(self, key, builder, *args):
+        return self.submit(self._open_window, key, builder, args)
+
+def get_ui():
+    global ui
+    with ui_lock:
+        if ui is None:
+            ui = UIThread()
+            ui.start()
+    ui.ready.wait()
+    return ui
+
+def ui_root():
+    return get_ui().root
+
+def run_in_ui(fn, *args):
+    return get_ui().submit(fn, *args)
+
+def call_in_ui(fn, *args):
+    # Blocks the calling (non-UI) thread until fn has run on the UI thread
+    return run_in_ui(fn, *args).result()
+
+def open_window(key, builder, *args):
+    return get_ui().open_window(key, builder, *args)
+
+def run_standalone(builder, *args):
+    # For running a single tool directly from the command line
+    window = call_in_ui(builder, *args)
+    if window is not None:
+        closed = threading.Event()
+        run_in_ui(lambda: window.bind("<Destroy>", lambda event: closed.set() if event.widget is window else None))
+        closed.wait()
@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import messagebox
 import subprocess
 import re 
+from utils.randr_events import start_randr_listener
+from utils.ui_thread import ui_root
 
 # Global variables to track the initial and current states
 initial_orientation = None
@@ -10,6 +12,16 @@ initial_position = None
 connected_displays = []  # To track currently connected displays
 main_display = None
 
+# Parsed xrandr state shared by all queries, dropped whenever the generation moves
+display_state = None
+display_state_generation = -1
+display_generation = 0
+
+# Polling fallback without RandR notifications: read the current layout every
+# interval, and only every few polls pay for a connector probe to catch hotplug
+POLL_INTERVAL_MS = 2000
+PROBE_EVERY_POLLS = 5
+
 # Global variables to manage the countdown timer window
 current_timer_window = None
 current_countdown_label = None
@@ -24,63 +36,88 @@ def run_xrandr_command(commands):
     except subprocess.CalledProcessError as e:
         print(f"Failed to execute {' '.join(commands)}: {e}")
         return None
+    finally:
+        # Any change (even a failed one) may have altered the layout
+        invalidate_display_state()
+
+def invalidate_display_state():
+    global display_generation
+    display_generation += 1
+
+def parse_xrandr_state(xrandr_output):
+    state = {"primary": None, "outputs": {}}
+    current = None
+    for line in xrandr_output.splitlines():
+        if not line.strip() or line.startswith("Screen "):
+            continue
+        if not line[0].isspace():
+            # Output header, e.g. "eDP-1 connected primary 1920x1080+0+0 left (normal left ...) 344mm x 194mm"
+            parts = re.sub(r'\(.*?\)', '', line).split()
+            if len(parts) < 2 or parts[1] not in ("connected", "disconnected"):
+                current = None
+                continue
+            current = {
+                "name": parts[0],
+                "connected": parts[1] == "connected",
+                "primary": "primary" in parts[2:],
+                "geometry": None,  # (width, height, x, y) when the output is active
+                "rotation": "normal",
+                "current_mode": None,
+                "modes": [],
+            }
+            for part in parts[2:]:
+                geometry = re.match(r'^(\d+)x(\d+)\+(\d+)\+(\d+)$', part)
+                if geometry:
+                    current["geometry"] = tuple(map(int, geometry.groups()))
+                elif part in ("normal", "left", "inverted", "right"):
+                    current["rotation"] = part
+            state["outputs"][current["name"]] = current
+            if current["primary"] and current["connected"]:
+                state["primary"] = current["name"]
+        elif current is not None:
+            # Mode line, e.g. "   1920x1080     60.01*+  59.97"
+            res_parts = line.split()
+            if res_parts and res_parts[0].replace('x', '').isdigit():  # Ensure it's a valid resolution
+                current["modes"].append(res_parts[0])
+                if "*" in line and current["current_mode"] is None:
+                    current["current_mode"] = res_parts[0]
+    return state
+
+def query_display_state(probe=False):
+    # --current reads the server's current configuration without re-probing
+    # every connector (and its EDID); a real probe is reserved for hotplug/rescan
+    command = ['xrandr'] if probe else ['xrandr', '--current']
+    result = subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return parse_xrandr_state(result.stdout.decode().strip())
+
+def get_display_state(probe=False):
+    global display_state, display_state_generation
+    if probe or display_state is None or display_state_generation != display_generation:
+        try:
+            display_state = query_display_state(probe)
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Failed to query display state: {e}")
+            return {"primary": None, "outputs": {}}
+        display_state_generation = display_generation
+    return display_state
+
+def rescan_displays():
+    return get_display_state(probe=True)
+
+def get_connected_outputs():
+    return [output for output in get_display_state()["outputs"].values() if output["connected"]]
 
 def get_main_display():
-    try:
-        result = subprocess.run(['xrandr'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output = result.stdout.decode().strip()
-        lines = output.splitlines()
-        for line in lines:
-            if " connected primary" in line:
-                return line.split()[0]
-            elif " connected" in line and "primary" not in line:
-                return line.split()[0]  # Fallback if primary not found
-        return None
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to get main display: {e}")
-        return None
+    state = get_display_state()
+    if state["primary"]:
+        return state["primary"]
+    connected = get_connected_outputs()
+    return connected[0]["name"] if connected else None  # Fallback if primary not found
 
 def get_external_displays(main_display):
-    try:
-        result = subprocess.run(['xrandr'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output = result.stdout.decode().strip()
-        lines = output.splitlines()
-        displays = []
-        for line in lines:
-            if " connected" in line:
-                display_name = line.split()[0]
-                if display_name != main_display:
-                    displays.append(display_name)
-        return displays
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to get external displays: {e}")
-        return []
+    return [output["name"] for output in get_connected_outputs() if output["name"] != main_display]
 
 def determine_display_positions():
-    def run_xrandr():
-        result = subprocess.run(['xrandr'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return result.stdout.decode().strip()
-
-    def parse_xrandr_output(xrandr_output):
-        displays = {}
-        lines = xrandr_output.splitlines()
-        for line in lines:
-            if " connected" in line:
-                parts = line.split()
-                display_name = parts[0]
-                resolution_part = None
-                position_part = None
-                for part in parts:
-                    if "+" in part and "x" in part:
-                        resolution_part = part.split("+")[0]
-                        position_part = part.split("+")[1:]
-                        break
-                if resolution_part and position_part:
-                    resolution = tuple(map(int, resolution_part.split("x")))
-                    position = tuple(map(int, position_part))
-                    displays[display_name] = {"resolution": resolution, "position": position}
-        return displays
-
     def determine_relative_position(primary_info, secondary_info):
         primary_x, primary_y = primary_info["position"]
         primary_width, primary_height = primary_info["resolution"]
@@ -103,10 +140,13 @@ def determine_display_positions():
     # Use existing functions to get main and external displays
     main_display = get_main_display()
     external_displays = get_external_displays(main_display)
-    
+
     if main_display:
-        xrandr_output = run_xrandr()
-        displays = parse_xrandr_output(xrandr_output)
+        displays = {}
+        for output in get_connected_outputs():
+            if output["geometry"]:
+                width, height, x, y = output["geometry"]
+                displays[output["name"]] = {"resolution": (width, height), "position": (x, y)}
         positions = {}
 
         main_info = displays.get(main_display)
@@ -122,50 +162,14 @@ def determine_display_positions():
         return None, None
 
 def get_display_resolution(display):
-    try:
-        result = subprocess.run(['xrandr'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output = result.stdout.decode().strip()
-        lines = output.splitlines()
-        found_display = False
-        
-        for line in lines:
-            if display in line and "connected" in line:
-                found_display = True  # Start capturing after the display is found
-                continue
-            
-            if found_display:
-                if "*" in line:
-                    resolution = line.split()[0]
-                    return resolution
-                elif "connected" in line:
-                    break  # Stop if the next display is found
-
-        return "Resolution not found."
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to get display resolution: {e}")
-        return None
+    output = get_display_state()["outputs"].get(display)
+    if output and output["connected"] and output["current_mode"]:
+        return output["current_mode"]
+    return "Resolution not found."
 
 def get_available_resolutions(display):
-    try:
-        result = subprocess.run(['xrandr'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output = result.stdout.decode().strip()
-        lines = output.splitlines()
-        resolutions = []
-        capture = False
-        for line in lines:
-            if line.startswith(display):
-                capture = True
-                continue
-            if capture:
-                if "connected" in line:
-                    break  # Stop capturing when the next display is found
-                res_parts = line.split()
-                if res_parts and res_parts[0].replace('x', '').isdigit():  # Ensure it's a valid resolution
-                    resolutions.append(res_parts[0])
-        return resolutions
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to get available resolutions for {display}: {e}")
-        return []
+    output = get_display_state()["outputs"].get(display)
+    return list(output["modes"]) if output else []
 
 def store_initial_values(orientation_var, position_var, resolution_var):
     global initial_orientation, initial_position, initial_resolution
@@ -195,81 +199,113 @@ def has_changed(orientation_var, position_var, resolution_var):
             position_var.get() != initial_position or
             resolution_var.get() != initial_resolution)
 
+class DisplayTransaction:
+    # Gathers pending output changes and applies them with a single xrandr run,
+    # keeping the pre-change snapshot so the whole layout can be restored in one step
+    def __init__(self):
+        self.snapshot = get_display_state()
+        self.changes = {}  # output name -> list of xrandr arguments
+
+    def set(self, output, *args):
+        self.changes.setdefault(output, []).extend(args)
+
+    def build_command(self):
+        command = []
+        for output, args in self.changes.items():
+            command += ['--output', output] + args
+        return command
+
+    def build_restore_command(self):
+        command = []
+        for name in self.changes:
+            output = self.snapshot["outputs"].get(name)
+            if output is None:
+                continue
+            if output["geometry"] and output["current_mode"]:
+                _, _, x, y = output["geometry"]
+                command += ['--output', name, '--mode', output["current_mode"], '--pos', f'{x}x{y}', '--rotate', output["rotation"]]
+                if output["primary"]:
+                    command.append('--primary')
+            else:
+                command += ['--output', name, '--off']
+        return command
+
+    def commit(self):
+        if not self.changes:
+            return True
+        if run_xrandr_command(self.build_command()) is None:
+            print("Display transaction failed, restoring the previous layout.")
+            self.rollback()
+            return False
+        return True
+
+    def rollback(self):
+        command = self.build_restore_command()
+        if command:
+            run_xrandr_command(command)
+
 def apply_settings(main_display, display_var, position_var, resolution_var, root, orientation_var=None):
-    global initial_position, initial_resolution
+    global initial_orientation, initial_position, initial_resolution
 
     # Automatically detect which display is being interacted with
     target_display = display_var.get() if display_var.get() else main_display
 
     if has_changed(orientation_var, position_var, resolution_var):
-        # Run the --auto command first
-        run_xrandr_command(['--output', target_display, '--auto'])
+        if initial_orientation is None:
+            initial_orientation = capture_current_orientation(main_display)
+            print(f"Stored initial orientation as: {initial_orientation}")
 
-        if position_var.get() == "same-as":
-            run_xrandr_command(['--output', target_display, '--same-as', main_display])
-        elif target_display != main_display:
-            # Ensure the scaling is correct regardless of position
-            run_xrandr_command(['--output', target_display, '--auto', f'--{position_var.get()}', main_display])
+        transaction = DisplayTransaction()
 
+        # An explicit mode replaces --auto so the output is only modeset once
         if resolution_var.get() != initial_resolution:
-            run_xrandr_command(['--output', target_display, '--mode', resolution_var.get()])
+            transaction.set(target_display, '--mode', resolution_var.get())
+        else:
+            transaction.set(target_display, '--auto')
 
-        new_orientation = orientation_var.get()
+        if target_display != main_display:
+            if position_var.get() == "same-as":
+                transaction.set(target_display, '--same-as', main_display)
+            else:
+                transaction.set(target_display, f'--{position_var.get()}', main_display)
 
         # Apply orientation change directly to the main display only
-        change_orientation(main_display, new_orientation, root, orientation_var)
-
+        new_orientation = orientation_var.get()
+        if new_orientation != initial_orientation:
+            transaction.set(main_display, '--rotate', new_orientation)
+
+        try:
+            applied = transaction.commit()
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while applying display settings: {str(e)}")
+            return
+        if not applied:
+            orientation_var.set(initial_orientation)
+            return
+
+        previous_position, previous_resolution = initial_position, initial_resolution
         # Update the stored initial values for position and resolution, but not for orientation
         initial_position = position_var.get()
         initial_resolution = resolution_var.get()
 
-def change_orientation(display, new_orientation, root, orientation_var, prompt_window=None):
-    global initial_orientation
-    try:
-        if initial_orientation is None:
-            initial_orientation = capture_current_orientation(display)
-            print(f"Stored initial orientation as: {initial_orientation}")
-        
-        command = ['--output', display, '--rotate', new_orientation]
-        result = run_xrandr_command(command)
-        if result is not None:
-            if new_orientation != "normal" and new_orientation != initial_orientation:
-                start_revert_timer(display, root, new_orientation, orientation_var)  # Corrected to pass orientation_var
-            else:
-                initial_orientation = new_orientation  # Update the initial orientation
-                print(f"Orientation saved as: {initial_orientation}")
-            if prompt_window:
-                prompt_window.destroy()  # Close prompt window if orientation is "normal"
-    except Exception as e:
-        messagebox.showerror("Error", f"An error occurred while changing orientation: {str(e)}")
+        if new_orientation != "normal" and new_orientation != initial_orientation:
+            def on_revert():
+                global initial_position, initial_resolution
+                initial_position, initial_resolution = previous_position, previous_resolution
+                position_var.set(previous_position)
+                resolution_var.set(previous_resolution)
+            start_revert_timer(transaction, root, new_orientation, orientation_var, on_revert)
+        else:
+            initial_orientation = new_orientation  # Update the initial orientation
+            print(f"Orientation saved as: {initial_orientation}")
 
 def capture_current_orientation(display):
-    try:
-        result = subprocess.run(['xrandr', '--verbose'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output = result.stdout.decode().strip()
-        lines = output.splitlines()
-
-        for line in lines:
-            if line.startswith(display) and "connected" in line:
-                # Remove everything in parentheses
-                line_without_parentheses = re.sub(r'\(.*?\)', '', line)
-
-                # Check for specific orientation keywords
-                if "right" in line_without_parentheses:
-                    return "right"
-                elif "left" in line_without_parentheses:
-                    return "left"
-                elif "inverted" in line_without_parentheses:
-                    return "inverted"
-                else:
-                    return "normal"  # Default to normal if none of the keywords are found
-
-        return "normal"  # Default to normal if no valid line is found
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to capture current orientation for {display}: {e}")
-        return "normal"
+    output = get_display_state()["outputs"].get(display)
+    if output and output["connected"]:
+        return output["rotation"]
+    return "normal"  # Default to normal if no valid output is found
 
-def start_revert_timer(display, root, new_orientation, orientation_var):
+def start_revert_timer(transaction, root, new_orientation, orientation_var, on_revert=None):
     global current_timer_window, current_countdown_label, timer_canceled
 
     # If there is an existing timer window, close it and stop the previous timer
@@ -283,9 +319,11 @@ def start_revert_timer(display, root, new_orientation, orientation_var):
     def revert_orientation():
         if not timer_canceled:
             print(f"Reverting orientation to {initial_orientation}")
-            run_xrandr_command(['--output', display, '--rotate', initial_orientation])
+            transaction.rollback()  # Restore the whole pre-change layout in one xrandr run
             notify_user(f"Orientation reverted to {initial_orientation}.")
             orientation_var.set(initial_orientation)  # Reset the dropdown to the initial display
+            if on_revert:
+                on_revert()
 
     def update_timer():
         nonlocal countdown
@@ -341,7 +379,7 @@ def reset_to_main_display_layout(root, display_var, position_var, resolution_var
     resolution_label.config(text=f"Main Display Resolution: {get_display_resolution(get_main_display())}")
     orientation_menu.pack(pady=10)
 
-def update_displays(main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root):
+def refresh_displays(main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root):
     global connected_displays
     new_displays = get_external_displays(main_display)
 
@@ -377,19 +415,36 @@ def update_displays(main_display, display_var, resolution_var, resolution_label,
         else:
             reset_to_main_display_layout(root, display_var, position_var, resolution_var, resolution_menu, position_menu, resolution_label, external_resolution_label)
 
-    root.after(2000, update_displays, main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root)
+def update_displays(main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root, polls=0):
+    # Polling fallback used only when RandR notifications are unavailable. --current
+    # never notices a new connector, so every PROBE_EVERY_POLLS polls is a real probe.
+    if polls % PROBE_EVERY_POLLS == PROBE_EVERY_POLLS - 1:
+        rescan_displays()
+    else:
+        invalidate_display_state()  # Re-read the current layout once per poll
+    refresh_displays(main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root)
+    root.after(POLL_INTERVAL_MS, update_displays, main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root, polls + 1)
+
+def on_randr_events(events, main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root):
+    for state, output in events:
+        print(f"RandR event: {state} {output if output is not None else ''}".rstrip())
+    if any(state in ("connected", "disconnected") for state, output in events):
+        rescan_displays()  # Hotplug is the one time a real connector probe is worth it
+    else:
+        invalidate_display_state()  # Layout or mode change: the current state is enough
+    refresh_displays(main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root)
 
 def show_xrandr_control():
     global initial_orientation, connected_displays
-    root = tk.Tk()
+    root = tk.Toplevel(ui_root())
     root.title("xrandr Control")
-    root.geometry("450x400")  # Increased window size
+    root.geometry("450x440")  # Increased window size
 
     main_display = get_main_display()
     if not main_display:
-        messagebox.showerror("Error", "Could not detect the main display.")
+        messagebox.showerror("Error", "Could not detect the main display.", parent=root)
         root.destroy()
-        return
+        return None
     
     initial_orientation = capture_current_orientation(main_display)
 
@@ -446,9 +501,21 @@ def show_xrandr_control():
     apply_button = tk.Button(root, text="Apply Settings", command=lambda: apply_settings(main_display=get_main_display(), display_var=display_var, position_var=position_var, resolution_var=resolution_var, root=root, orientation_var=orientation_var))
     apply_button.pack(side=tk.BOTTOM, pady=20)
 
-    root.after(2000, update_displays, main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root)
+    rescan_button = tk.Button(root, text="Rescan Displays", command=lambda: (rescan_displays(), refresh_displays(main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root)))
+    rescan_button.pack(side=tk.BOTTOM)
+
+    # React to hotplug through RandR notifications, fall back to polling without them
+    listener = start_randr_listener(root, lambda events: on_randr_events(events, main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root))
+    if listener is None:
+        root.after(POLL_INTERVAL_MS, update_displays, main_display, display_var, resolution_var, resolution_label, external_resolution_label, position_menu, position_var, resolution_menu, root)
+
+    def close_window():
+        if listener is not None:
+            listener.stop()
+        root.destroy()
 
-    root.bind('<Escape>', lambda event: root.destroy())
-    root.bind('<q>', lambda event: root.destroy())
+    root.bind('<Escape>', lambda event: close_window())
+    root.bind('<q>', lambda event: close_window())
+    root.protocol("WM_DELETE_WINDOW", close_window)
 
-    root.mainloop()
+    return root
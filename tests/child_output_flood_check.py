@@ -0,0 +1,54 @@
+# child_output_flood_check.py
+# Runs a child that writes megabytes to stdout and stderr through the output
+# reader and checks it never stalls on a full pipe: it must finish in about the
+# time it takes to write, with only the newest lines kept in memory and the log
+# file rotated at its size cap.
+# Usage: python3 tests/child_output_flood_check.py [megabytes]
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from utils.child_output import OutputReader, RING_LINES, LOG_MAX_BYTES
+
+megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+
+CHILD = """
+import sys, time
+line = "x" * 99 + "\\n"
+for index in range(int(sys.argv[1]) * 10486):
+    (sys.stdout if index % 2 else sys.stderr).write(line)
+sys.stdout.flush()
+time.sleep(0.1)  # Both pipes drained, so the next line is the newest one
+sys.stdout.write("last line on stdout\\n")
+"""
+
+with tempfile.TemporaryDirectory() as log_dir:
+    reader = OutputReader(log_dir=log_dir)
+    started = time.monotonic()
+    process = subprocess.Popen([sys.executable, "-c", CHILD, str(megabytes)],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    reader.attach("flood", process)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        print("FAIL: child stalled on a full pipe")
+        sys.exit(1)
+    elapsed = time.monotonic() - started
+    time.sleep(0.2)  # Let the reader drain what is left in the pipes
+
+    lines = reader.tail("flood")
+    logs = sorted(os.listdir(log_dir))
+    largest_log = max(os.path.getsize(os.path.join(log_dir, name)) for name in logs)
+    ok = (len(lines) == RING_LINES and lines[-1].endswith("last line on stdout")
+          and largest_log <= LOG_MAX_BYTES)
+    print(f"{megabytes} MiB written in {elapsed:.2f} s ({megabytes / elapsed:.1f} MiB/s)")
+    print(f"ring buffer: {len(lines)} lines, last: {lines[-1] if lines else None!r}")
+    print(f"logs: {', '.join(logs)} (largest {largest_log} bytes)")
+    print("ok" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,50 @@
+# conftest.py
+# Automated tests (test_*.py) run with pytest from the repository root; the other
+# scripts in this directory are manual checks and benchmarks run by hand.
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+# Interactive or tray-launching scripts that must not be collected
+collect_ignore = ["pam_test.py", "pytray.py", "tray.py"]
+
+@pytest.fixture(scope="session")
+def dbus_session_bus():
+    # One private session bus for every D-Bus mock test. GDBus keeps its session bus
+    # connection for the whole process, so the bus has to outlive all of them, and the
+    # connection must not take the test run down with it when the bus stops.
+    dbusmock = pytest.importorskip("dbusmock")
+    Gio = pytest.importorskip("gi.repository.Gio")
+    dbusmock.DBusTestCase.start_session_bus()
+    Gio.bus_get_sync(Gio.BusType.SESSION, None).set_exit_on_close(False)
+    yield dbusmock
+    dbusmock.DBusTestCase.tearDownClass()
+
+@pytest.fixture
+def xvfb(monkeypatch):
+    # A private headless X server with RandR, as $DISPLAY for the test. Skipped where
+    # Xvfb or python-xlib is not installed. Every X client of the test must be closed
+    # before it returns, or losing the server takes the test process down.
+    pytest.importorskip("Xlib")
+    if shutil.which("Xvfb") is None:
+        pytest.skip("Xvfb is not installed")
+    read_fd, write_fd = os.pipe()
+    server = subprocess.Popen(["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "1280x1024x24",
+                               "+extension", "RANDR", "-nolisten", "tcp"], pass_fds=(write_fd,))
+    os.close(write_fd)
+    with os.fdopen(read_fd) as displayfd:
+        number = displayfd.readline().strip()  # Written once the server accepts clients
+    if not number:
+        server.kill()
+        server.wait()
+        pytest.skip("Xvfb did not start")
+    monkeypatch.setenv("DISPLAY", f":{number}")
+    yield f":{number}"
+    server.terminate()
+    server.wait()
@@ -0,0 +1,80 @@
+# frame_ring_bench.py
+# Achievable frames per second and memory ceiling of the burst capture ring at
+# 1080p and 4K. Without an X display the grab is simulated by a ready-made frame,
+# which measures the ring itself; with one (e.g. under xvfb-run) real grabs of the
+# screen, clipped to the tested size, are timed as well.
+# Usage: python3 tests/frame_ring_bench.py [seconds]
+
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from utils.frame_ring import FrameCapture, FrameRing, MAX_RING_BYTES
+from utils.screen_capture import get_screen_capture
+
+seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+SIZES = {"1080p": (1920, 1080), "4K": (3840, 2160)}
+WINDOW = 10  # Seconds of frames the ring is sized for
+
+class SimulatedScreen:
+    # Hands out the same prebuilt frame, like an X reply that costs nothing to fetch
+    raw_mode = "BGRX"
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.frame = os.urandom(width * height * 4)
+
+    def clip(self, x, y, width, height):
+        return x, y, width, height
+
+    def grab_raw(self, x, y, width, height):
+        return self.frame
+
+def max_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run(label, screen, width, height):
+    # As fast as possible (interval 0) for `seconds`, into a ring sized for WINDOW at 30 fps
+    capture = FrameCapture(screen, (0, 0, width, height), 1 / 30, WINDOW, duration=seconds)
+    capture.interval = 0
+    started = time.perf_counter()
+    capture.start()
+    capture.join()
+    fps = capture.frames / (time.perf_counter() - started)
+    ring = capture.ring
+    start = time.perf_counter()
+    size, raw_mode, frames = capture.flush()
+    flush_ms = (time.perf_counter() - start) * 1000
+    print(f"{label:<22} {fps:8.1f} fps  ring {ring.capacity:4d} frames {ring.memory() / 2**20:7.0f} MiB  "
+          f"flush {len(frames)} frames {flush_ms:7.1f} ms  max RSS {max_rss_mib():7.0f} MiB")
+
+print(f"ring cap {MAX_RING_BYTES // 2**20} MiB (SYSTRAY_FRAME_RING_MB), sized for {WINDOW} s at 30 fps")
+for name, (width, height) in SIZES.items():
+    frames_in_cap = MAX_RING_BYTES // (width * height * 4)
+    print(f"{name}: {width * height * 4 / 2**20:.1f} MiB per frame, at most {frames_in_cap} frames "
+          f"({frames_in_cap / 30:.1f} s at 30 fps) within the cap")
+
+for name, (width, height) in SIZES.items():
+    run(f"{name} ring only", SimulatedScreen(width, height), width, height)
+
+screen = get_screen_capture()
+if screen is not None:
+    screen_width, screen_height = screen.screen_size()
+    for name, (width, height) in SIZES.items():
+        if width <= screen_width and height <= screen_height:
+            run(f"{name} X grab + ring", screen, width, height)
+        else:
+            print(f"{name} X grab: screen is only {screen_width}x{screen_height}, skipped")
+else:
+    print("No X display, skipping real grabs")
+
+# The ring allocates once: writing many frames must not grow the process
+ring = FrameRing(4, 1920, 1080)
+frame = bytes(ring.frame_bytes)
+before = max_rss_mib()
+for _ in range(200):
+    ring.write(frame)
+print(f"200 writes into a 4-slot 1080p ring grew max RSS by {max_rss_mib() - before:.1f} MiB")
@@ -0,0 +1,42 @@
+# icon_swap_bench.py
+# Measures what a tray icon swap costs with the icon cache (a lookup of a ready
+# image) against rendering the badged variant with PIL on every state change.
+# Usage: python3 tests/icon_swap_bench.py [swaps]
+
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from utils.icon_cache import IconCache, BADGES
+
+swaps = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+combinations = [badges for count in range(len(BADGES) + 1)
+                for badges in itertools.combinations(sorted(BADGES), count)]
+
+with tempfile.TemporaryDirectory() as cache_dir:
+    cold = IconCache(cache_dir=cache_dir)
+    start = time.perf_counter()
+    cold.prerender()
+    print(f"prerender (cold, renders + writes disk cache) {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    warm = IconCache(cache_dir=cache_dir)
+    start = time.perf_counter()
+    warm.prerender()
+    print(f"prerender (warm, loads disk cache)            {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    states = itertools.cycle(combinations)
+    start = time.perf_counter()
+    for _ in range(swaps):
+        warm.get(24, next(states))
+    lookup_us = (time.perf_counter() - start) / swaps * 1e6
+
+    start = time.perf_counter()
+    for _ in range(swaps):
+        warm._render(24, next(states))
+    render_us = (time.perf_counter() - start) / swaps * 1e6
+
+print(f"per swap: cached lookup {lookup_us:8.2f} us   PIL render {render_us:8.2f} us")
@@ -0,0 +1,67 @@
+# import_time_check.py
+# Fails (exit status 1) when importing src/main.py goes over the startup budget,
+# or when a module that should load lazily is pulled in at startup.
+# Usage: python3 tests/import_time_check.py [budget_ms]
+
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src')
+BUDGET_MS = float(sys.argv[1]) if len(sys.argv) > 1 else float(os.environ.get("SYSTRAY_IMPORT_BUDGET_MS", 300))
+
+# Loaded on first use from the registry in main.py, never at startup
+LAZY_MODULES = (
+    "tkinter", "psutil", "pam", "gi",
+    "utils.bluetooth_control", "utils.xrandr_tool", "utils.brightness_slider",
+    "utils.screenshot_tool", "utils.shutdown_timer", "utils.sudo_prompt",
+    "utils.ui_thread", "utils.bluez_client",
+)
+
+def parse_importtime(stderr):
+    # Lines look like "import time:       412 |       1723 |   utils.conky",
+    # where the indentation of the name gives the nesting depth
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                        cwd=SRC_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+if result.returncode != 0:
+    print(result.stderr.splitlines()[-1] if result.stderr else "import main failed")
+    sys.exit(1)
+
+entries = parse_importtime(result.stderr)
+main_entry = next((entry for entry in entries if entry[0] == "main" and entry[1] == 0), None)
+if main_entry is None:
+    print("No import time recorded for main")
+    sys.exit(1)
+total_ms = main_entry[3] / 1000
+
+# Direct children of main are listed before it, one level deeper
+main_index = entries.index(main_entry)
+children = []
+for name, depth, self_us, cumulative_us in reversed(entries[:main_index]):
+    if depth == 0:
+        break
+    if depth == 1:
+        children.append((cumulative_us, name))
+for cumulative_us, name in sorted(children, reverse=True)[:10]:
+    print(f"{cumulative_us / 1000:8.2f} ms  {name}")
+
+failed = False
+eager = sorted({name for name, _, _, _ in entries
+                if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)})
+if eager:
+    print(f"Imported at startup but should be lazy: {', '.join(eager)}")
+    failed = True
+print(f"import main: {total_ms:.2f} ms (budget {BUDGET_MS:.0f} ms)")
+if total_ms > BUDGET_MS:
+    print("Startup import budget exceeded")
+    failed = True
+sys.exit(1 if failed else 0)
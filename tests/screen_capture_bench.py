@@ -0,0 +1,42 @@
+# screen_capture_bench.py
+# Times an in-process full-screen grab (click to image in memory) against forking
+# scrot, which also encodes and writes a PNG before returning. Needs an X display,
+# e.g. xvfb-run -s "-screen 0 1920x1080x24" python3 tests/screen_capture_bench.py
+# Usage: python3 tests/screen_capture_bench.py [runs]
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from utils.screen_capture import get_screen_capture
+
+runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+capture = get_screen_capture()
+if capture is None:
+    sys.exit(1)
+width, height = capture.screen_size()
+print(f"screen {width}x{height}, {runs} runs")
+
+start = time.perf_counter()
+for _ in range(runs):
+    image = capture.grab()
+grab_ms = (time.perf_counter() - start) / runs * 1000
+assert image.size == (width, height)
+print(f"Xlib grab into memory  {grab_ms:8.2f} ms")
+
+if shutil.which("scrot"):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "shot.png")
+        start = time.perf_counter()
+        for _ in range(runs):
+            subprocess.run(["scrot", "-o", path], check=True)
+        scrot_ms = (time.perf_counter() - start) / runs * 1000
+    print(f"scrot fork + PNG file  {scrot_ms:8.2f} ms")
+else:
+    print("scrot not installed, skipping the comparison")
@@ -0,0 +1,49 @@
+# screenshot_encode_bench.py
+# Encode time and file size per screenshot format on synthetic desktop-like images:
+# a gradient wallpaper, flat window backgrounds, title bars and rows of "text".
+# Usage: python3 tests/screenshot_encode_bench.py [WIDTHxHEIGHT ...]
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from PIL import Image, ImageDraw
+from utils.image_encoder import FORMATS, encode, resolve_format, supports_qoi
+
+def desktop_image(width, height, seed=1):
+    rng = random.Random(seed)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    image = Image.merge("RGB", (gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT), Image.new("L", (width, height), 90)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(max(3, width * height // 400000)):
+        left, top = rng.randrange(0, width - 200), rng.randrange(0, height - 150)
+        right, bottom = min(width, left + rng.randrange(300, 1400)), min(height, top + rng.randrange(200, 900))
+        draw.rectangle((left, top, right, bottom), fill=(250, 250, 250), outline=(60, 60, 60))
+        draw.rectangle((left, top, right, top + 24), fill=(45, 50, 60))
+        for row in range(top + 34, bottom - 12, 16):
+            x = left + 8
+            while x < right - 40:
+                word = rng.randrange(12, 60)
+                draw.rectangle((x, row, min(x + word, right - 8), row + 9), fill=(rng.randrange(0, 80),) * 3)
+                x += word + 6
+    return image
+
+sizes = [tuple(int(part) for part in arg.split("x")) for arg in sys.argv[1:]] or [(1920, 1080), (7680, 1440)]
+formats = list(FORMATS) if supports_qoi() else [name for name in FORMATS if name != "qoi"]
+if not supports_qoi():
+    print("Pillow cannot write QOI here; 'qoi' would fall back to png-fast")
+
+for width, height in sizes:
+    image = desktop_image(width, height)
+    raw_size = width * height * 3
+    print(f"\n{width}x{height} ({raw_size / 1e6:.1f} MB raw)")
+    print(f"{'format':<10} {'level':>5} {'encode ms':>10} {'size KiB':>10} {'ratio':>7}")
+    for name in formats:
+        _, _, level = resolve_format(name)
+        start = time.perf_counter()
+        data = encode(image, name, level)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{name:<10} {str(level):>5} {elapsed:10.1f} {len(data) / 1024:10.1f} {raw_size / len(data):7.1f}")
@@ -0,0 +1,78 @@
+# supervisor_stop_check.py
+# Starts dummy long-running children under the supervisor and checks that stopping
+# one takes as long as the child really needs to exit, not a fixed sleep, with
+# both the pidfd watcher and the SIGCHLD fallback.
+# Usage: python3 tests/supervisor_stop_check.py
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+os.environ.setdefault("XDG_RUNTIME_DIR", tempfile.mkdtemp())
+
+from utils.supervisor import Supervisor
+
+# Sleeps until SIGTERM, then takes `delay` seconds to shut down (or ignores it when delay < 0)
+CHILD = """
+import signal, sys, time
+delay = float(sys.argv[1])
+def on_term(signum, frame):
+    if delay >= 0:
+        time.sleep(delay)
+        sys.exit(0)
+signal.signal(signal.SIGTERM, on_term)
+while True:
+    time.sleep(60)
+"""
+
+def start(supervisor, name, delay):
+    process = supervisor.spawn(name, [sys.executable, "-c", CHILD, str(delay)], start_new_session=True)
+    time.sleep(0.3)  # Let the interpreter install its handler
+    return process
+
+def check(label, elapsed, low, high):
+    ok = low <= elapsed <= high
+    print(f"  {label:<34} {elapsed * 1000:8.1f} ms  {'ok' if ok else 'FAIL'}")
+    return ok
+
+def run(use_pidfd):
+    supervisor = Supervisor()
+    supervisor.use_pidfd = use_pidfd
+    if not use_pidfd:
+        import signal
+        signal.signal(signal.SIGCHLD, lambda signum, frame: supervisor._wake())
+        supervisor.sigchld = True
+    events = []
+    exited = threading.Event()
+    supervisor.add_listener(lambda name, running: (events.append((name, running)), running or exited.set()))
+    print(f"{'pidfd' if use_pidfd else 'SIGCHLD'} watcher:")
+    ok = True
+
+    for delay in (0.0, 0.5):
+        start(supervisor, "child", delay)
+        started = time.monotonic()
+        clean = supervisor.stop("child", timeout=3)
+        ok &= clean and check(f"stop, exits {delay}s after SIGTERM", time.monotonic() - started, delay, delay + 0.25)
+
+    start(supervisor, "stubborn", -1)
+    started = time.monotonic()
+    clean = supervisor.stop("stubborn", timeout=1)
+    ok &= not clean and check("stop, ignores SIGTERM (1s timeout)", time.monotonic() - started, 1.0, 1.3)
+
+    # A child dying on its own is pushed to listeners without anyone asking
+    exited.clear()
+    process = start(supervisor, "crasher", 0)
+    started = time.monotonic()
+    process.kill()
+    exited.wait(2)
+    ok &= check("exit noticed, no stop() call", time.monotonic() - started, 0, 0.25)
+    ok &= not supervisor.is_running("crasher")
+    ok &= ("crasher", True) in events and ("crasher", False) in events
+    return ok
+
+results = [run(True) if hasattr(os, "pidfd_open") else True, run(False)]
+print("all ok" if all(results) else "FAILED")
+sys.exit(0 if all(results) else 1)
@@ -0,0 +1,113 @@
+# test_auth_session.py
+
+import sys
+import types
+
+import pytest
+
+from utils import auth_session as auth_module
+from utils.auth_session import AuthSession, BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS
+
+PASSWORD = "hunter2"
+
+class FakeClock:
+    # Time only moves when something sleeps or the test advances it
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+class StubPam:
+    def __init__(self):
+        self.calls = 0
+
+    def authenticate(self, username, password):
+        self.calls += 1
+        return password == PASSWORD
+
+@pytest.fixture
+def pam(monkeypatch):
+    # Stands in for python-pam, so the default factory is what gets exercised
+    stub = StubPam()
+    monkeypatch.setitem(sys.modules, "pam", types.SimpleNamespace(pam=lambda: stub))
+    return stub
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def make_session(clock, grace_seconds=300):
+    return AuthSession(auth_module.default_pam_factory, grace_seconds, clock, clock.sleep)
+
+def test_grace_window_is_reused(pam, clock):
+    session = make_session(clock)
+    assert not session.is_fresh()
+    assert session.authenticate("user", PASSWORD)
+    clock.now += 299
+    assert session.is_fresh()
+    assert pam.calls == 1
+
+def test_grace_window_expires(pam, clock):
+    session = make_session(clock)
+    assert session.authenticate("user", PASSWORD)
+    clock.now += 300
+    assert not session.is_fresh()
+    session.mark_authenticated()
+    assert session.is_fresh()
+    session.invalidate()
+    assert not session.is_fresh()
+
+def test_zero_grace_always_prompts(pam, clock):
+    session = make_session(clock, grace_seconds=0)
+    assert session.authenticate("user", PASSWORD)
+    assert not session.is_fresh()
+
+def test_backoff_grows_and_is_capped(pam, clock):
+    session = make_session(clock)
+    assert not session.authenticate("user", "wrong")
+    assert session.backoff_remaining() == BACKOFF_BASE_SECONDS
+    for _ in range(6):
+        assert not session.authenticate("user", "wrong")
+    # Each attempt first waited out the delay left by the previous failure
+    assert clock.slept == [2, 4, 8, 16, BACKOFF_MAX_SECONDS, BACKOFF_MAX_SECONDS]
+    assert session.backoff_remaining() == BACKOFF_MAX_SECONDS
+
+def test_success_resets_backoff(pam, clock):
+    session = make_session(clock)
+    for _ in range(3):
+        session.authenticate("user", "wrong")
+    assert session.authenticate("user", PASSWORD)
+    assert session.backoff_remaining() == 0
+    session.invalidate()
+    assert not session.authenticate("user", "wrong")
+    assert session.backoff_remaining() == BACKOFF_BASE_SECONDS
+
+def test_missing_pam_ends_the_password_prompt(monkeypatch, clock):
+    # Without python-pam the prompt must give up with an error instead of asking forever
+    from utils import sudo_prompt
+
+    monkeypatch.setitem(sys.modules, "pam", None)  # Makes "import pam" raise ImportError
+    monkeypatch.setattr(sudo_prompt, "auth_session", make_session(clock))
+    monkeypatch.setattr(sudo_prompt, "get_auth_capabilities", lambda: {"username": "user", "fingerprint": False})
+    shown = []
+    asked = []
+
+    def call_in_ui(fn, *args):
+        if fn is sudo_prompt.ask_password:
+            asked.append(args)
+            return PASSWORD
+        if fn is sudo_prompt.create_progress_window:
+            return None
+        if fn is not sudo_prompt.destroy_if_exists:
+            shown.append(args)
+
+    monkeypatch.setattr(sudo_prompt, "call_in_ui", call_in_ui)
+    assert not sudo_prompt.prompt_sudo_password("test")
+    assert len(asked) == 1
+    assert len(shown) == 1 and "python-pam" in shown[0][1]
@@ -0,0 +1,89 @@
+# test_bluetoothctl_session.py
+
+import os
+import sys
+import textwrap
+
+import pytest
+
+from utils.bluetoothctl_session import BluetoothctlSession
+
+DEVICE = "11:22:33:44:55:66"
+
+# Talks like an interactive bluetoothctl: coloured prompts, readline echoes,
+# unsolicited [CHG] events and asynchronous connect results
+FAKE_BLUETOOTHCTL = textwrap.dedent(f"""\
+    #!{sys.executable}
+    import os, sys, time
+
+    PROMPT = "\\x1b[0;94m[bluetooth]\\x1b[0m# "
+
+    def say(line):
+        sys.stdout.write("\\r" + PROMPT + line + "\\n")
+        sys.stdout.flush()
+
+    say("Agent registered")
+    say("[CHG] Controller 00:11:22:33:44:55 Pairable: yes")
+    for command in sys.stdin:
+        command = command.strip()
+        say(command)  # Echo, as readline does
+        if command == "version":
+            say("Version 5.66")
+        elif command == "devices":
+            say("Device {DEVICE} Headphones")
+        elif command.startswith("connect"):
+            say("Attempting to connect to {DEVICE}")
+            time.sleep(0.1)
+            say("[CHG] Device {DEVICE} Connected: yes")
+            say("Connection successful")
+        elif command == "stall":
+            time.sleep(1)
+        elif command == "crash-once":
+            marker = os.path.join(os.path.dirname(sys.argv[0]), "crashed")
+            if not os.path.exists(marker):
+                open(marker, "w").close()
+                os._exit(1)
+            say("recovered")
+        elif command == "quit":
+            break
+        else:
+            say("Invalid command")
+""")
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    script = tmp_path / "bluetoothctl"
+    script.write_text(FAKE_BLUETOOTHCTL)
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    session = BluetoothctlSession()
+    yield session
+    session.stop()
+
+def test_prompt_and_echo_are_stripped(session):
+    assert session.run(["devices"]) == f"Device {DEVICE} Headphones"
+    # The banner and controller events never leak into a response
+    assert session.run(["devices"]) == f"Device {DEVICE} Headphones"
+
+def test_asynchronous_command_waits_for_completion(session):
+    assert session.run(["connect", DEVICE]).splitlines() == [
+        f"Attempting to connect to {DEVICE}", "Connection successful"]
+
+def test_timeout_restarts_the_session(session):
+    session.run(["devices"])
+    pid = session.process.pid
+    assert session.run(["stall"], timeout=0.3) is None
+    # The stalled answer must not be taken for the next request's
+    assert session.run(["devices"]) == f"Device {DEVICE} Headphones"
+    assert session.process.pid != pid
+
+def test_restart_after_exit(session):
+    session.run(["devices"])
+    first = session.process
+    first.kill()
+    first.wait()
+    assert session.run(["devices"]) == f"Device {DEVICE} Headphones"
+    assert session.process.pid != first.pid
+
+def test_retry_when_process_dies_mid_request(session):
+    assert session.run(["crash-once"]) == "recovered"
@@ -0,0 +1,116 @@
+# test_bluez_client.py
+
+import time
+import types
+
+import pytest
+
+from utils import bluez_client as bluez_module
+from utils import dbus_loop
+
+class FakeBus:
+    # Records subscriptions; GetManagedObjects fails as if BlueZ were not running
+    def __init__(self):
+        self.subscriptions = set()
+        self.next_id = 1
+
+    def signal_subscribe(self, *args):
+        subscription, self.next_id = self.next_id, self.next_id + 1
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def signal_unsubscribe(self, subscription):
+        self.subscriptions.remove(subscription)
+
+    def call_sync(self, *args):
+        raise RuntimeError("The name org.bluez was not provided by any .service files")
+
+@pytest.fixture
+def fake_dbus(monkeypatch):
+    bus = FakeBus()
+    flags = types.SimpleNamespace(NONE=0)
+    monkeypatch.setattr(bluez_module, "Gio", types.SimpleNamespace(
+        BusType=types.SimpleNamespace(SYSTEM=1, SESSION=2), DBusSignalFlags=flags, DBusCallFlags=flags,
+        bus_get_sync=lambda bus_type, cancellable: bus))
+    monkeypatch.setattr(bluez_module, "GLib", types.SimpleNamespace(VariantType=types.SimpleNamespace(new=str)))
+    monkeypatch.setattr(dbus_loop, "is_available", lambda: True)
+    monkeypatch.setattr(dbus_loop, "call_in_loop", lambda fn, *args: fn(*args))
+    monkeypatch.setattr(bluez_module, "bluez_client", None)
+    monkeypatch.setattr(bluez_module, "bluez_failures", 0)
+    monkeypatch.setattr(bluez_module, "bluez_retry_at", 0.0)
+    return bus
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(bluez_module, "time", types.SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+def test_failed_fetch_drops_its_subscriptions(fake_dbus):
+    with pytest.raises(RuntimeError):
+        bluez_module.BluezClient()
+    assert fake_dbus.subscriptions == set()
+
+def test_failed_connection_is_cached_with_backoff(fake_dbus, clock, monkeypatch):
+    attempts = []
+    real_client = bluez_module.BluezClient
+    monkeypatch.setattr(bluez_module, "BluezClient", lambda bus_type: attempts.append(bus_type) or real_client(bus_type))
+
+    assert bluez_module.get_bluez_client() is None
+    assert bluez_module.get_bluez_client() is None
+    assert len(attempts) == 1  # The second call did not touch the bus
+
+    clock.value += bluez_module.RETRY_BASE_SECONDS
+    assert bluez_module.get_bluez_client() is None
+    assert len(attempts) == 2
+    clock.value += bluez_module.RETRY_BASE_SECONDS
+    assert bluez_module.get_bluez_client() is None
+    assert len(attempts) == 2  # Backed off to twice the base delay
+    clock.value += bluez_module.RETRY_BASE_SECONDS
+    assert bluez_module.get_bluez_client() is None
+    assert len(attempts) == 3
+    assert fake_dbus.subscriptions == set()
+
+# Against BlueZ as mocked by python-dbusmock on a private session bus
+
+ADAPTER = "hci0"
+FIRST = "11:22:33:44:55:66"
+SECOND = "AA:BB:CC:DD:EE:FF"
+
+@pytest.fixture(scope="module")
+def bluez_mock(dbus_session_bus):
+    process, mock = dbus_session_bus.DBusTestCase.spawn_server_template("bluez5", {}, system_bus=False)
+    mock.AddAdapter(ADAPTER, "systray-test", dbus_interface="org.bluez.Mock")
+    mock.AddDevice(ADAPTER, FIRST, "Headphones", dbus_interface="org.bluez.Mock")
+    yield mock
+    process.terminate()
+    process.wait()
+
+@pytest.fixture
+def client(bluez_mock):
+    from gi.repository import Gio
+    client = bluez_module.BluezClient(Gio.BusType.SESSION)
+    yield client
+    dbus_loop.call_in_loop(client.close)
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_initial_fetch_fills_the_cache(client):
+    device = client.get_device(FIRST)
+    assert device["Alias"] == "Headphones"
+    assert not device["Connected"]
+
+def test_signals_keep_the_cache_current(client, bluez_mock):
+    changes = []
+    client.add_listener(lambda: changes.append(True))
+    bluez_mock.AddDevice(ADAPTER, SECOND, "Keyboard", dbus_interface="org.bluez.Mock")
+    assert wait_until(lambda: client.get_device(SECOND) is not None)
+    bluez_mock.ConnectDevice(ADAPTER, SECOND, dbus_interface="org.bluez.Mock")
+    assert wait_until(lambda: [device["Address"] for device in client.get_connected_devices()] == [SECOND])
+    assert changes
@@ -0,0 +1,83 @@
+# test_brightness_fade.py
+
+import threading
+import time
+
+import pytest
+
+from utils.backlight import Backlight, discover_backlights
+from utils.brightness_fade import BrightnessFader, fraction_to_perceptual, perceptual_to_fraction
+
+MAX_BRIGHTNESS = 1000
+FPS = 60
+DURATION = 0.25
+SYNC_INTERVAL = 0.05
+
+@pytest.fixture
+def sysfs(tmp_path):
+    device = tmp_path / "intel_backlight"
+    device.mkdir()
+    (device / "max_brightness").write_text(f"{MAX_BRIGHTNESS}\n")
+    (device / "brightness").write_text("500\n")
+    (device / "type").write_text("raw\n")
+    return tmp_path
+
+@pytest.fixture
+def fader(sysfs):
+    backlight = Backlight(discover_backlights(str(sysfs))[0])
+    fader = BrightnessFader(backlight, fps=FPS, duration=DURATION, sync_interval=SYNC_INTERVAL)
+    yield fader
+    fader.stop()
+    backlight.close()
+
+def read_brightness(sysfs):
+    return int((sysfs / "intel_backlight" / "brightness").read_text())
+
+def test_burst_of_targets_keeps_writes_bounded(fader, sysfs):
+    started = time.monotonic()
+    for index in range(5000):
+        fader.fade_to(10 + index % 80)
+    burst = time.monotonic() - started
+    fader.fade_to(70)
+    fader.wait()
+    # At most one write per frame while the burst and the final fade are running
+    bound = FPS * (burst + DURATION) + 3
+    assert 0 < fader.backlight.writes <= bound
+    assert read_brightness(sysfs) == round(perceptual_to_fraction(70) * MAX_BRIGHTNESS)
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_outside_change_is_picked_up(fader, sysfs):
+    (sysfs / "intel_backlight" / "brightness").write_text("100\n")
+    expected = fraction_to_perceptual(100 / MAX_BRIGHTNESS)
+    # Re-read by the fader thread while idle
+    assert wait_until(lambda: fader.get_percentage() == pytest.approx(expected))
+
+    # A step starts from what the panel shows now, not from the stale start level
+    fader.step(5)
+    assert fader.get_percentage() == pytest.approx(expected + 5)
+    fader.wait()
+    assert read_brightness(sysfs) == round(perceptual_to_fraction(expected + 5) * MAX_BRIGHTNESS)
+
+def test_device_is_only_read_on_the_fader_thread(fader, sysfs):
+    readers = set()
+    read = fader.backlight.read
+
+    def record_read():
+        readers.add(threading.current_thread().name)
+        return read()
+
+    fader.backlight.read = record_read
+    for index in range(50):
+        fader.get_percentage()
+        fader.step(1 if index % 2 else -1)
+    fader.fade_to(40)
+    fader.wait()
+    assert wait_until(lambda: readers)  # The idle re-read after the fade
+    assert readers == {"brightness-fade"}
@@ -0,0 +1,81 @@
+# test_child_output.py
+
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+from utils.child_output import OutputReader, RotatingLog, RING_LINES, LOG_MAX_BYTES
+
+# Writes megabytes to both pipes, then numbered lines on stdout only
+FLOOD = """
+import sys
+line = "x" * 99 + "\\n"
+for index in range(4 * 10486):
+    (sys.stdout if index % 2 else sys.stderr).write(line)
+for index in range(int(sys.argv[1])):
+    sys.stdout.write(f"line {index}\\n")
+"""
+
+def wait_for_eof(reader, name, process):
+    # The reader closes each pipe once it has read it to the end
+    process.wait(timeout=30)
+    for _ in range(500):
+        if all(stream is None or stream.closed for stream in (process.stdout, process.stderr)):
+            return reader.tail(name)
+        time.sleep(0.01)
+    raise AssertionError(f"{name} pipes were not drained")
+
+def flood(reader, name, lines=1000, stderr=subprocess.PIPE):
+    process = subprocess.Popen([sys.executable, "-c", FLOOD, str(lines)],
+                               stdout=subprocess.PIPE, stderr=stderr)
+    reader.attach(name, process)
+    return process
+
+def test_flooding_child_does_not_block():
+    reader = OutputReader(log_dir=None)
+    process = flood(reader, "flood")
+    # Several times what the pipes hold: only finishes if the reader keeps up
+    assert process.wait(timeout=30) == 0
+    wait_for_eof(reader, "flood", process)
+    assert reader.outputs["flood"].bytes_read > 4 * 1024 * 1024
+
+def test_ring_keeps_the_last_lines():
+    reader = OutputReader(log_dir=None)
+    # Only stdout is read, so the order of the lines is the order they were written
+    process = flood(reader, "flood", lines=1000, stderr=subprocess.DEVNULL)
+    lines = wait_for_eof(reader, "flood", process)
+    assert len(lines) == RING_LINES
+    assert [line.split(": ", 1)[1] for line in lines] == [f"line {index}" for index in range(500, 1000)]
+    assert reader.tail("flood", 2)[-1].endswith("line 999")
+
+def test_rotating_log_keeps_backups(tmp_path):
+    log = RotatingLog(str(tmp_path / "logs" / "child.log"), max_bytes=100, backups=2)
+    for index in range(5):
+        log.write(bytes([ord("a") + index]) * 60)
+    log.close()
+    assert sorted(os.listdir(tmp_path / "logs")) == ["child.log", "child.log.1", "child.log.2"]
+    assert (tmp_path / "logs" / "child.log").read_bytes() == b"e" * 60
+    assert (tmp_path / "logs" / "child.log.1").read_bytes() == b"d" * 60
+    assert (tmp_path / "logs" / "child.log.2").read_bytes() == b"c" * 60
+
+def test_log_dir_comes_from_the_environment(tmp_path):
+    # LOG_DIR is read at import, so the shared reader is checked in a fresh interpreter
+    script = textwrap.dedent(f"""
+        import subprocess, sys, time
+        sys.path.insert(0, {os.path.join(os.path.dirname(__file__), '../src')!r})
+        from utils.child_output import get_output_reader
+        process = subprocess.Popen([sys.executable, "-c", {FLOOD!r}, "30000"],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        reader = get_output_reader()
+        reader.attach("flood", process)
+        process.wait(timeout=30)
+        while not (process.stdout.closed and process.stderr.closed):
+            time.sleep(0.01)
+    """)
+    env = dict(os.environ, SYSTRAY_CHILD_LOG_DIR=str(tmp_path))
+    subprocess.run([sys.executable, "-c", script], env=env, check=True, timeout=60)
+    logs = sorted(os.listdir(tmp_path))
+    assert logs == ["flood.log", "flood.log.1", "flood.log.2"]
+    assert all(os.path.getsize(tmp_path / name) <= LOG_MAX_BYTES for name in logs)
@@ -0,0 +1,172 @@
+# test_clipboard_server.py
+
+import io
+import random
+import time
+import types
+
+import pytest
+
+pytest.importorskip("Xlib")
+Image = pytest.importorskip("PIL.Image")
+
+from Xlib import X, Xatom
+
+from utils import clipboard_server
+from utils.clipboard_server import ClipboardServer
+
+ATOMS = {name: index for index, name in
+         enumerate(("CLIPBOARD", "TARGETS", "TIMESTAMP", "INCR", "image/png", "SYSTRAY_CLIPBOARD_TIME", "PRIMARY"), 100)}
+PROPERTY = 200
+
+def noise(width, height):
+    # Does not compress, so the PNG is about as big as the pixels
+    generator = random.Random(1)
+    return Image.frombytes("RGB", (width, height), generator.randbytes(width * height * 3))
+
+class FakeRequestor:
+    # The window of a client asking for the selection
+    def __init__(self, window_id=42):
+        self.id = window_id
+        self.properties = {}
+        self.notified = []
+        self.event_mask = None
+
+    def change_property(self, prop, type, format, data):
+        self.properties[prop] = (type, format, data)
+
+    def change_attributes(self, event_mask):
+        self.event_mask = event_mask
+
+    def send_event(self, event):
+        self.notified.append(event)
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(clipboard_server, "xevent", types.SimpleNamespace(SelectionNotify=dict))
+    server = ClipboardServer.__new__(ClipboardServer)
+    server.atoms = ATOMS
+    server.chunk_size = 1000
+    server.image = server.png = None
+    server.owned_since = 1234
+    server.transfers = {}
+    return server
+
+def request(server, requestor, target, selection="CLIPBOARD", prop=PROPERTY):
+    event = types.SimpleNamespace(requestor=requestor, selection=ATOMS[selection], target=ATOMS[target],
+                                  property=prop, time=5678)
+    server._answer(event)
+    return requestor.notified[-1]
+
+def test_targets_and_timestamp(server):
+    requestor = FakeRequestor()
+    notify = request(server, requestor, "TARGETS")
+    assert notify["property"] == PROPERTY and notify["target"] == ATOMS["TARGETS"]
+    assert requestor.properties[PROPERTY] == (Xatom.ATOM, 32, [ATOMS["TARGETS"], ATOMS["TIMESTAMP"], ATOMS["image/png"]])
+    request(server, requestor, "TIMESTAMP")
+    assert requestor.properties[PROPERTY] == (Xatom.INTEGER, 32, [1234])
+
+def test_small_png_goes_in_one_property(server):
+    server.image = Image.new("RGB", (8, 8), (1, 2, 3))
+    requestor = FakeRequestor()
+    notify = request(server, requestor, "image/png")
+    type, format, data = requestor.properties[PROPERTY]
+    assert notify["property"] == PROPERTY and (type, format) == (ATOMS["image/png"], 8)
+    assert data.startswith(b"\x89PNG") and len(data) <= server.chunk_size
+    assert server.image is None and server.png == data  # Encoded once, kept for the next paste
+    assert server.transfers == {}
+
+def test_large_png_is_sent_incrementally(server):
+    server.image = noise(40, 40)
+    requestor = FakeRequestor()
+    notify = request(server, requestor, "image/png")
+    png = server.png
+    assert notify["property"] == PROPERTY
+    assert requestor.properties[PROPERTY] == (ATOMS["INCR"], 32, [len(png)])
+    assert requestor.event_mask == X.PropertyChangeMask
+    received = b""
+    while True:
+        # Each time the requestor deletes the property, the next chunk follows
+        server._send_next_chunk(requestor, PROPERTY)
+        type, format, chunk = requestor.properties[PROPERTY]
+        assert (type, format) == (ATOMS["image/png"], 8) and len(chunk) <= server.chunk_size
+        if not chunk:
+            break
+        received += chunk
+    assert received == png
+    assert server.transfers == {}
+    server._send_next_chunk(requestor, PROPERTY)  # Stray deletes after the end are ignored
+    assert requestor.properties[PROPERTY][2] == b""
+
+def test_refused_requests(server):
+    requestor = FakeRequestor()
+    assert request(server, requestor, "TARGETS", selection="PRIMARY")["property"] == X.NONE
+    assert request(server, requestor, "SYSTRAY_CLIPBOARD_TIME")["property"] == X.NONE
+    server.owned_since = None  # Lost the selection
+    assert request(server, requestor, "TARGETS")["property"] == X.NONE
+    assert requestor.properties == {}
+
+def test_obsolete_client_gets_the_target_as_property(server):
+    requestor = FakeRequestor()
+    assert request(server, requestor, "TARGETS", prop=X.NONE)["property"] == ATOMS["TARGETS"]
+    assert ATOMS["TARGETS"] in requestor.properties
+
+def wait_for_event(display, event_type, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        while display.pending_events():
+            event = display.next_event()
+            if event.type == event_type:
+                return event
+        time.sleep(0.01)
+    raise AssertionError(f"no event of type {event_type}")
+
+def read_property(display, window, prop):
+    reply = window.get_property(prop, X.AnyPropertyType, 0, 1 << 24, delete=True)
+    display.flush()
+    return reply
+
+# The server thread loses its connection when Xvfb goes away after the test
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_paste_from_xvfb(xvfb):
+    from Xlib import display as xdisplay
+
+    server = ClipboardServer()
+    server.start()
+    image = noise(400, 400)  # Several INCR chunks
+    server.offer(image)
+    deadline = time.monotonic() + 5
+    while server.owned_since is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.owned_since is not None
+
+    client = xdisplay.Display(xvfb)
+    try:
+        window = client.screen().root.create_window(0, 0, 1, 1, 0, X.CopyFromParent,
+                                                    event_mask=X.PropertyChangeMask)
+        clipboard, prop = client.intern_atom("CLIPBOARD"), client.intern_atom("PASTE")
+
+        window.convert_selection(clipboard, client.intern_atom("TARGETS"), prop, X.CurrentTime)
+        client.flush()
+        assert wait_for_event(client, X.SelectionNotify).property == prop
+        assert client.intern_atom("image/png") in read_property(client, window, prop).value
+
+        window.convert_selection(clipboard, client.intern_atom("image/png"), prop, X.CurrentTime)
+        client.flush()
+        assert wait_for_event(client, X.SelectionNotify).property == prop
+        reply = read_property(client, window, prop)  # Deleting it asks for the first chunk
+        assert reply.property_type == client.intern_atom("INCR")
+        size = reply.value[0]
+        data = b""
+        while True:
+            event = wait_for_event(client, X.PropertyNotify)
+            if event.atom != prop or event.state != X.PropertyNewValue:
+                continue
+            chunk = read_property(client, window, prop).value
+            if not chunk:
+                break
+            data += chunk
+        assert len(data) == size
+        assert Image.open(io.BytesIO(data)).tobytes() == image.tobytes()
+    finally:
+        client.close()
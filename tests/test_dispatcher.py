@@ -0,0 +1,93 @@
+# test_dispatcher.py
+
+import threading
+import time
+
+import pytest
+
+from utils.dispatcher import ActionDispatcher, cancel_requested
+from utils import shutdown_timer
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = ActionDispatcher(max_workers=2)
+    yield dispatcher
+    dispatcher.shutdown()
+
+def wait_for_cancel(started):
+    started.set()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        if cancel_requested():
+            return "cancelled"
+        time.sleep(0.01)
+    return "timed out"
+
+def test_running_job_observes_cancel(dispatcher):
+    started = threading.Event()
+    future = dispatcher.submit("job", wait_for_cancel, started)
+    assert started.wait(5)
+    dispatcher.cancel_all()
+    assert future.result(timeout=5) == "cancelled"
+    assert not cancel_requested()  # Only the job's own worker sees its event
+
+def test_queued_job_is_dropped(dispatcher):
+    release = threading.Event()
+    blockers = [dispatcher.submit("busy", release.wait, 5) for _ in range(2)]
+    queued = dispatcher.submit("later", lambda: "ran")
+    dispatcher.cancel("later")
+    release.set()
+    assert queued.cancelled()
+    for future in blockers:
+        assert future.result(timeout=5)
+
+def test_limit_rejects_second_job(dispatcher):
+    release = threading.Event()
+    dispatcher.set_limit("power", 1)
+    first = dispatcher.submit("power", release.wait, 5)
+    assert dispatcher.submit("power", release.wait, 5) is None
+    release.set()
+    first.result(timeout=5)
+
+def test_interactive_jobs_leave_the_workers_free(dispatcher):
+    # More prompts waiting on the user than there are workers
+    release = threading.Event()
+    started = []
+    for action in ("power", "quit", "confirm"):
+        dispatcher.set_interactive(action)
+        started.append(threading.Event())
+        dispatcher.submit(action, lambda event: event.set() or release.wait(5), started[-1])
+    assert all(event.wait(5) for event in started)  # Their own pool, all running at once
+    results = [dispatcher.submit("conky", lambda index: index, index) for index in range(4)]
+    assert [future.result(timeout=1) for future in results] == [0, 1, 2, 3]
+    dispatcher.cancel_all()
+    release.set()
+
+def test_quit_stops_the_shutdown_countdown(dispatcher, monkeypatch):
+    # The countdown is a real cancel_requested() consumer: cancel_all() at quit must stop it
+    ui_calls = []
+    powered_off = []
+    started = threading.Event()
+
+    def fake_call_in_ui(fn, *args):
+        started.set()
+        return object(), object()
+
+    monkeypatch.setattr(shutdown_timer, "call_in_ui", fake_call_in_ui)
+    monkeypatch.setattr(shutdown_timer, "run_in_ui", lambda fn, *args: ui_calls.append(fn))
+    monkeypatch.setattr(shutdown_timer, "shutdown_system", lambda: powered_off.append(True))
+
+    future = dispatcher.submit("power", shutdown_timer.start_shutdown_timer, 60)
+    assert started.wait(5)
+    dispatcher.cancel_all()
+    assert future.result(timeout=2) is False
+    assert not powered_off
+    assert ui_calls[-1] is shutdown_timer.close_window
+
+def test_uncancelled_countdown_powers_off(dispatcher, monkeypatch):
+    powered_off = []
+    monkeypatch.setattr(shutdown_timer, "call_in_ui", lambda fn, *args: (object(), object()))
+    monkeypatch.setattr(shutdown_timer, "run_in_ui", lambda fn, *args: None)
+    monkeypatch.setattr(shutdown_timer, "shutdown_system", lambda: powered_off.append(True))
+    assert dispatcher.submit("power", shutdown_timer.start_shutdown_timer, 1).result(timeout=5)
+    assert powered_off
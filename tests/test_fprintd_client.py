@@ -0,0 +1,116 @@
+# test_fprintd_client.py
+
+import pytest
+
+from utils import sudo_prompt
+
+class FakeFprintdClient:
+    # Enrolled fingers can be changed by the test; listeners fire on demand
+    def __init__(self):
+        self.fingers = ["right-index-finger"]
+        self.listeners = []
+        self.probes = 0
+
+    def get_default_device(self):
+        self.probes += 1
+        return "/net/reactivated/Fprint/Device/0"
+
+    def list_enrolled_fingers(self, username, device=None):
+        return list(self.fingers)
+
+    def add_change_listener(self, listener):
+        self.listeners.append(listener)
+
+    def changed(self):
+        for listener in self.listeners:
+            listener()
+
+def test_capabilities_are_probed_again_after_a_change(monkeypatch):
+    client = FakeFprintdClient()
+    monkeypatch.setattr(sudo_prompt, "get_fprintd_client", lambda: client)
+    monkeypatch.setattr(sudo_prompt, "auth_capabilities", None)
+    monkeypatch.setattr(sudo_prompt, "change_listener_added", False)
+    assert sudo_prompt.get_auth_capabilities()["fingerprint"]
+    assert sudo_prompt.get_auth_capabilities()["fingerprint"]
+    assert client.probes == 1 and len(client.listeners) == 1  # Cached
+    client.fingers = []
+    client.changed()  # e.g. verify found no enrolled prints
+    assert not sudo_prompt.get_auth_capabilities()["fingerprint"]
+    assert client.probes == 2 and len(client.listeners) == 1
+
+# Fingerprint verification against fprintd as mocked by python-dbusmock on a private session bus
+
+FPRINT_SERVICE = "net.reactivated.Fprint"
+MANAGER_PATH = "/net/reactivated/Fprint/Manager"
+MANAGER_INTERFACE = "net.reactivated.Fprint.Manager"
+DEVICE_INTERFACE = "net.reactivated.Fprint.Device"
+DEVICE_PATH = "/net/reactivated/Fprint/Device/0"
+
+DEFAULT_DEVICE = f"ret = dbus.ObjectPath({DEVICE_PATH!r})"
+NO_PRINTS = ('raise dbus.exceptions.DBusException("No enrolled prints", '
+             'name="net.reactivated.Fprint.Error.NoEnrolledPrints")')
+NO_DEVICE = ('raise dbus.exceptions.DBusException("No devices available", '
+             'name="net.reactivated.Fprint.Error.NoSuchDevice")')
+
+def verify_start(*statuses):
+    # VerifyStart that reports the given (status, done) pairs as VerifyStatus signals
+    return "\n".join(f"self.EmitSignal('', 'VerifyStatus', 'sb', [{status!r}, {done!r}])"
+                     for status, done in statuses)
+
+@pytest.fixture(scope="module")
+def fprintd_mock(dbus_session_bus):
+    dbusmock = dbus_session_bus
+    process = dbusmock.DBusTestCase.spawn_server(FPRINT_SERVICE, MANAGER_PATH, MANAGER_INTERFACE, system_bus=False)
+    bus = dbusmock.DBusTestCase.get_dbus()
+    manager = bus.get_object(FPRINT_SERVICE, MANAGER_PATH)
+    manager.AddObject(DEVICE_PATH, DEVICE_INTERFACE, {}, [
+        ("Claim", "s", "", ""),
+        ("Release", "", "", ""),
+        ("VerifyStop", "", "", ""),
+        ("VerifyStart", "s", "", ""),
+        ("ListEnrolledFingers", "s", "as", "ret = ['right-index-finger']"),
+    ], dbus_interface=dbusmock.MOCK_IFACE)
+    device = bus.get_object(FPRINT_SERVICE, DEVICE_PATH)
+
+    def configure(default_device, verify_code=""):
+        manager.AddMethod(MANAGER_INTERFACE, "GetDefaultDevice", "", "o", default_device,
+                          dbus_interface=dbusmock.MOCK_IFACE)
+        device.AddMethod(DEVICE_INTERFACE, "VerifyStart", "s", "", verify_code,
+                         dbus_interface=dbusmock.MOCK_IFACE)
+
+    yield configure
+    process.terminate()
+    process.wait()
+
+@pytest.fixture
+def fprintd(fprintd_mock):
+    from gi.repository import Gio
+    from utils.fprintd_client import FprintdClient
+    client = FprintdClient(Gio.BusType.SESSION)
+    client.changes = []
+    client.add_change_listener(lambda: client.changes.append(True))
+    return client
+
+def test_fingerprint_match(fprintd_mock, fprintd):
+    # Retry statuses keep the scan going until a final one arrives
+    fprintd_mock(DEFAULT_DEVICE, verify_start(("verify-retry-scan", False), ("verify-match", True)))
+    assert fprintd.list_enrolled_fingers("user") == ["right-index-finger"]
+    assert fprintd.verify("user", timeout=5)
+    assert fprintd.changes == []
+
+def test_fingerprint_no_match(fprintd_mock, fprintd):
+    fprintd_mock(DEFAULT_DEVICE, verify_start(("verify-no-match", True)))
+    assert not fprintd.verify("user", timeout=5)
+    assert fprintd.changes == []
+
+def test_fingerprint_prints_removed(fprintd_mock, fprintd):
+    fprintd_mock(DEFAULT_DEVICE, NO_PRINTS)
+    assert not fprintd.verify("user", timeout=5)
+    assert fprintd.changes == [True]
+
+def test_fingerprint_device_missing(fprintd_mock, fprintd):
+    fprintd_mock(NO_DEVICE)
+    assert fprintd.get_default_device() is None
+    assert fprintd.list_enrolled_fingers("user") == []
+    assert not fprintd.verify("user", timeout=5)
+    assert fprintd.changes == [True]
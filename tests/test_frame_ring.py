@@ -0,0 +1,49 @@
+# test_frame_ring.py
+
+import os
+
+import pytest
+from PIL import Image
+
+from utils.frame_ring import FrameRing
+from utils.screenshot_index import ScreenshotIndex
+from utils import screenshot_tool
+
+def frame(ring, value):
+    return bytes([value]) * ring.frame_bytes
+
+def test_snapshot_hands_out_views_without_stopping_capture():
+    ring = FrameRing(3, 2, 2)
+    for value, timestamp in ((1, 1.0), (2, 2.0), (3, 3.0), (4, 4.0)):
+        ring.write(frame(ring, value), timestamp)
+    frames = ring.snapshot()
+    assert [timestamp for timestamp, pixels in frames] == [2.0, 3.0, 4.0]  # Oldest first, 1 overwritten
+    assert all(isinstance(pixels, memoryview) and pixels.readonly for timestamp, pixels in frames)
+
+    # Capture goes on into a fresh buffer; the handed-out frames stay as they were
+    for value in (5, 6, 7):
+        ring.write(frame(ring, value), float(value))
+    assert [bytes(pixels) for timestamp, pixels in frames] == [frame(ring, 2), frame(ring, 3), frame(ring, 4)]
+    assert [timestamp for timestamp, pixels in ring.snapshot()] == [5.0, 6.0, 7.0]
+
+def test_snapshot_since_keeps_newer_frames_only():
+    ring = FrameRing(4, 2, 2)
+    for timestamp in (1.0, 2.0, 3.0):
+        ring.write(frame(ring, 0), timestamp)
+    assert [timestamp for timestamp, pixels in ring.snapshot(since=2.0)] == [2.0, 3.0]
+    assert ring.snapshot() == []
+
+def test_saved_frames_come_from_the_views(tmp_path, monkeypatch):
+    index = ScreenshotIndex(str(tmp_path))
+    monkeypatch.setattr(screenshot_tool, "get_screenshot_index", lambda: index)
+    monkeypatch.setattr(screenshot_tool.tray_state, "set", lambda *args: None)
+    monkeypatch.setattr(screenshot_tool.image_encoder, "DEFAULT_FORMAT", "png-fast")
+    ring = FrameRing(8, 2, 2)
+    for value in range(6):
+        ring.write(bytes([value * 40, 0, 0, 0]) * 4, 1000.0 + value)  # BGRX: blue rises per frame
+    screenshot_tool.save_frames(ring.size, "BGRX", ring.snapshot())
+    saved = sorted(name for name in os.listdir(tmp_path) if name.endswith(".png"))
+    assert len(saved) == 6
+    for value, name in enumerate(saved):
+        with Image.open(tmp_path / name) as image:
+            assert image.getpixel((0, 0)) == (0, 0, value * 40)
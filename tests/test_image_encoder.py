@@ -0,0 +1,59 @@
+# test_image_encoder.py
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("PIL")
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+# Stands in for main.py: a __main__ that imports the registry at module level and
+# publishes it, then encodes a screenshot through the pool
+TRAY_SCRIPT = textwrap.dedent("""
+    import json, sys
+    sys.path.insert(0, {src!r})
+    from PIL import Image
+    from utils.pid_registry import pid_registry
+    from utils import image_encoder
+
+    if __name__ == "__main__":
+        pid_registry.publish()
+        pid_registry.register("camera", 4242)
+        with open(pid_registry.path) as f:
+            before = json.load(f)
+        image = Image.new("RGB", (64, 48), (10, 20, 30))
+        image_encoder.submit_encode(image, sys.argv[1], "png").result(timeout=60)
+        image_encoder.shutdown()
+        with open(pid_registry.path) as f:
+            after = json.load(f)
+        print(json.dumps({{"before": before, "after": after}}))
+""")
+
+def test_encode_pool_leaves_pidfile_alone(tmp_path):
+    script = tmp_path / "fake_main.py"
+    script.write_text(TRAY_SCRIPT.format(src=SRC_DIR))
+    env = dict(os.environ, XDG_RUNTIME_DIR=str(tmp_path / "run"))
+    env.pop("SYSTRAY_WRAPPER_PID", None)
+    output = subprocess.run([sys.executable, str(script), str(tmp_path / "shot.png")],
+                            env=env, capture_output=True, text=True, timeout=120, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    assert result["before"]["camera"] == 4242
+    assert result["after"] == result["before"]
+    assert os.path.getsize(tmp_path / "shot.png") > 0
+
+def test_encode_is_lossless_and_atomic(tmp_path):
+    from PIL import Image
+    from utils import image_encoder
+    image = Image.effect_noise((40, 30), 60).convert("RGB")
+    for format_name in ("png", "png-fast", "webp"):
+        _, extension, _ = image_encoder.resolve_format(format_name)
+        path = tmp_path / f"shot.{extension}"
+        image_encoder.write_atomically(str(path), image_encoder.encode(image, format_name))
+        with Image.open(path) as written:
+            assert written.convert("RGB").tobytes() == image.tobytes()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
@@ -0,0 +1,41 @@
+# test_region_select.py
+
+from utils.region_select import CLICK_DISTANCE, selection_box, window_at
+
+# Topmost first, as ScreenCapture.window_rectangles() lists them
+DIALOG = (300, 200, 200, 100)
+EDITOR = (100, 100, 800, 600)
+HANGING = (1800, 900, 400, 300)  # Reaches past a 1920x1080 screen
+WINDOWS = [DIALOG, EDITOR, HANGING]
+
+def test_window_at_prefers_the_topmost():
+    assert window_at(WINDOWS, 350, 250) == DIALOG  # Inside both, the dialog is on top
+    assert window_at(WINDOWS, 150, 150) == EDITOR
+    assert window_at(list(reversed(WINDOWS)), 350, 250) == EDITOR
+
+def test_window_at_edges():
+    assert window_at(WINDOWS, 100, 100) == EDITOR
+    assert window_at(WINDOWS, 899, 699) == EDITOR
+    assert window_at(WINDOWS, 900, 700) is None  # Right and bottom edges are outside
+    assert window_at([], 0, 0) is None
+
+def test_click_picks_the_window_under_it():
+    assert selection_box((350, 250), (350, 250), WINDOWS, 1920, 1080) == (300, 200, 500, 300)
+    # Moving less than CLICK_DISTANCE is still a click
+    jitter = CLICK_DISTANCE - 1
+    assert selection_box((150, 150), (150 + jitter, 150 - jitter), WINDOWS, 1920, 1080) == (100, 100, 900, 700)
+
+def test_click_on_no_window_selects_nothing():
+    assert selection_box((50, 50), (50, 50), WINDOWS, 1920, 1080) is None
+
+def test_drag_is_normalized():
+    expected = (150, 160, 400, 500)
+    assert selection_box((150, 160), (400, 500), WINDOWS, 1920, 1080) == expected
+    assert selection_box((400, 500), (150, 160), WINDOWS, 1920, 1080) == expected
+    assert selection_box((400, 160), (150, 500), WINDOWS, 1920, 1080) == expected
+    # CLICK_DISTANCE along one axis is enough to make it a drag
+    assert selection_box((10, 10), (10 + CLICK_DISTANCE, 10), WINDOWS, 1920, 1080) == (10, 10, 10 + CLICK_DISTANCE, 10)
+
+def test_box_is_clipped_to_the_frozen_image():
+    assert selection_box((1900, 1000), (1900, 1000), WINDOWS, 1920, 1080) == (1800, 900, 1920, 1080)
+    assert selection_box((-20, -30), (2000, 1100), WINDOWS, 1920, 1080) == (0, 0, 1920, 1080)
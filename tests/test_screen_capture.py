@@ -0,0 +1,72 @@
+# test_screen_capture.py
+
+import pytest
+
+from utils.screen_capture import ScreenCapture
+
+BACKGROUND = (0x12, 0x34, 0x56)  # Distinct red, green and blue, so a swapped order shows
+WINDOW = (0xC0, 0x10, 0x20)
+
+def fake_capture(width=1280, height=1024):
+    capture = ScreenCapture.__new__(ScreenCapture)
+    capture.screen_size = lambda: (width, height)
+    return capture
+
+def test_clip_defaults_to_the_whole_screen():
+    capture = fake_capture()
+    assert capture.clip() == (0, 0, 1280, 1024)
+    assert capture.clip(100, 50) == (100, 50, 1180, 974)
+
+def test_clip_keeps_the_rectangle_on_screen():
+    capture = fake_capture()
+    assert capture.clip(-10, -20, 100, 100) == (0, 0, 100, 100)
+    assert capture.clip(1200, 1000, 200, 200) == (1200, 1000, 80, 24)
+    with pytest.raises(ValueError):
+        capture.clip(1280, 0, 10, 10)
+
+@pytest.mark.parametrize("raw_mode, pixel", [("BGRX", bytes([0x56, 0x34, 0x12, 0])),  # LSBFirst server
+                                              ("XRGB", bytes([0, 0x12, 0x34, 0x56]))])  # MSBFirst server
+def test_raw_mode_matches_the_byte_order(raw_mode, pixel):
+    pytest.importorskip("PIL")
+    capture = fake_capture()
+    capture.raw_mode = raw_mode
+    assert capture.to_image(pixel * 6, (3, 2)).getpixel((2, 1)) == BACKGROUND
+
+def pixel_value(rgb):
+    # TrueColor at depth 24: the pixel value is 0xRRGGBB
+    return (rgb[0] << 16) | (rgb[1] << 8) | rgb[2]
+
+def test_grab_from_xvfb(xvfb):
+    pytest.importorskip("PIL")
+    from Xlib import X, display as xdisplay
+
+    # A second client paints the root background and maps one window on top
+    painter = xdisplay.Display(xvfb)
+    capture = ScreenCapture(xvfb)
+    try:
+        root = painter.screen().root
+        root.change_attributes(background_pixel=pixel_value(BACKGROUND))
+        root.clear_area()
+        window = root.create_window(100, 200, 50, 40, 0, painter.screen().root_depth,
+                                    X.InputOutput, X.CopyFromParent,
+                                    background_pixel=pixel_value(WINDOW), override_redirect=True)
+        window.map()
+        painter.sync()
+
+        image = capture.grab()
+        assert image.size == (1280, 1024)
+        assert image.getpixel((5, 5)) == BACKGROUND
+        assert image.getpixel((120, 220)) == WINDOW
+
+        # Whatever reaches past the screen is cut away; a negative origin moves onto it
+        image = capture.grab(1250, 190, 100, 100)
+        assert image.size == (30, 100)
+        image = capture.grab(90, -10, 20, 220)
+        assert image.size == (20, 220)
+        assert image.getpixel((5, 5)) == BACKGROUND
+        assert image.getpixel((15, 205)) == WINDOW
+
+        assert (100, 200, 50, 40) == capture.window_rectangles()[0]
+    finally:
+        capture.close()
+        painter.close()
@@ -0,0 +1,57 @@
+# test_screenshot_index.py
+
+import os
+from concurrent.futures import Future
+from datetime import datetime
+
+import pytest
+
+from utils.screenshot_index import ScreenshotIndex
+from utils import screenshot_tool
+
+@pytest.fixture
+def index(tmp_path):
+    return ScreenshotIndex(str(tmp_path))
+
+def names(paths):
+    return [os.path.basename(path) for path in paths]
+
+def test_monitors_of_one_capture_share_a_number(index):
+    today = datetime.now().strftime("%Y-%m-%d")
+    first = index.allocate_set(["DP-1", "eDP-1"])
+    second = index.allocate()
+    assert names(first) == [f"Screenshot-{today}-1-DP-1.png", f"Screenshot-{today}-1-eDP-1.png"]
+    assert names([second]) == [f"Screenshot-{today}-2.png"]
+
+def test_taken_name_moves_the_whole_set(index, tmp_path):
+    (tmp_path / "desk-eDP-1.png").write_bytes(b"x")
+    assert names(index.allocate_set(["DP-1", "eDP-1"], "desk")) == ["desk-DP-1-2.png", "desk-eDP-1-2.png"]
+    assert not (tmp_path / "desk-DP-1.png").exists()  # Released when its partner was taken
+
+def test_discard_only_removes_empty_reservations(index):
+    empty, written = index.allocate_set(["a", "b"])
+    with open(written, "wb") as f:
+        f.write(b"png")
+    index.discard(empty)
+    index.discard(written)
+    assert not os.path.exists(empty)
+    assert os.path.exists(written)
+
+def failed_encode(*args):
+    future = Future()
+    future.set_exception(OSError("No space left on device"))
+    return future
+
+def test_failed_encode_leaves_no_empty_file(index, monkeypatch):
+    monkeypatch.setattr(screenshot_tool, "get_screenshot_index", lambda: index)
+    monkeypatch.setattr(screenshot_tool.image_encoder, "submit_encode", failed_encode)
+    monkeypatch.setattr(screenshot_tool.image_encoder, "submit_encode_raw", failed_encode)
+
+    file_path = index.allocate()
+    with pytest.raises(OSError):
+        screenshot_tool.save_screenshot(None, file_path, "png")
+    assert not os.path.exists(file_path)
+
+    with pytest.raises(OSError):
+        screenshot_tool.save_frames((2, 2), "BGRX", [(1.0, bytes(16)), (1.1, bytes(16))])
+    assert sorted(os.listdir(index.directory)) == [".index.json", ".index.lock"]
@@ -0,0 +1,82 @@
+# test_screenshot_tool.py
+
+import pytest
+
+from utils import screenshot_tool
+
+LEFT = {"name": "eDP-1", "geometry": (1920, 1080, 0, 0)}  # xrandr order: width, height, x, y
+RIGHT = {"name": "HDMI-1", "geometry": (1280, 1024, 1920, 0)}
+OFF = {"name": "DP-2", "geometry": None}
+
+class FakeScreen:
+    def __init__(self, size=(3200, 1080), pointer=(0, 0)):
+        self.size = size
+        self.position = pointer
+
+    def screen_size(self):
+        return self.size
+
+    def pointer(self):
+        return self.position
+
+@pytest.fixture
+def outputs(monkeypatch):
+    # Each read returns the next layout; the last one repeats. Records invalidations.
+    state = {"layouts": [[LEFT, RIGHT, OFF]], "reads": 0, "invalidated": 0, "primary": "eDP-1"}
+
+    def get_connected_outputs():
+        layout = state["layouts"][min(state["reads"], len(state["layouts"]) - 1)]
+        state["reads"] += 1
+        return layout
+
+    def invalidate_display_state():
+        state["invalidated"] += 1
+
+    monkeypatch.setattr(screenshot_tool, "get_connected_outputs", get_connected_outputs)
+    monkeypatch.setattr(screenshot_tool, "invalidate_display_state", invalidate_display_state)
+    monkeypatch.setattr(screenshot_tool, "get_main_display", lambda: state["primary"])
+    return state
+
+def test_current_cache_is_read_once(outputs):
+    monitors = screenshot_tool.get_monitors((3200, 1080))
+    assert monitors == {"eDP-1": (0, 0, 1920, 1080), "HDMI-1": (1920, 0, 1280, 1024)}
+    assert outputs["reads"] == 1 and outputs["invalidated"] == 0
+
+def test_stale_cache_is_reread_once(outputs):
+    # The cache still has the laptop panel alone; the screen already spans both
+    outputs["layouts"] = [[LEFT], [LEFT, RIGHT]]
+    assert set(screenshot_tool.get_monitors((3200, 1080))) == {"eDP-1", "HDMI-1"}
+    assert outputs["reads"] == 2 and outputs["invalidated"] == 1
+
+def test_cache_that_stays_stale_is_used_as_is(outputs):
+    outputs["layouts"] = [[LEFT]]
+    assert set(screenshot_tool.get_monitors((3200, 1080))) == {"eDP-1"}
+    assert outputs["reads"] == 2  # No loop re-reading it forever
+
+def test_full_screen_needs_no_monitors(outputs):
+    assert screenshot_tool.capture_rectangles(FakeScreen(), "Full Screen") == [((0, 0, 3200, 1080), "")]
+    assert outputs["reads"] == 0
+
+def test_single_monitor_has_no_suffix(outputs):
+    screen = FakeScreen(pointer=(2000, 500))
+    assert screenshot_tool.capture_rectangles(screen, "Current Monitor") == [((1920, 0, 1280, 1024), "")]
+    assert screenshot_tool.capture_rectangles(screen, "Primary Monitor") == [((0, 0, 1920, 1080), "")]
+
+def test_each_monitor_is_named_left_to_right(outputs):
+    outputs["layouts"] = [[RIGHT, LEFT]]
+    assert screenshot_tool.capture_rectangles(FakeScreen(), "Each Monitor") == [
+        ((0, 0, 1920, 1080), "eDP-1"), ((1920, 0, 1280, 1024), "HDMI-1")]
+
+def test_each_monitor_with_one_output_has_no_suffix(outputs):
+    outputs["layouts"] = [[LEFT, OFF]]
+    screen = FakeScreen(size=(1920, 1080))
+    assert screenshot_tool.capture_rectangles(screen, "Each Monitor") == [((0, 0, 1920, 1080), "")]
+
+def test_no_monitor_falls_back_to_full_screen(outputs):
+    # The pointer is below the shorter monitor, and the primary output is gone
+    screen = FakeScreen(pointer=(2000, 1050))
+    assert screenshot_tool.capture_rectangles(screen, "Current Monitor") == [((0, 0, 3200, 1080), "")]
+    outputs["primary"] = "DP-2"
+    assert screenshot_tool.capture_rectangles(screen, "Primary Monitor") == [((0, 0, 3200, 1080), "")]
+    outputs["layouts"] = [[]]
+    assert screenshot_tool.capture_rectangles(screen, "Each Monitor") == [((0, 0, 3200, 1080), "")]
@@ -0,0 +1,82 @@
+# test_supervisor.py
+
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from utils.pid_registry import pid_registry
+from utils.supervisor import Supervisor
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+# Ignores SIGTERM and says so once the handler is in place
+STUBBORN = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print('ready', flush=True); time.sleep(30)"
+
+def spawn_stubborn(supervisor, name):
+    process = supervisor.spawn(name, [sys.executable, "-c", STUBBORN], stdout=subprocess.PIPE)
+    assert process.stdout.readline() == b"ready\n"
+    process.stdout.close()
+    return process
+
+def test_stop_returns_once_term_is_obeyed():
+    supervisor = Supervisor()
+    process = supervisor.spawn("sleeper", ["sleep", "30"])
+    started = time.monotonic()
+    assert supervisor.stop("sleeper", timeout=5)
+    assert time.monotonic() - started < 1  # Not held for the whole timeout
+    assert process.returncode == -signal.SIGTERM
+    assert not supervisor.is_running("sleeper")
+
+def test_stop_escalates_to_kill():
+    supervisor = Supervisor()
+    process = spawn_stubborn(supervisor, "stubborn")
+    started = time.monotonic()
+    assert not supervisor.stop("stubborn", timeout=0.5)
+    assert 0.5 <= time.monotonic() - started < 2
+    assert process.returncode == -signal.SIGKILL
+    assert not supervisor.is_running("stubborn")
+
+def test_stop_all_waits_in_parallel():
+    supervisor = Supervisor()
+    processes = [spawn_stubborn(supervisor, f"stubborn-{index}") for index in range(3)]
+    started = time.monotonic()
+    supervisor.stop_all(timeout=1)
+    # One timeout for all of them, not one after another
+    assert time.monotonic() - started < 2.5
+    assert all(process.returncode == -signal.SIGKILL for process in processes)
+    assert wait_until(lambda: not supervisor.children)
+
+def test_detached_helper_is_reaped():
+    supervisor = Supervisor()
+    announced = []
+    supervisor.add_listener(lambda name, running: announced.append(name))
+    process = supervisor.spawn_detached(["true"])
+    assert wait_until(lambda: not supervisor.children)
+    assert process.returncode == 0
+    with pytest.raises(ChildProcessError):
+        os.waitpid(process.pid, os.WNOHANG)  # Already reaped by the watcher: no zombie
+    assert announced == []
+    assert process.pid not in pid_registry.children().values()
+
+def test_detached_helper_outlives_stop_all():
+    supervisor = Supervisor()
+    viewer = supervisor.spawn_detached(["sleep", "30"])
+    child = supervisor.spawn("tray-child", ["sleep", "30"])
+    try:
+        supervisor.stop_all(timeout=1)
+        assert child.poll() is not None
+        assert viewer.poll() is None
+        assert os.getsid(viewer.pid) == viewer.pid  # In its own session
+    finally:
+        viewer.kill()
+    assert wait_until(lambda: not supervisor.children)
@@ -0,0 +1,88 @@
+# test_xrandr_tool.py
+
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from utils import xrandr_tool
+
+class FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, fn, *args):
+        self.scheduled.append((delay, fn, args))
+
+@pytest.fixture
+def probes(monkeypatch):
+    # Records whether each refresh probed connectors or only re-read --current
+    calls = []
+    monkeypatch.setattr(xrandr_tool, "rescan_displays", lambda: calls.append("probe"))
+    monkeypatch.setattr(xrandr_tool, "invalidate_display_state", lambda: calls.append("current"))
+    monkeypatch.setattr(xrandr_tool, "refresh_displays", lambda *args: None)
+    return calls
+
+def widgets(root):
+    # main_display ... resolution_menu, root, as the window passes them
+    return ("eDP-1", None, None, None, None, None, None, None, root)
+
+def test_layout_change_reads_current_state(probes):
+    xrandr_tool.on_randr_events([("screen", None), ("output", 0x42)], *widgets(FakeRoot()))
+    assert probes == ["current"]
+
+def test_hotplug_probes_connectors(probes):
+    xrandr_tool.on_randr_events([("screen", None), ("connected", 0x42)], *widgets(FakeRoot()))
+    assert probes == ["probe"]
+
+def test_polling_probes_at_a_lower_rate(probes):
+    root = FakeRoot()
+    xrandr_tool.update_displays(*widgets(root))
+    for _ in range(2 * xrandr_tool.PROBE_EVERY_POLLS - 1):
+        delay, fn, args = root.scheduled.pop()
+        assert delay == xrandr_tool.POLL_INTERVAL_MS
+        fn(*args)
+    assert probes.count("probe") == 2
+    assert len(probes) == 2 * xrandr_tool.PROBE_EVERY_POLLS
+
+def test_randr_event_refreshes_without_probing(xvfb, probes):
+    # The listener posts into Tk from its own thread, which Tk only accepts while
+    # the main thread is inside mainloop(), so the check runs from within the loop
+    import tkinter as tk
+    from utils.randr_events import start_randr_listener
+
+    if shutil.which("xrandr") is None:
+        pytest.skip("xrandr is needed to change the screen")
+    root = tk.Tk()
+    batches = []
+    resize = {}
+
+    def on_events(events):
+        batches.append(events)
+        xrandr_tool.on_randr_events(events, *widgets(root))
+
+    def check(deadline):
+        if batches or time.monotonic() > deadline:
+            root.quit()
+        else:
+            root.after(20, check, deadline)
+
+    def start_resize():
+        # Resizing the screen raises ScreenChangeNotify; no connector changes state
+        resize["process"] = subprocess.Popen(["xrandr", "--fb", "1024x768"])
+
+    listener = start_randr_listener(root, on_events)
+    assert listener is not None
+    try:
+        root.after(50, start_resize)
+        root.after(50, check, time.monotonic() + 5)
+        root.mainloop()
+        assert resize["process"].wait(5) == 0
+        assert batches, "no RandR event reached the Tk loop"
+        assert ("screen", None) in batches[0]
+        assert "probe" not in probes and "current" in probes
+    finally:
+        listener.stop()
+        listener.join(5)
+        root.destroy()
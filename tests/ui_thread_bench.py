@@ -0,0 +1,57 @@
+# ui_thread_bench.py
+# Compares opening windows with a fresh tk.Tk() each time against Toplevels on one
+# long-lived hidden root: time to first paint and RSS growth over N opens.
+# Needs an X display: python3 tests/ui_thread_bench.py [opens]
+
+import sys
+import time
+import tkinter as tk
+
+opens = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+def rss_kib():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+def wait_for_paint(window):
+    # First paint is approximated by the window being mapped and its idle redraws flushed
+    while not window.winfo_ismapped():
+        window.update()
+    window.update_idletasks()
+
+def open_with_new_interpreter():
+    start = time.perf_counter()
+    root = tk.Tk()
+    root.geometry("300x100")
+    tk.Label(root, text="Benchmark").pack(pady=10)
+    wait_for_paint(root)
+    elapsed = time.perf_counter() - start
+    root.destroy()
+    return elapsed
+
+shared_root = None
+
+def open_as_toplevel():
+    global shared_root
+    if shared_root is None:
+        shared_root = tk.Tk()
+        shared_root.withdraw()
+    start = time.perf_counter()
+    window = tk.Toplevel(shared_root)
+    window.geometry("300x100")
+    tk.Label(window, text="Benchmark").pack(pady=10)
+    wait_for_paint(window)
+    elapsed = time.perf_counter() - start
+    window.destroy()
+    shared_root.update()
+    return elapsed
+
+for label, open_window in (("tk.Tk() per window", open_with_new_interpreter), ("shared root + Toplevel", open_as_toplevel)):
+    rss_before = rss_kib()
+    timings = sorted(open_window() * 1000 for _ in range(opens))
+    rss_after = rss_kib()
+    print(f"{label:24} first paint mean {sum(timings) / len(timings):7.2f} ms  "
+          f"median {timings[len(timings) // 2]:7.2f} ms  RSS growth {rss_after - rss_before} KiB")
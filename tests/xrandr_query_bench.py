@@ -0,0 +1,23 @@
+# xrandr_query_bench.py
+# Compares the per-query cost of a probing `xrandr` against `xrandr --current`.
+# Run on the X session you want to measure: python3 tests/xrandr_query_bench.py [iterations]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from utils.xrandr_tool import query_display_state
+
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+for label, probe in (("xrandr (probe)", True), ("xrandr --current", False)):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        query_display_state(probe)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"{label:20} mean {sum(timings) / len(timings):8.2f} ms  "
+          f"median {timings[len(timings) // 2]:8.2f} ms  max {timings[-1]:8.2f} ms")